@@ -0,0 +1,508 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from bisect import bisect_right
+
+from rest_framework_mvt.tiles import MAX_LATITUDE
+
+
+def open_archive(path):
+    """
+    Args:
+        path (str): Path of an MBTiles (.mbtiles) or PMTiles (.pmtiles) archive.
+    Returns:
+        :py:class:`MBTilesReader` or :py:class:`PMTilesReader`:
+        A reader of the archive.
+    Raises:
+        ValueError: If the file extension is neither .mbtiles nor .pmtiles.
+    """
+    return _get_archive_classes(path)[1](path)
+
+
+def create_archive(path, **kwargs):
+    """
+    Args:
+        path (str): Path of the MBTiles (.mbtiles) or PMTiles (.pmtiles) archive to
+                    create.  An existing file is replaced.
+        kwargs: Metadata keyword arguments of :py:class:`MBTilesWriter`.
+    Returns:
+        :py:class:`MBTilesWriter` or :py:class:`PMTilesWriter`:
+        A writer of the archive.
+    Raises:
+        ValueError: If the file extension is neither .mbtiles nor .pmtiles.
+    """
+    return _get_archive_classes(path)[0](path, **kwargs)
+
+
+def _get_archive_classes(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".mbtiles":
+        return MBTilesWriter, MBTilesReader
+    if extension == ".pmtiles":
+        return PMTilesWriter, PMTilesReader
+    raise ValueError(f"Unsupported tile archive: {path}")
+
+
+class BaseTileArchiveWriter:
+    """
+    Base class for writing gzip compressed Mapbox Vector Tiles to a single file
+    archive.  Use writers as context managers so the archive is finalized.
+
+    Args:
+        path (str): Path of the archive.  An existing file is replaced.
+        name (str): Name of the tileset.  The default is the file name.
+        layer_names (list): Names of the layers in the tiles.  The default is
+                            ``["default"]``.
+        bounds (tuple): West, south, east and north edges of the tiles in
+                        EPSG:4326.  The default is the whole world.
+    """
+
+    def __init__(self, path, name=None, layer_names=("default",), bounds=None):
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        self.layer_names = list(layer_names)
+        self.bounds = bounds or (-180.0, -MAX_LATITUDE, 180.0, MAX_LATITUDE)
+        self.min_zoom = None
+        self.max_zoom = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_tile(self, z, x, y, mvt):
+        """
+        Args:
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile, counted from the north.
+            mvt (bytes): The uncompressed tile.  Empty tiles are skipped.
+        """
+        if not mvt:
+            return
+        self.min_zoom = z if self.min_zoom is None else min(self.min_zoom, z)
+        self.max_zoom = z if self.max_zoom is None else max(self.max_zoom, z)
+        self._write_tile(z, x, y, gzip.compress(bytes(mvt), compresslevel=9, mtime=0))
+
+    def close(self):
+        raise NotImplementedError("close() must be implemented")
+
+    def _write_tile(self, z, x, y, data):
+        raise NotImplementedError("_write_tile() must be implemented")
+
+    def _get_metadata(self):
+        return {
+            "name": self.name,
+            "format": "pbf",
+            "minzoom": self.min_zoom or 0,
+            "maxzoom": self.max_zoom or 0,
+            "bounds": ",".join(str(edge) for edge in self.bounds),
+            "json": json.dumps(
+                {
+                    "vector_layers": [
+                        {"id": layer_name, "fields": {}}
+                        for layer_name in self.layer_names
+                    ]
+                }
+            ),
+        }
+
+
+class MBTilesWriter(BaseTileArchiveWriter):
+    """
+    Writes an `MBTiles <https://github.com/mapbox/mbtiles-spec>`_ archive.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        if os.path.exists(path):
+            os.remove(path)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(
+            "CREATE TABLE metadata (name text, value text);"
+            "CREATE TABLE tiles (zoom_level integer, tile_column integer, "
+            "tile_row integer, tile_data blob);"
+            "CREATE UNIQUE INDEX tile_index ON tiles "
+            "(zoom_level, tile_column, tile_row);"
+        )
+
+    def close(self):
+        if self._connection is None:
+            return
+        self._connection.executemany(
+            "INSERT INTO metadata (name, value) VALUES (?, ?)",
+            [(name, str(value)) for name, value in self._get_metadata().items()],
+        )
+        self._connection.commit()
+        self._connection.close()
+        self._connection = None
+
+    def _write_tile(self, z, x, y, data):
+        # MBTiles rows are counted from the south
+        self._connection.execute(
+            "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+            (z, x, 2**z - 1 - y, data),
+        )
+
+
+class MBTilesReader:
+    """
+    Reads tiles from an MBTiles archive.  The database is opened read only with
+    memory-mapped I/O, one connection per thread.
+
+    Args:
+        path (str): Path of the archive.
+    """
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._local = threading.local()
+
+    def get_tile(self, z, x, y):
+        """
+        Args:
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile, counted from the north.
+        Returns:
+            bytes:
+            The tile as stored, usually gzip compressed, or None if the archive has
+            no such tile.
+        """
+        row = (
+            self._get_connection()
+            .execute(
+                "SELECT tile_data FROM tiles "
+                "WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, 2**z - 1 - y),
+            )
+            .fetchone()
+        )
+        return None if row is None else bytes(row[0])
+
+    def get_metadata(self):
+        """
+        Returns:
+            dict:
+            The metadata of the archive.
+        """
+        return dict(self._get_connection().execute("SELECT name, value FROM metadata"))
+
+    def _get_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            connection.execute(f"PRAGMA mmap_size = {os.path.getsize(self.path)}")
+            self._local.connection = connection
+        return connection
+
+
+def zxy_to_tile_id(z, x, y):
+    """
+    Args:
+        z (int): Zoom level of the tile.
+        x (int): Column of the tile.
+        y (int): Row of the tile, counted from the north.
+    Returns:
+        int:
+        The PMTiles tile ID, i.e., the tile's position on the Hilbert curve of its
+        zoom level after all tiles of lower zoom levels.
+    """
+    tile_id = ((1 << (2 * z)) - 1) // 3
+    size = 1 << z
+    step = size >> 1
+    while step > 0:
+        rx = 1 if x & step else 0
+        ry = 1 if y & step else 0
+        tile_id += step * step * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = size - 1 - x, size - 1 - y
+            x, y = y, x
+        step >>= 1
+    return tile_id
+
+
+# PMTiles compression and tile type codes
+_PMTILES_GZIP = 2
+_PMTILES_MVT = 1
+_PMTILES_HEADER = struct.Struct("<7sBQQQQQQQQQQQBBBBBBiiiiBii")
+_PMTILES_ROOT_SIZE = 16384
+
+
+class PMTilesWriter(BaseTileArchiveWriter):
+    """
+    Writes a `PMTiles version 3 <https://github.com/protomaps/PMTiles>`_ archive.
+
+    Tiles are buffered in a temporary file until the archive is closed.  Identical
+    tiles, e.g., water or empty land, are stored once; only a digest of each
+    distinct tile is kept in memory.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        # pylint: disable=consider-using-with
+        self._data = tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path)))
+        self._offsets = {}
+        self._entries = []
+
+    def close(self):
+        if self._data is None:
+            return
+        entries = _merge_runs(sorted(self._entries))
+        root, leaves = _build_directories(entries)
+        metadata = gzip.compress(json.dumps(self._get_metadata()).encode(), mtime=0)
+        header = self._pack_header(entries, root, metadata, leaves)
+        with open(self.path, "wb") as archive:
+            archive.write(header + root + metadata + leaves)
+            self._data.seek(0)
+            while True:
+                chunk = self._data.read(1024 * 1024)
+                if not chunk:
+                    break
+                archive.write(chunk)
+        self._data.close()
+        self._data = None
+
+    def _pack_header(self, entries, root, metadata, leaves):
+        clustered = [entry[0] for entry in self._entries] == sorted(
+            entry[0] for entry in self._entries
+        )
+        root_offset = _PMTILES_HEADER.size
+        metadata_offset = root_offset + len(root)
+        leaves_offset = metadata_offset + len(metadata)
+        data_offset = leaves_offset + len(leaves)
+        west, south, east, north = self.bounds
+        return _PMTILES_HEADER.pack(
+            b"PMTiles",
+            3,
+            root_offset,
+            len(root),
+            metadata_offset,
+            len(metadata),
+            leaves_offset,
+            len(leaves),
+            data_offset,
+            self._data.tell(),
+            len(self._entries),
+            len(entries),
+            len(self._offsets),
+            1 if clustered else 0,
+            _PMTILES_GZIP,
+            _PMTILES_GZIP,
+            _PMTILES_MVT,
+            self.min_zoom or 0,
+            self.max_zoom or 0,
+            int(west * 1e7),
+            int(south * 1e7),
+            int(east * 1e7),
+            int(north * 1e7),
+            self.min_zoom or 0,
+            int((west + east) / 2 * 1e7),
+            int((south + north) / 2 * 1e7),
+        )
+
+    def _get_metadata(self):
+        metadata = super()._get_metadata()
+        metadata.update(json.loads(metadata.pop("json")))
+        return metadata
+
+    def _write_tile(self, z, x, y, data):
+        digest = hashlib.sha256(data).digest()
+        offset = self._offsets.get(digest)
+        if offset is None:
+            offset = self._offsets[digest] = self._data.tell()
+            self._data.write(data)
+        self._entries.append((zxy_to_tile_id(z, x, y), offset, len(data)))
+
+
+def _merge_runs(entries):
+    """
+    Merges consecutive tile IDs with the same data into entries of (tile ID,
+    offset, length, run length).
+    """
+    merged = []
+    for tile_id, offset, length in entries:
+        if merged:
+            last_id, last_offset, last_length, run_length = merged[-1]
+            if last_id == tile_id:
+                merged[-1] = (tile_id, offset, length, run_length)
+                continue
+            if (last_offset, last_length) == (offset, length) and (
+                last_id + run_length == tile_id
+            ):
+                merged[-1] = (last_id, last_offset, last_length, run_length + 1)
+                continue
+        merged.append((tile_id, offset, length, 1))
+    return merged
+
+
+def _build_directories(entries):
+    """
+    Returns:
+        tuple:
+        The compressed root directory and leaf directories.  Leaf directories are
+        only used when the root directory would not fit in the first 16KB.
+    """
+    root = _serialize_directory(entries)
+    if len(root) + _PMTILES_HEADER.size <= _PMTILES_ROOT_SIZE:
+        return root, b""
+    leaf_size = 4096
+    while True:
+        root_entries, leaves, leaves_length = [], [], 0
+        for start in range(0, len(entries), leaf_size):
+            leaf = _serialize_directory(entries[start : start + leaf_size])
+            root_entries.append((entries[start][0], leaves_length, len(leaf), 0))
+            leaves.append(leaf)
+            leaves_length += len(leaf)
+        root = _serialize_directory(root_entries)
+        if len(root) + _PMTILES_HEADER.size <= _PMTILES_ROOT_SIZE:
+            return root, b"".join(leaves)
+        leaf_size *= 2
+
+
+def _serialize_directory(entries):
+    data = bytearray()
+    _write_varint(data, len(entries))
+    last_id = 0
+    for tile_id, _, _, _ in entries:
+        _write_varint(data, tile_id - last_id)
+        last_id = tile_id
+    for _, _, _, run_length in entries:
+        _write_varint(data, run_length)
+    for _, _, length, _ in entries:
+        _write_varint(data, length)
+    for index, (_, offset, _, _) in enumerate(entries):
+        previous = entries[index - 1] if index else None
+        if previous is not None and offset == previous[1] + previous[2]:
+            _write_varint(data, 0)
+        else:
+            _write_varint(data, offset + 1)
+    return gzip.compress(bytes(data), mtime=0)
+
+
+def _deserialize_directory(data):
+    data = gzip.decompress(data)
+    position = 0
+
+    def read_varint():
+        nonlocal position
+        value, shift = 0, 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    count = read_varint()
+    tile_ids, last_id = [], 0
+    for _ in range(count):
+        last_id += read_varint()
+        tile_ids.append(last_id)
+    run_lengths = [read_varint() for _ in range(count)]
+    lengths = [read_varint() for _ in range(count)]
+    offsets = []
+    for index in range(count):
+        value = read_varint()
+        if value == 0 and index:
+            offsets.append(offsets[index - 1] + lengths[index - 1])
+        else:
+            offsets.append(value - 1)
+    return tile_ids, offsets, lengths, run_lengths
+
+
+def _write_varint(data, value):
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+# pylint: disable=too-many-instance-attributes
+class PMTilesReader:
+    """
+    Reads tiles from a PMTiles version 3 archive through a read only memory map.
+    Decoded directories are kept in memory.
+
+    Args:
+        path (str): Path of the archive.
+    Raises:
+        ValueError: If the file is not a PMTiles version 3 archive of gzip
+                    compressed tiles.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as archive:
+            self._map = mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _PMTILES_HEADER.unpack_from(self._map)
+        if header[0] != b"PMTiles" or header[1] != 3:
+            raise ValueError(f"{path} is not a PMTiles version 3 archive")
+        if header[14] != _PMTILES_GZIP or header[15] != _PMTILES_GZIP:
+            raise ValueError(f"{path} must use gzip compression")
+        self._root = (header[2], header[3])
+        self._metadata = (header[4], header[5])
+        self._leaves_offset = header[6]
+        self._data_offset = header[8]
+        self._directories = {}
+        self._lock = threading.Lock()
+
+    def get_tile(self, z, x, y):
+        """
+        Args:
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile, counted from the north.
+        Returns:
+            bytes:
+            The gzip compressed tile or None if the archive has no such tile.
+        """
+        tile_id = zxy_to_tile_id(z, x, y)
+        offset, length = self._root
+        for _ in range(4):  # the root and at most three levels of leaves
+            tile_ids, offsets, lengths, run_lengths = self._get_directory(
+                offset, length
+            )
+            index = bisect_right(tile_ids, tile_id) - 1
+            if index < 0:
+                return None
+            if run_lengths[index] == 0:
+                offset = self._leaves_offset + offsets[index]
+                length = lengths[index]
+                continue
+            if tile_id >= tile_ids[index] + run_lengths[index]:
+                return None
+            start = self._data_offset + offsets[index]
+            return self._map[start : start + lengths[index]]
+        return None
+
+    def get_metadata(self):
+        """
+        Returns:
+            dict:
+            The metadata of the archive.
+        """
+        offset, length = self._metadata
+        return json.loads(gzip.decompress(self._map[offset : offset + length]))
+
+    def close(self):
+        self._map.close()
+
+    def _get_directory(self, offset, length):
+        directory = self._directories.get(offset)
+        if directory is None:
+            directory = _deserialize_directory(self._map[offset : offset + length])
+            with self._lock:
+                self._directories[offset] = directory
+        return directory
@@ -0,0 +1,107 @@
+from rest_framework_mvt.metrics import Stopwatch
+from rest_framework_mvt.signals import tile_queried
+
+
+class BatchMixin:
+    """
+    Queries of :py:class:`rest_framework_mvt.managers.MVTManager` rendering many
+    tiles at once.
+    """
+
+    def intersect_tiles(self, tiles, limit=-1, offset=0, filters={}, **kwargs):
+        """
+        Renders many tiles of a zoom level in a single query, e.g., for clients
+        fetching every tile of their viewport at once.  The tiles' envelopes are
+        built by Postgres with ST_TileEnvelope and each tile is rendered from the
+        rows intersecting its envelope.
+
+        Args:
+            tiles (list): z/x/y tuples of the tiles, all of the same zoom level.
+            limit (int): Number of entries to include in each tile.  The default is
+                         -1 (includes all results).
+            offset (int): Index to start collecting entries from in each tile.  The
+                          default is 0.
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+            kwargs: Any other keyword argument of :py:meth:`MVTManager.intersect` but ``bbox``
+                    and ``tile``.
+                    The zoom level defaults to the tiles' zoom level.
+        Returns:
+            list:
+            Bytes of each tile in the order of ``tiles``.
+        Raises:
+            ValueError: If the tiles are of different zoom levels.
+        """
+        tiles = [tuple(tile) for tile in tiles]
+        if not tiles:
+            return []
+        stopwatch = Stopwatch()
+        query, parameters = self._build_tiles_query(
+            tiles,
+            limit,
+            offset,
+            counted=tile_queried.has_listeners(self.model),
+            filters=filters,
+            **kwargs,
+        )
+        stopwatch.lap("build")
+        rows = self._fetch_tile_row(query, parameters, stopwatch, many=True)
+        return [row[-1] for row in rows]
+
+    def _build_tiles_query(self, tiles, limit, offset, **kwargs):
+        """
+        Returns:
+            tuple:
+            The parameterized query rendering each z/x/y tile for the keyword
+            arguments of :py:meth:`MVTManager._build_query` and all of its parameters.
+        Raises:
+            ValueError: If the tiles are of different zoom levels.
+        """
+        zooms = {int(z) for z, _, _ in tiles}
+        if len(zooms) > 1:
+            raise ValueError("Tiles rendered together must be of the same zoom level")
+        kwargs.setdefault("zoom", zooms.pop())
+        limit = None if limit == -1 else limit
+        query, parameters = self._build_query(tiles="tiles", **kwargs)
+        coordinates = [[int(tile[index]) for tile in tiles] for index in range(3)]
+        return query, coordinates + parameters + [limit, offset]
+
+    @staticmethod
+    def _create_tiles_query(tile_query, srid, many=True):
+        """
+        Args:
+            tile_query (str): Query of a tile reading the tile's envelope in
+                              EPSG:3857 from ``tiles.envelope`` and in the SRID of
+                              the geometry from ``tiles.bounds``.
+            srid (int): SRID of the geometry column.
+            many (bool): Run the tile query per z/x/y of three integer array
+                         parameters instead of for three integer parameters.  The
+                         default is True.
+        Returns:
+            str:
+            A query running the tile query once per z/x/y and selecting the tiles
+            in the order of the arrays.
+        """
+        bounds = "envelope" if srid == 3857 else f"ST_Transform(envelope, {int(srid)})"
+        # envelopes are built and transformed once per tile instead of once per row
+        if not many:
+            return f"""
+        WITH tiles AS (
+            SELECT envelope, {bounds} AS bounds
+            FROM (SELECT ST_TileEnvelope(%s::integer, %s::integer, %s::integer)
+                AS envelope) AS t
+        )
+        SELECT tile.*
+            FROM tiles CROSS JOIN LATERAL ({tile_query}) AS tile;
+        """
+        return f"""
+        WITH tiles AS (
+            SELECT n, envelope, {bounds} AS bounds
+            FROM (SELECT n, ST_TileEnvelope(z, x, y) AS envelope
+                FROM unnest(%s::integer[], %s::integer[], %s::integer[])
+                    WITH ORDINALITY AS t(z, x, y, n)) AS t
+        )
+        SELECT tile.*
+            FROM tiles CROSS JOIN LATERAL ({tile_query}) AS tile
+            ORDER BY tiles.n;
+        """
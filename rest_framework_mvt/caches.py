@@ -0,0 +1,464 @@
+import abc
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from rest_framework_mvt.tiles import get_zoom_value
+
+
+def get_layer_key(model, geo_col):
+    """
+    Args:
+        model (:py:class:`django.contrib.gis.db.models.Model`): A GeoDjango model
+        geo_col (str): Column name with the geometry.
+    Returns:
+        str:
+        A string identifying the tiles of a model's geometry column in a tile cache.
+    """
+    return f"{model._meta.label_lower}.{geo_col}"
+
+
+class BaseTileCache(abc.ABC):
+    """
+    Base class for server side tile caches.
+
+    Tiles are stored per "slot", a layer and z/x/y address.  The slot key holds a
+    random generation and every variant (filters, pagination) of the tile is
+    stored under its own key containing that generation.  Deleting the slot key
+    evicts all variants together when the underlying data changes, as the next
+    tile cached starts a new generation.  Variants expire at the latest with their
+    generation, ``timeout`` seconds after the first of them was cached.  Empty
+    tiles are cached as well.
+
+    Subclasses implement the ``get``, ``set``, ``add`` and ``delete_many`` storage
+    primitives.  Caches held in the memory of a process set ``process_local``.
+
+    Args:
+        timeout (int, dict): Number of seconds a tile is cached for.  A dict maps
+                             minimum zoom levels to timeouts, e.g.,
+                             ``{0: 86400, 14: 600}``.  None caches tiles forever.
+                             The default is 300.
+        key_prefix (str): Prefix of every cache key.  The default is "mvt".
+    """
+
+    def __init__(self, timeout=300, key_prefix="mvt"):
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    process_local = False
+
+    # Attributes holding locks, which cannot be pickled and are recreated instead
+    _lock_attributes = ("_stats_lock",)
+
+    def __getstate__(self):
+        # caches are pickled to pass them to seeding worker processes
+        state = self.__dict__.copy()
+        for name in self._lock_attributes:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in self._lock_attributes:
+            setattr(self, name, threading.Lock())
+
+    def get_generation(self, layer, z, x, y):
+        """
+        Returns the current generation of a slot, starting one if the slot has
+        none.  Capture it before rendering a tile and pass it to ``set_tile``, so a
+        tile rendered from data changed in the meantime is not cached.
+
+        Args:
+            layer (str): Layer key as returned by :py:func:`get_layer_key`.
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile.
+        Returns:
+            str:
+            The generation or None if the slot was invalidated while it was started.
+        """
+        key = self.make_slot_key(layer, z, x, y)
+        generation = self.get(key)
+        if generation is None:
+            generation = self._start_generation(key, get_zoom_value(self.timeout, z))
+        return generation
+
+    # pylint: disable=too-many-arguments
+    def get_tile(self, layer, z, x, y, variant="", generation=None, count=True):
+        """
+        Args:
+            layer (str): Layer key as returned by :py:func:`get_layer_key`.
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile.
+            variant (str): Variant of the tile as returned by ``make_variant``.
+            generation (str): Generation of the slot as returned by
+                              ``get_generation``.  The default is the current one.
+            count (bool): Count the lookup as a hit or miss in ``stats()``, e.g.,
+                          not while waiting for another process to cache the
+                          tile.  The default is True.
+        Returns:
+            bytes:
+            The cached tile or None if the tile is not cached.
+        """
+        key = self.make_slot_key(layer, z, x, y)
+        if generation is None:
+            generation = self.get(key)
+        tile = None if generation is None else self.get(f"{key}:{generation}:{variant}")
+        if not count:
+            return tile
+        with self._stats_lock:
+            if tile is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return tile
+
+    # pylint: disable=too-many-arguments
+    def set_tile(self, layer, z, x, y, tile, variant="", generation=None):
+        """
+        Args:
+            layer (str): Layer key as returned by :py:func:`get_layer_key`.
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile.
+            tile (bytes): The tile to cache.
+            variant (str): Variant of the tile as returned by ``make_variant``.
+            generation (str): Generation of the slot captured with
+                              ``get_generation`` before the tile was rendered.  The
+                              tile is only stored if the generation is still
+                              current.  The default is the current one.
+        """
+        key = self.make_slot_key(layer, z, x, y)
+        timeout = get_zoom_value(self.timeout, z)
+        current = self.get(key)
+        if generation is None:
+            generation = current or self._start_generation(key, timeout)
+        elif generation != current:
+            return  # the slot was invalidated while the tile was rendered
+        if generation is not None:
+            self.set(f"{key}:{generation}:{variant}", bytes(tile), timeout)
+
+    def _start_generation(self, key, timeout):
+        generation = uuid.uuid4().hex
+        if self.add(key, generation, timeout):
+            return generation
+        # another caller started a generation first, or None if the slot was
+        # invalidated in the meantime
+        return self.get(key)
+
+    # pylint: disable=too-many-arguments
+    def acquire_lock(self, layer, z, x, y, variant="", timeout=10):
+        """
+        Acquires a lock on rendering a tile variant shared by every process using
+        the cache.
+
+        Args:
+            layer (str): Layer key as returned by :py:func:`get_layer_key`.
+            z (int): Zoom level of the tile.
+            x (int): Column of the tile.
+            y (int): Row of the tile.
+            variant (str): Variant of the tile as returned by ``make_variant``.
+            timeout (float): Seconds after which the lock expires.  The default is 10.
+        Returns:
+            bool:
+            True if the lock was acquired and False if it is held by another caller.
+        """
+        return self.add(self._make_lock_key(layer, z, x, y, variant), {}, timeout)
+
+    # pylint: disable=too-many-arguments
+    def release_lock(self, layer, z, x, y, variant=""):
+        self.delete_many([self._make_lock_key(layer, z, x, y, variant)])
+
+    # pylint: disable=too-many-arguments
+    def _make_lock_key(self, layer, z, x, y, variant):
+        return f"{self.make_slot_key(layer, z, x, y)}:lock:{variant}"
+
+    def make_slot_key(self, layer, z, x, y):
+        return f"{self.key_prefix}:{layer}:{z}:{x}:{y}"
+
+    @staticmethod
+    def make_variant(filters=None, limit=None, offset=None, options=None):
+        """
+        Args:
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+            limit (int): Number of entries included in the tile.
+            offset (int): Index entries were collected from.
+            options (dict): Keyword arguments the tile was rendered with, e.g., its
+                            simplification, columns and layer name, so views
+                            rendering a model differently never share tiles.
+        Returns:
+            str:
+            A digest identifying the variant.  Filters and options are normalized so
+            their order does not matter.
+        """
+        normalized = repr(
+            (
+                sorted((filters or {}).items()),
+                limit,
+                offset,
+                sorted((options or {}).items()),
+            )
+        )
+        return hashlib.md5(normalized.encode()).hexdigest()
+
+    def stats(self):
+        """
+        Returns:
+            dict:
+            The number of cache hits and misses since the cache was created.
+        """
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    @abc.abstractmethod
+    def get(self, key):
+        """
+        Returns:
+            object:
+            The value of the key or None if it is missing or expired.
+        """
+
+    @abc.abstractmethod
+    def set(self, key, value, timeout):
+        """
+        Stores a value for ``timeout`` seconds, forever if it is None.  Nothing is
+        stored if it is 0 or less.
+        """
+
+    @abc.abstractmethod
+    def add(self, key, value, timeout):
+        """
+        Stores a value like ``set`` unless the key holds an unexpired value.
+
+        Returns:
+            bool:
+            False if the key holds an unexpired value.
+        """
+
+    @abc.abstractmethod
+    def delete_many(self, keys):
+        """
+        Deletes the keys, skipping missing ones.
+        """
+
+
+class DjangoTileCache(BaseTileCache):
+    """
+    Stores tiles in one of the project's Django caches.
+
+    Args:
+        alias (str): Name of the cache in the CACHES setting.  The default is "default".
+    """
+
+    def __init__(self, alias="default", **kwargs):
+        super().__init__(**kwargs)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        # pylint: disable=import-outside-toplevel
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    @property
+    def process_local(self):
+        # pylint: disable=import-outside-toplevel
+        from django.core.cache.backends.locmem import LocMemCache
+
+        return isinstance(self.cache, LocMemCache)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+    def add(self, key, value, timeout):
+        return self.cache.add(key, value, timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+
+class LRUTileCache(BaseTileCache):
+    """
+    Stores tiles in process memory and evicts the least recently used entries once
+    the cached tiles exceed a byte budget.
+
+    Args:
+        max_bytes (int): Maximum number of tile bytes to keep.  The default is 64MB.
+    """
+
+    process_local = True
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    _lock_attributes = BaseTileCache._lock_attributes + ("_lock",)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires is not None and expires <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._set(key, value, timeout)
+
+    def add(self, key, value, timeout):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                return False
+            self._set(key, value, timeout)
+            return True
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def _set(self, key, value, timeout):
+        # only tiles count towards the budget, not generations or locks
+        size = len(value) if isinstance(value, bytes) else 0
+        self._pop(key)
+        if size > self.max_bytes or (timeout is not None and timeout <= 0):
+            return
+        expires = None if timeout is None else time.monotonic() + timeout
+        self._entries[key] = (expires, value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+class FileSystemTileCache(BaseTileCache):
+    """
+    Stores tiles as files in a directory shared by every process on a host.
+
+    Args:
+        directory (str): Directory to store tiles in.  It is created if missing.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+
+    def get(self, key):
+        try:
+            with open(self._get_path(key), "rb") as tile_file:
+                expires, value = pickle.load(tile_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires <= time.time():
+            self.delete_many([key])
+            return None
+        return value
+
+    def set(self, key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            self.delete_many([key])
+            return
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        expires = None if timeout is None else time.time() + timeout
+        # write to a temporary file first so readers never see a partial tile
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "wb") as tile_file:
+            pickle.dump((expires, value), tile_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def add(self, key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            return self.get(key) is None
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        expires = None if timeout is None else time.time() + timeout
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "wb") as tile_file:
+            pickle.dump((expires, value), tile_file, pickle.HIGHEST_PROTOCOL)
+        try:
+            # linking fails if the file exists, which makes the check atomic
+            for _ in range(2):
+                try:
+                    os.link(temp_path, path)
+                    return True
+                except FileExistsError:
+                    if self.get(key) is not None:
+                        return False  # get() removed the file if it expired
+            return False
+        finally:
+            os.remove(temp_path)
+
+    def delete_many(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._get_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _get_path(self, key):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+
+class RedisTileCache(BaseTileCache):
+    """
+    Stores tiles in Redis.
+
+    Args:
+        client (object): A client exposing the ``get``, ``set`` and ``delete``
+                         methods of ``redis.Redis``.
+    """
+
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, timeout):
+        # Redis rejects expiry times of 0 or less
+        if timeout is not None and timeout <= 0:
+            self.client.delete(key)
+            return
+        self.client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=timeout)
+
+    def add(self, key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            return self.get(key) is None
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return bool(self.client.set(key, value, ex=timeout, nx=True))
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        if keys:
+            self.client.delete(*keys)
@@ -0,0 +1,92 @@
+class ClusterMixin:
+    """
+    Point clustering of :py:class:`rest_framework_mvt.managers.MVTManager` tile
+    queries.
+    """
+
+    def _get_cluster_format(self, cluster, cluster_method="grid", aggregates=None):
+        """
+        Returns:
+            tuple:
+            The cluster distance, method and aggregates as (name, function, column)
+            tuples, falling back to the manager's aggregates when they are None.
+        Raises:
+            ValueError: If the distance, method, an aggregate function or column is
+                        invalid.
+        """
+        cluster = float(cluster)
+        if cluster <= 0:
+            raise ValueError("cluster must be positive")
+        if cluster_method not in ("grid", "dbscan"):
+            raise ValueError(f"Unknown cluster_method: {cluster_method}")
+        aggregates = self.cluster_aggregates if aggregates is None else aggregates
+        aggregates = tuple(
+            (str(name), function, column)
+            for name, (function, column) in sorted((aggregates or {}).items())
+        )
+        functions = {function for _, function, _ in aggregates}
+        if not functions.issubset(_CLUSTER_AGGREGATES):
+            unknown = ", ".join(sorted(functions - set(_CLUSTER_AGGREGATES)))
+            raise ValueError(f"Unknown aggregate functions: {unknown}")
+        columns = {column for _, _, column in aggregates}
+        if not columns.issubset(self._get_non_geom_columns()):
+            unknown = ", ".join(sorted(columns - set(self._get_non_geom_columns())))
+            raise ValueError(f"Unknown columns: {unknown}")
+        return cluster, cluster_method, aggregates
+
+    # pylint: disable=too-many-arguments
+    def _create_cluster_rows(
+        self, table, where_clause, tile_envelope, cluster, source=None
+    ):
+        """
+        Args:
+            table (str): A string representing the name of the table to query on.
+            where_clause (str): A parameterized SQL WHERE clause.
+            tile_envelope (str): The envelope, extent, buffer and clip arguments of
+                                 ST_AsMVTGeom.
+            cluster (tuple): The cluster distance, method and aggregates as returned
+                             by :py:meth:`_get_cluster_format`.
+            source (tuple): The geometry column, its SRID and the join of its table.
+        Returns:
+            str:
+            A SQL query selecting a row per cluster.
+        """
+        distance, method, aggregates = cluster
+        source = source or self._get_geometry_source(table)
+        geometry = self._create_geometry_expression(table, source=source)
+        columns = sorted({column for _, _, column in aggregates})
+        inner_columns = "".join(f", {table}.{column}" for column in columns)
+        attributes = "".join(
+            f", {function.upper()}(points.{column}) AS {_quote_alias(name)}"
+            for name, function, column in aggregates
+        )
+        if method == "grid":
+            # cells are counted from the grid's corner, so with a distance dividing
+            # the tile's width no cell spans two tiles and no cluster is split
+            group_by = ", ".join(
+                f"FLOOR((ST_{axis}(points.geom) + {_MERCATOR_HALF_WIDTH!r}) / {distance!r})"
+                for axis in ("X", "Y")
+            )
+        else:
+            inner_columns += (
+                f", ST_ClusterDBSCAN({geometry}, eps := {distance!r}, minpoints := 1) "
+                "OVER () AS cluster"
+            )
+            group_by = "points.cluster"
+        return f"""SELECT COUNT(*) AS point_count{attributes},
+                ST_AsMVTGeom(ST_Centroid(ST_Collect(points.geom)),
+                {tile_envelope}) AS mvt_geom
+            FROM (SELECT {geometry} AS geom{inner_columns}
+                FROM {table}{source[2]}
+                WHERE {where_clause}) AS points
+            GROUP BY {group_by}"""
+
+
+def _quote_alias(name):
+    # the alias is part of a query with %s placeholders
+    escaped = name.replace('"', '""').replace("%", "%%")
+    return f'"{escaped}"'
+
+
+_CLUSTER_AGGREGATES = ("sum", "avg", "min", "max")
+_MERCATOR_HALF_WIDTH = 20037508.342789244
@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.  The first caller runs the
+    function and every caller arriving while it runs waits for and shares its
+    result or exception, e.g., to render a tile once when many clients request
+    it at the same time.
+
+    Threads coalesce through :py:meth:`do` and coroutines of an event loop
+    through :py:meth:`ado`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._futures = {}
+
+    def do(self, key, function):
+        """
+        Args:
+            key (tuple): Hashable key identifying the call.
+            function (callable): Function without arguments computing the result.
+        Returns:
+            object:
+            The result of the function.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, function):
+        """
+        Args:
+            key (tuple): Hashable key identifying the call.
+            function (callable): Coroutine function without arguments computing
+                                 the result.
+        Returns:
+            object:
+            The result of the coroutine.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._futures.get(loop_key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            # the leader was cancelled, so one of the waiting callers takes over
+            future = self._futures.get(loop_key)
+        future = self._futures[loop_key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()  # retrieved, so unawaited errors are not logged
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[loop_key]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# pylint: disable=too-many-arguments
+def render_tile_once(
+    tile_cache, layer, z, x, y, variant, render, lock_timeout, generation=None
+):
+    """
+    Renders and caches a tile in only one process of all sharing ``tile_cache``.
+    Other processes wait for the tile to appear in the cache and render it
+    themselves if it does not appear within ``lock_timeout`` seconds.
+
+    Args:
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache the
+                        tile and the lock are stored in.
+        layer (str): Layer key as returned by ``get_layer_key``.
+        z (int): Zoom level of the tile.
+        x (int): Column of the tile.
+        y (int): Row of the tile.
+        variant (str): Variant of the tile.
+        render (callable): Function without arguments returning the tile.
+        lock_timeout (float): Seconds the lock is held for at most.
+        generation (str): Generation of the tile's slot captured before rendering,
+                          see :py:meth:`BaseTileCache.get_generation`.  The default
+                          is the current one.
+    Returns:
+        bytes:
+        The tile.
+    """
+    deadline = time.monotonic() + lock_timeout
+    acquired = tile_cache.acquire_lock(layer, z, x, y, variant, lock_timeout)
+    while not acquired:
+        time.sleep(_POLL_INTERVAL)
+        # the caller counted the lookup already, polls are not cache misses
+        mvt = tile_cache.get_tile(layer, z, x, y, variant, generation, count=False)
+        if mvt is not None:
+            return mvt
+        if time.monotonic() >= deadline:
+            break
+        acquired = tile_cache.acquire_lock(layer, z, x, y, variant, lock_timeout)
+    try:
+        # the previous lock holder may have finished before the lock was acquired
+        mvt = tile_cache.get_tile(layer, z, x, y, variant, generation, count=False)
+        if mvt is None:
+            mvt = bytes(render())
+            tile_cache.set_tile(layer, z, x, y, mvt, variant, generation)
+        return mvt
+    finally:
+        if acquired:
+            tile_cache.release_lock(layer, z, x, y, variant)
+
+
+# pylint: disable=too-many-arguments
+async def arender_tile_once(
+    tile_cache, layer, z, x, y, variant, render, lock_timeout, generation=None
+):
+    """
+    Async version of :py:func:`render_tile_once`.  ``render`` is a coroutine
+    function and the cache is accessed through ``sync_to_async``.
+    """
+    deadline = time.monotonic() + lock_timeout
+    acquire_lock = sync_to_async(tile_cache.acquire_lock)
+    acquired = await acquire_lock(layer, z, x, y, variant, lock_timeout)
+    while not acquired:
+        await asyncio.sleep(_POLL_INTERVAL)
+        mvt = await sync_to_async(tile_cache.get_tile)(
+            layer, z, x, y, variant, generation, count=False
+        )
+        if mvt is not None:
+            return mvt
+        if time.monotonic() >= deadline:
+            break
+        acquired = await acquire_lock(layer, z, x, y, variant, lock_timeout)
+    try:
+        mvt = await sync_to_async(tile_cache.get_tile)(
+            layer, z, x, y, variant, generation, count=False
+        )
+        if mvt is None:
+            mvt = bytes(await render())
+            await sync_to_async(tile_cache.set_tile)(
+                layer, z, x, y, mvt, variant, generation
+            )
+        return mvt
+    finally:
+        if acquired:
+            await sync_to_async(tile_cache.release_lock)(layer, z, x, y, variant)
+
+
+_POLL_INTERVAL = 0.05
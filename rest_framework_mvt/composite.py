@@ -0,0 +1,220 @@
+from rest_framework.serializers import ValidationError
+from rest_framework_mvt.caches import get_layer_key
+from rest_framework_mvt.managers import MVTManager, _fetch_row
+from rest_framework_mvt.metrics import Stopwatch
+from rest_framework_mvt.views import BaseMVTView
+
+
+# pylint: disable=too-many-arguments
+def intersect_layers(layers, bbox="", limit=-1, offset=0, gzip=False, tile=None):
+    """
+    Builds one tile with a layer per manager in a single SQL statement, e.g., to
+    serve a map's layers with one request and one database round trip.
+
+    Args:
+        layers (list): Tuples of an MVTManager and a dict of keyword arguments of
+                       :py:meth:`MVTManager.intersect` for its layer, e.g.,
+                       ``[(Road.vector_tiles, {"layer_name": "roads"})]``.  Every
+                       layer needs a distinct layer name.
+        bbox (str): A string representing a bounding box, e.g., '-90,29,-89,35'.
+        limit (int): Number of entries to include per layer.  The default is -1
+                     (includes all results).
+        offset (int): Index to start collecting entries from per layer.  The default
+                      is 0.
+        gzip (bool): Compress non-empty tiles with gzip in Postgres.  The default is
+                     False.
+        tile (tuple): The z, x and y of the tile, see :py:meth:`MVTManager.intersect`.
+                      The default is None (the tile of the bbox).
+    Returns:
+        bytes:
+        Bytes representing a Google Protobuf encoded Mapbox Vector Tile with the
+        layers in the given order.
+    Raises:
+        ValidationError: If filters include keys or values not accepted by a
+                         layer's model.
+        ValueError: If there are no layers, the layer names are not distinct or
+                    the managers query different databases.
+    """
+    if not layers:
+        raise ValueError("At least one layer is required")
+    managers = [manager for manager, _ in layers]
+    if len({_get_databases(manager) for manager in managers}) > 1:
+        raise ValueError("All layers must be queried from the same database")
+    layer_names = set()
+    for manager, options in layers:
+        layer_name = options.get("layer_name")
+        layer_name = manager.layer_name if layer_name is None else str(layer_name)
+        if layer_name in layer_names:
+            raise ValueError(f"Duplicate layer name: {layer_name}")
+        layer_names.add(layer_name)
+    stopwatch = Stopwatch()
+    query, parameters = _build_layers_query(
+        layers, bbox, None if limit == -1 else limit, offset, gzip, tile
+    )
+    stopwatch.lap("build")
+    return managers[0]._route(
+        lambda connection: _fetch_row(
+            connection,
+            query,
+            parameters,
+            managers[0].prepared,
+            managers[0].statement_timeout,
+            stopwatch=stopwatch,
+        )
+    )[-1]
+
+
+class BaseCompositeMVTView(BaseMVTView):
+    """
+    Base view for serving several models as the layers of one Mapbox Vector Tile.
+    The layers are queried in a single SQL statement, see
+    :py:func:`intersect_layers`.
+
+    Set ``layers`` to (model, manager name, layer name) tuples, e.g.,
+    ``((Road, "vector_tiles", "roads"), (Building, "vector_tiles", "buildings"))``.
+    Filters are prefixed with the layer name they apply to, e.g.,
+    ``?tile=8/65/98&roads.surface=gravel``.  The tile format, simplification,
+    minimum feature size and column settings apply to every layer.  Keyset
+    pagination, ``filter_schema`` and the ``max_features`` and ``max_tile_bytes``
+    limits are not supported.
+
+    Note:
+        Cached composite tiles are not evicted by
+        :py:class:`rest_framework_mvt.invalidation.TileInvalidator`.  Give them a
+        timeout instead.
+    """
+
+    layers = ()
+
+    def _get_layers(self):
+        """
+        Returns:
+            list:
+            Tuples of the MVTManager and layer name of each layer.
+        """
+        return [
+            (getattr(model, manager_name), layer_name)
+            for model, manager_name, layer_name in self.layers
+        ]
+
+    # pylint: disable=too-many-arguments
+    def _query_tile(self, tile, limit, offset, filters, options):
+        options = dict(options)
+        gzip_tiles = options.pop("gzip", False)
+        for name in ("max_features", "max_bytes", "fallbacks"):
+            options.pop(name, None)
+        layers = self._get_layers()
+        layer_filters = self._split_filters(
+            filters, [layer_name for _, layer_name in layers]
+        )
+        return intersect_layers(
+            [
+                (
+                    manager,
+                    dict(
+                        options,
+                        layer_name=layer_name,
+                        filters=layer_filters.get(layer_name, {}),
+                    ),
+                )
+                for manager, layer_name in layers
+            ],
+            tile=tile,
+            limit=-1 if limit is None else limit,
+            offset=0 if offset is None else offset,
+            gzip=gzip_tiles,
+        )
+
+    # pylint: disable=too-many-arguments
+    def _query_page(self, tile, limit, after, filters, options):
+        raise ValueError("Composite tiles do not support keyset pagination")
+
+    def _get_layer_key(self):
+        return "+".join(
+            f"{get_layer_key(manager.model, manager.geo_col)}@{layer_name}"
+            for manager, layer_name in self._get_layers()
+        )
+
+    def _get_extent(self):
+        return self._get_layers()[0][0].extent
+
+    @staticmethod
+    def _split_filters(filters, layer_names):
+        """
+        Args:
+            filters (dict): Filters prefixed with a layer name and a dot.
+            layer_names (list): Names of the layers.
+        Returns:
+            dict:
+            The filters of each layer keyed by layer name.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if a filter is not prefixed
+                                                        with a layer name
+        """
+        layer_filters = {}
+        for key, value in filters.items():
+            layer_name, _, field = key.partition(".")
+            if not field or layer_name not in layer_names:
+                raise ValidationError(f"Filter {key} is not prefixed with a layer name")
+            layer_filters.setdefault(layer_name, {})[field] = value
+        return layer_filters
+
+
+def composite_mvt_view_factory(layers, **kwargs):
+    """
+    Creates an MVTView that serves several models as the layers of one Mapbox
+    Vector Tile.
+
+    Args:
+        layers (list): (model, manager name, layer name) tuples, e.g.,
+                       ``[(Road, "vector_tiles", "roads")]``.
+        kwargs: Any of ``tile_cache``, ``cache_control_max_age``,
+                ``content_encodings`` and ``database_compression`` as accepted
+                by :py:func:`rest_framework_mvt.views.mvt_view_factory`.
+    Returns:
+        :py:class:`rest_framework_mvt.composite.BaseCompositeMVTView`:
+        A subclass of :py:class:`rest_framework_mvt.composite.BaseCompositeMVTView`
+        serving the layers.
+    """
+    return type(
+        "CompositeMVTView", (BaseCompositeMVTView,), {"layers": tuple(layers), **kwargs}
+    ).as_view()
+
+
+# pylint: disable=too-many-arguments
+def _build_layers_query(layers, bbox, limit, offset, gzip, tile):
+    """
+    Returns:
+        tuple:
+        The query of :py:func:`intersect_layers` concatenating the tile of every
+        layer and its parameters.
+    """
+    subqueries, parameters = [], []
+    for index, (manager, options) in enumerate(layers):
+        subquery, layer_parameters = _build_layer_subquery(
+            index, manager, options, bbox, tile
+        )
+        subqueries.append(subquery)
+        parameters += layer_parameters + [limit, offset]
+    tiles = " || ".join(subqueries)
+    if gzip:
+        tiles = f"COALESCE(gzip(NULLIF({tiles}, '')), '')"
+    return f"SELECT NULL AS id, {tiles};", parameters
+
+
+def _build_layer_subquery(index, manager, options, bbox, tile):
+    """
+    Returns:
+        tuple:
+        A subquery selecting the tile of a layer, followed by a LIMIT and an
+        OFFSET parameter, and its envelope and WHERE clause parameters.
+    """
+    envelope, options = MVTManager._get_envelope_parameters(bbox, tile, options)
+    query, where_parameters = manager._build_query(**options)
+    subquery = f"(SELECT tile FROM ({query.rstrip(';')}) AS layer_{index}(id, tile))"
+    return subquery, envelope + where_parameters
+
+
+def _get_databases(manager):
+    aliases = None if manager.replicas is None else tuple(manager.replicas.aliases)
+    return manager.source_name, aliases
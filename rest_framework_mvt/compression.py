@@ -0,0 +1,64 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+def get_supported_encodings():
+    """
+    Returns:
+        tuple:
+        The content encodings tiles can be compressed with.  Brotli ("br") requires
+        the optional brotli package.
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding, encodings):
+    """
+    Args:
+        accept_encoding (str): Value of the request's Accept-Encoding header.
+        encodings (tuple): Content encodings the server offers in order of preference.
+    Returns:
+        str:
+        The offered encoding with the highest quality accepted by the client or None
+        if the tile should not be compressed.
+    """
+    qualities = {}
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        qualities[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if encoding in get_supported_encodings() and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    """
+    Args:
+        data (bytes): The data to compress, or any bytes-like object.
+        encoding (str): A content encoding returned by ``negotiate_encoding``.
+    Returns:
+        bytes:
+        The compressed data.  Empty data is never compressed.  Gzip headers carry
+        no timestamp, so a tile always compresses to the same bytes and its ETag
+        stays stable.
+    """
+    if not data or encoding is None:
+        return data
+    if encoding == "br":
+        return brotli.compress(bytes(data))
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
@@ -0,0 +1,197 @@
+from asgiref.sync import sync_to_async
+
+from rest_framework_mvt.metrics import Stopwatch
+
+
+class DegradationMixin:
+    """
+    Tile queries of :py:class:`rest_framework_mvt.managers.MVTManager` bounding
+    the features and bytes of a tile by falling back to cheaper options.
+    """
+
+    # pylint: disable=too-many-arguments
+    def intersect_limited(
+        self,
+        bbox="",
+        limit=-1,
+        offset=0,
+        filters={},
+        max_features=None,
+        max_bytes=None,
+        fallbacks=(),
+        **kwargs,
+    ):
+        """
+        Counterpart of :py:meth:`MVTManager.intersect` guarding against tiles with too many
+        features or bytes.  A tile exceeding a limit is discarded in Postgres and
+        queried again with the next, cheaper, set of options, e.g., with more
+        aggressive simplification or fewer columns.  A query cancelled by the
+        ``statement_timeout`` falls back the same way.
+
+        The last set of options is never discarded.  Its tile is truncated to
+        ``max_features`` features instead, so a tile is always served.
+
+        Args:
+            bbox (str): A string representing a bounding box, e.g., '-90,29,-89,35'.
+            limit (int): Number of entries to include in the result.  The default
+                         is -1 (includes all results).
+            offset (int): Index to start collecting entries from.  The default is 0.
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+            max_features (int): Maximum number of features in the tile.  The default
+                                is None (no maximum).
+            max_bytes (int): Maximum size of the tile in bytes.  The default is None
+                             (no maximum).
+            fallbacks (list): Dicts of keyword arguments of :py:meth:`MVTManager.intersect`
+                              updating ``kwargs``, from the first to the last
+                              fallback.  The default is no fallbacks.
+            kwargs: Any other keyword argument of :py:meth:`MVTManager.intersect`, e.g.,
+                    ``tile``.
+        Returns:
+            bytes:
+            Bytes representing a Google Protobuf encoded Mapbox Vector Tile.
+        """
+        stopwatch = Stopwatch()
+        queries = self._build_limited_queries(
+            bbox,
+            limit,
+            offset,
+            max_features,
+            max_bytes,
+            fallbacks,
+            filters=filters,
+            **kwargs,
+        )
+        stopwatch.lap("build")
+        for query, parameters in queries[:-1]:
+            try:
+                mvt = self._fetch_tile_row(query, parameters, stopwatch)[-1]
+            except Exception as error:  # pylint: disable=broad-except
+                if not self._is_cancelled(error):
+                    raise
+                continue
+            if mvt is not None:
+                return mvt
+        return self._fetch_tile_row(*queries[-1], stopwatch)[-1]
+
+    # pylint: disable=too-many-arguments
+    async def aintersect_limited(
+        self,
+        bbox="",
+        limit=-1,
+        offset=0,
+        filters={},
+        max_features=None,
+        max_bytes=None,
+        fallbacks=(),
+        **kwargs,
+    ):
+        """
+        Async counterpart of :py:meth:`intersect_limited` taking the same arguments.
+
+        Returns:
+            bytes:
+            Bytes representing a Google Protobuf encoded Mapbox Vector Tile.
+        """
+        if self.async_pool is None:
+            return await sync_to_async(self.intersect_limited)(
+                bbox=bbox,
+                limit=limit,
+                offset=offset,
+                filters=filters,
+                max_features=max_features,
+                max_bytes=max_bytes,
+                fallbacks=fallbacks,
+                **kwargs,
+            )
+        stopwatch = Stopwatch()
+        queries = await sync_to_async(self._build_limited_queries)(
+            bbox,
+            limit,
+            offset,
+            max_features,
+            max_bytes,
+            fallbacks,
+            filters=filters,
+            **kwargs,
+        )
+        stopwatch.lap("build")
+        for query, parameters in queries[:-1]:
+            try:
+                mvt = (await self._afetch_tile_row(query, parameters, stopwatch))[-1]
+            except Exception as error:  # pylint: disable=broad-except
+                if not self._is_cancelled(error):
+                    raise
+                continue
+            if mvt is not None:
+                return mvt
+        return (await self._afetch_tile_row(*queries[-1], stopwatch))[-1]
+
+    # pylint: disable=too-many-arguments
+    def _build_limited_queries(
+        self, bbox, limit, offset, max_features, max_bytes, fallbacks, **kwargs
+    ):
+        """
+        Returns:
+            list:
+            The parameterized tile query and parameters of each set of options of
+            :py:meth:`intersect_limited`.  Every query but the last returns a NULL
+            tile when it exceeds a limit.  The last one is truncated instead.
+        """
+        strategies = [kwargs] + [dict(kwargs, **fallback) for fallback in fallbacks]
+        limit = None if limit in (None, -1) else int(limit)
+        checked_limit = truncated_limit = limit
+        if max_features is not None:
+            # one feature more than allowed is enough to tell the tile is too big
+            checked_limit = min(max_features + 1, limit or max_features + 1)
+            truncated_limit = min(max_features, limit or max_features)
+        conditions = []
+        if max_features is not None:
+            conditions.append(f"features > {int(max_features)}")
+        if max_bytes is not None:
+            conditions.append(f"octet_length(tile) > {int(max_bytes)}")
+        condition = " OR ".join(conditions) or "false"
+        queries = [
+            self._build_checked_query(bbox, checked_limit, offset, condition, options)
+            for options in strategies[:-1]
+        ]
+        queries.append(
+            self._build_tile_query(bbox, truncated_limit, offset, **strategies[-1])
+        )
+        return queries
+
+    # pylint: disable=too-many-arguments
+    def _build_checked_query(self, bbox, limit, offset, condition, options):
+        """
+        Returns:
+            tuple:
+            The parameterized tile query and parameters returning a NULL tile when
+            the condition on its ``features`` and ``tile`` holds.
+        """
+        query, parameters = self._build_tile_query(
+            bbox, limit, offset, counted=True, **options
+        )
+        query = (
+            f"SELECT id, features, CASE WHEN {condition} THEN NULL ELSE tile END "
+            f"FROM ({query.rstrip(';')}) AS t(id, features, tile);"
+        )
+        return query, parameters
+
+    def _is_cancelled(self, error):
+        """
+        Returns:
+            bool:
+            Whether the error is a query cancelled by the manager's
+            ``statement_timeout``.
+        """
+        if self.statement_timeout is None:
+            return False
+        for cause in (error, error.__cause__):
+            # psycopg 2 and 3 name the SQLSTATE differently
+            code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+            if code == _QUERY_CANCELED:
+                return True
+        return False
+
+
+_QUERY_CANCELED = "57014"
@@ -0,0 +1,284 @@
+import threading
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import UniqueConstraint
+from rest_framework.serializers import ValidationError
+
+
+class TileFilter:
+    """
+    A field of a :py:class:`FilterSchema` tiles can be filtered on.
+
+    Args:
+        lookups (tuple): Lookups accepted for the field, any of "exact", "in",
+                         "gt", "gte", "lt", "lte", "isnull", "contains" and
+                         "icontains".  The default is ("exact",).
+        field (str): Name of the model field.  The default is the filter's name
+                     in the schema.
+        value_type (callable): Converts a query parameter value, e.g., ``int``,
+                               raising ValueError or TypeError for invalid values.
+                               The default is the model field's ``to_python``.
+        indexed (bool): Whether the column is indexed, e.g., by an index created
+                        with raw SQL Django does not know about.  The default is
+                        None (detected from the model's fields, indexes and
+                        constraints).
+        trigram_indexed (bool): Whether a trigram index, e.g., a GIN index with
+                                ``gin_trgm_ops`` on the column or on
+                                ``UPPER(column::text)``, serves the "contains"
+                                and "icontains" lookups.  B-tree indexes cannot
+                                serve them.  The default is False.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        lookups=("exact",),
+        field=None,
+        value_type=None,
+        indexed=None,
+        trigram_indexed=False,
+    ):
+        unknown = set(lookups) - set(_LOOKUPS)
+        if not lookups or unknown:
+            raise ValueError(f"Unknown lookups: {', '.join(sorted(unknown))}")
+        self.lookups = tuple(lookups)
+        self.field = field
+        self.value_type = value_type
+        self.indexed = indexed
+        self.trigram_indexed = trigram_indexed
+
+
+class FilterSchema:
+    """
+    Declares the filters a view accepts, e.g.,
+    ``FilterSchema({"surface": TileFilter(), "lanes": TileFilter(("gte", "lte"))})``
+    accepts ``?surface=gravel&lanes__gte=2``.
+
+    The schema is compiled into SQL fragments once per model, so tile queries do
+    not build a Django queryset per request.  Query parameters are validated
+    against the schema and normalized, see :py:meth:`clean`, so equivalent filters
+    share a cache key and a compiled tile query.
+
+    Args:
+        filters (dict): :py:class:`TileFilter` instances keyed by the name of the
+                        query parameter.
+        require_index (bool): Reject fields without an index, whose filters would
+                              make Postgres scan the whole table, and "contains"
+                              and "icontains" lookups of fields without a trigram
+                              index.  The default is True.
+    """
+
+    def __init__(self, filters, require_index=True):
+        self.filters = dict(filters)
+        self.require_index = require_index
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def clean(self, model, params):
+        """
+        Args:
+            model (:py:class:`django.contrib.gis.db.models.Model`): The model
+                        filtered.
+            params (dict): Query parameters of the request, e.g.,
+                           ``{"lanes__gte": "2"}``.
+        Returns:
+            :py:class:`TileFilters`:
+            The converted values keyed by ``name`` or ``name__lookup`` in sorted
+            order along with their SQL.  Values of "in" lookups are comma separated
+            and sorted without duplicates.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if a parameter is not a
+                                                        filter of the schema, would
+                                                        scan the whole table or its
+                                                        value is invalid
+            ValueError: If the schema does not fit the model, see
+                        :py:meth:`compile`.
+        """
+        compiled = self.compile(model)
+        values = {}
+        for key, value in params.items():
+            name, _, lookup = key.partition("__")
+            lookup = lookup or "exact"
+            if (name, lookup) not in compiled:
+                raise ValidationError(f"Unknown filter: {key}")
+            if compiled[name, lookup] is None:
+                raise ValidationError(
+                    f"Filter {key} is not indexed, filtering on it would scan the "
+                    "whole table"
+                )
+            canonical_key = name if lookup == "exact" else f"{name}__{lookup}"
+            if canonical_key in values:
+                raise ValidationError(f"Duplicate filter: {key}")
+            values[canonical_key] = _convert(compiled[name, lookup], lookup, value)
+        fragments, parameters = [], []
+        for key in sorted(values):
+            name, _, lookup = key.partition("__")
+            lookup = lookup or "exact"
+            sql, sql_parameters = _to_sql(compiled[name, lookup], lookup, values[key])
+            fragments.append(sql)
+            parameters += sql_parameters
+        return TileFilters(
+            sorted(values.items()), sql=" AND ".join(fragments), params=parameters
+        )
+
+    def compile(self, model):
+        """
+        Args:
+            model (:py:class:`django.contrib.gis.db.models.Model`): The model
+                        filtered.
+        Returns:
+            dict:
+            The column expression and value converter of each filter and lookup
+            keyed by (name, lookup).  With ``require_index``, "contains" and
+            "icontains" lookups of fields without a trigram index map to None and
+            are rejected by :py:meth:`clean`.  The result is computed once per
+            model.
+        Raises:
+            ValueError: If a field does not exist, is a relation or, with
+                        ``require_index``, is not indexed.
+        """
+        try:
+            return self._compiled[model]
+        except KeyError:
+            pass
+        with self._lock:
+            if model not in self._compiled:
+                self._compiled[model] = self._compile(model)
+        return self._compiled[model]
+
+    def _compile(self, model):
+        table = model._meta.db_table.replace('"', "")
+        compiled = {}
+        for name, tile_filter in self.filters.items():
+            field_name = tile_filter.field or name
+            try:
+                field = model._meta.get_field(field_name)
+            except FieldDoesNotExist as error:
+                raise ValueError(f"Unknown filter field: {field_name}") from error
+            if getattr(field, "column", None) is None or field.many_to_many:
+                raise ValueError(f"Filter field {field_name} is not a column")
+            indexed = tile_filter.indexed
+            if indexed is None:
+                indexed = _is_indexed(model, field)
+            if self.require_index and not indexed:
+                raise ValueError(
+                    f"Filter field {field_name} is not indexed, filtering on it "
+                    "would scan the whole table"
+                )
+            column = f"{table}.{field.column}"
+            value_type = tile_filter.value_type or _to_python(field)
+            for lookup in tile_filter.lookups:
+                compiled[name, lookup] = (column, value_type)
+                if (
+                    self.require_index
+                    and lookup in ("contains", "icontains")
+                    and not tile_filter.trigram_indexed
+                ):
+                    # LIKE '%value%' cannot use a B-tree index
+                    compiled[name, lookup] = None
+        return compiled
+
+
+class TileFilters(dict):
+    """
+    Filters cleaned by a :py:class:`FilterSchema`, which can be passed as the
+    ``filters`` of :py:meth:`MVTManager.intersect` and its variants.
+
+    Args:
+        items (list): (key, value) pairs in canonical order.
+        sql (str): The filters' parameterized SQL, joined with AND.
+        params (list): Parameters of the SQL.
+    """
+
+    def __init__(self, items=(), sql="", params=()):
+        super().__init__(items)
+        self.sql = sql
+        self.params = list(params)
+
+
+def _convert(compiled, lookup, value):
+    """
+    Returns:
+        object:
+        The query parameter's value converted for the lookup.
+    Raises:
+        `rest_framework.serializers.ValidationError`: if the value is invalid
+    """
+    _, value_type = compiled
+    try:
+        if lookup == "isnull":
+            if str(value).lower() not in _BOOLEANS:
+                raise ValueError(value)
+            return _BOOLEANS[str(value).lower()]
+        if lookup in ("contains", "icontains"):
+            return str(value)
+        if lookup == "in":
+            values = {value_type(item) for item in str(value).split(",") if item}
+            if not values:
+                raise ValueError(value)
+            return tuple(sorted(values))
+        return value_type(value)
+    except (ValueError, TypeError, DjangoValidationError) as error:
+        raise ValidationError(f"Invalid filter value: {value}") from error
+
+
+def _to_sql(compiled, lookup, value):
+    """
+    Returns:
+        tuple:
+        The parameterized SQL of the lookup and its parameters.
+    """
+    column, _ = compiled
+    if lookup == "isnull":
+        return f"{column} IS {'' if value else 'NOT '}NULL", []
+    if lookup == "in":
+        return f"{column} = ANY(%s)", [list(value)]
+    if lookup in ("contains", "icontains"):
+        pattern = "%{}%".format(
+            value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        if lookup == "icontains":
+            return f"UPPER({column}::text) LIKE UPPER(%s)", [pattern]
+        return f"{column}::text LIKE %s", [pattern]
+    return f"{column} {_LOOKUPS[lookup]} %s", [value]
+
+
+def _to_python(field):
+    # foreign keys are filtered on the column, i.e., the target's primary key
+    target = getattr(field, "target_field", None) or field
+    return target.to_python
+
+
+def _is_indexed(model, field):
+    """
+    Returns:
+        bool:
+        Whether an index of the model has the field as its first column.
+    """
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    leading_fields = [
+        index.fields[0].lstrip("-") for index in model._meta.indexes if index.fields
+    ]
+    leading_fields += [
+        constraint.fields[0]
+        for constraint in model._meta.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.fields
+    ]
+    leading_fields += [fields[0] for fields in model._meta.unique_together if fields]
+    return field.name in leading_fields or field.attname in leading_fields
+
+
+_LOOKUPS = {
+    "exact": "=",
+    "in": None,
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "isnull": None,
+    "contains": None,
+    "icontains": None,
+}
+_BOOLEANS = {"true": True, "1": True, "false": False, "0": False}
@@ -0,0 +1,130 @@
+from django.db import transaction
+
+
+class GeneralizationMixin:
+    """
+    Generalized tables of :py:class:`rest_framework_mvt.managers.MVTManager`, see
+    its ``generalizations``.
+    """
+
+    def get_generalized_table(self, zoom):
+        """
+        Args:
+            zoom (int): Zoom level of a tile.
+        Returns:
+            str:
+            Name of the generalized table tiles of the zoom level are queried from
+            or None if the zoom level has no generalized table.
+        """
+        if zoom is None or not self.generalizations:
+            return None
+        bands = [min_zoom for min_zoom in self.generalizations if min_zoom <= zoom]
+        if not bands or self.generalizations[max(bands)] is None:
+            return None
+        return self._get_generalized_table_name(max(bands))
+
+    def build_generalized_tables(self):
+        """
+        Creates or replaces the generalized table of each zoom band with a
+        tolerance in ``generalizations``.  A table has the primary key and the
+        generalized geometry, in a ``geom`` column with a GiST index, of every row
+        of the model.  Each table is built under a temporary name and swapped in,
+        so tiles are served from the previous table until it is replaced.
+
+        Returns:
+            list:
+            Names of the built tables.
+        """
+        connection = self._get_connection()
+        tables = []
+        for min_zoom, tolerance in sorted((self.generalizations or {}).items()):
+            if tolerance is None:
+                continue
+            name = self._get_generalized_table_name(min_zoom)
+            statements = self._create_generalized_table_statements(name, tolerance)
+            with transaction.atomic(
+                using=connection.alias
+            ), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+            tables.append(name)
+        return tables
+
+    def update_generalized_tables(self, pks):
+        """
+        Brings the rows of the given primary keys up to date in every generalized
+        table, e.g., after saving or deleting instances.
+
+        Args:
+            pks (list): Primary keys of the changed rows.
+        """
+        table = self.model._meta.db_table.replace('"', "")
+        pk = self.model._meta.pk.column
+        connection = self._get_connection()
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            for min_zoom, tolerance in sorted((self.generalizations or {}).items()):
+                if tolerance is None:
+                    continue
+                name = self._get_generalized_table_name(min_zoom)
+                geometry = self._create_generalized_geometry(table, tolerance)
+                cursor.execute(f"DELETE FROM {name} WHERE {pk} = ANY(%s)", [list(pks)])
+                cursor.execute(
+                    f"INSERT INTO {name} ({pk}, geom) "
+                    f"SELECT {table}.{pk}, {geometry} FROM {table} "
+                    f"WHERE {table}.{pk} = ANY(%s) AND {table}.{self.geo_col} IS NOT NULL",
+                    [list(pks)],
+                )
+
+    def _get_generalized_table_name(self, min_zoom):
+        table = self.model._meta.db_table.replace('"', "")
+        return f"{table}_mvt_z{int(min_zoom)}"
+
+    def _create_generalized_geometry(self, table, tolerance):
+        geometry = f"{table}.{self.geo_col}"
+        if self._get_srid() != 3857:
+            geometry = f"ST_Transform({geometry}, 3857)"
+        if tolerance:
+            geometry = f"ST_SimplifyPreserveTopology({geometry}, {float(tolerance)!r})"
+        return geometry
+
+    def _create_generalized_table_statements(self, name, tolerance):
+        """
+        Returns:
+            list:
+            The SQL statements building the generalized table ``name`` under a
+            temporary name and swapping it in.
+        """
+        table = self.model._meta.db_table.replace('"', "")
+        pk = self.model._meta.pk.column
+        geometry = self._create_generalized_geometry(table, tolerance)
+        return [
+            f"DROP TABLE IF EXISTS {name}_new",
+            f"CREATE TABLE {name}_new AS SELECT {table}.{pk} AS {pk}, "
+            f"{geometry} AS geom FROM {table} WHERE {table}.{self.geo_col} IS NOT NULL",
+            f"ALTER TABLE {name}_new ADD PRIMARY KEY ({pk})",
+            f"CREATE INDEX {name}_new_geom ON {name}_new USING GIST (geom)",
+            f"DROP TABLE IF EXISTS {name}",
+            f"ALTER TABLE {name}_new RENAME TO {name}",
+            f"ALTER INDEX {name}_new_pkey RENAME TO {name}_pkey",
+            f"ALTER INDEX {name}_new_geom RENAME TO {name}_geom",
+            f"ANALYZE {name}",
+        ]
+
+    def _get_geometry_source(self, table, zoom=None):
+        """
+        Args:
+            table (str): A string representing the name of the table to query on.
+            zoom (int): Zoom level of the tile.  The default is None (the model's
+                        geometry column).
+        Returns:
+            tuple:
+            The SQL of the geometry column to query, its SRID and a JOIN clause of
+            its table, which is the generalized table of the zoom level if there is
+            one, see ``generalizations``.
+        """
+        generalized_table = self.get_generalized_table(zoom)
+        if generalized_table is None:
+            return f"{table}.{self.geo_col}", self._get_srid(), ""
+        pk = self.model._meta.pk.column
+        join = f" JOIN {generalized_table} ON {generalized_table}.{pk} = {table}.{pk}"
+        return f"{generalized_table}.geom", 3857, join
@@ -0,0 +1,204 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+from rest_framework_mvt.caches import get_layer_key
+from rest_framework_mvt.signals import tiles_invalidated
+from rest_framework_mvt.tiles import tiles_for_bounds
+
+
+# pylint: disable=too-many-instance-attributes
+class TileInvalidator:
+    """
+    Evicts the cached tiles covering a model instance's old and new geometry when
+    the instance is saved or deleted.
+
+    Evictions are collected and flushed in batches once the surrounding transaction
+    commits.  Wrap bulk imports in :py:meth:`deferred` to flush once at the end.
+    When the manager has ``generalizations`` the saved and deleted rows are updated
+    in its generalized tables before the tiles are evicted, so tiles are never
+    rendered from stale or missing generalized geometries.
+
+    Args:
+        model (:py:class:`django.contrib.gis.db.models.Model`): A GeoDjango model
+                        with a ``vector_tiles`` MVTManager.
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache the
+                        model's tiles are stored in.
+        min_zoom (int): Lowest zoom level to evict tiles from.  The default is 0.
+        max_zoom (int): Highest zoom level to evict tiles from.  The default is 16.
+        batch_size (int): Maximum number of keys deleted per cache call.
+                          The default is 500.
+
+    Note:
+        When the manager has a buffer the neighbouring tiles are evicted as well
+        since features near a tile's edge are encoded into them.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, model, tile_cache, min_zoom=0, max_zoom=16, batch_size=500):
+        self.model = model
+        self.tile_cache = tile_cache
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.batch_size = batch_size
+        self.manager = model.vector_tiles
+        self.layer = get_layer_key(model, self.manager.geo_col)
+        geo_field = self.manager._get_geo_field()
+        self.geo_attname = None if geo_field is None else geo_field.attname
+        self.geo_srid = self.manager._get_srid()
+        self._local = threading.local()
+
+    def connect(self):
+        """
+        Connects the invalidator to the model's post_init, post_save and
+        post_delete signals.
+        """
+        uid = f"rest_framework_mvt.invalidation.{self.layer}.{id(self)}"
+        post_init.connect(self._remember_geometry, self.model, False, uid)
+        post_save.connect(self._on_save, self.model, False, uid)
+        post_delete.connect(self._on_delete, self.model, False, uid)
+
+    def disconnect(self):
+        uid = f"rest_framework_mvt.invalidation.{self.layer}.{id(self)}"
+        post_init.disconnect(sender=self.model, dispatch_uid=uid)
+        post_save.disconnect(sender=self.model, dispatch_uid=uid)
+        post_delete.disconnect(sender=self.model, dispatch_uid=uid)
+
+    def invalidate_geometry(self, geometry, using=None):
+        """
+        Schedules the eviction of every tile in the zoom range covering a geometry.
+        Tiles are evicted once the current transaction on ``using`` commits.
+
+        Args:
+            geometry (:py:class:`django.contrib.gis.geos.GEOSGeometry`): The geometry.
+            using (str): Alias of the database the geometry was written to.
+        """
+        if geometry is None or geometry.empty:
+            return
+        if geometry.srid not in (None, 4326):
+            geometry = geometry.transform(4326, clone=True)
+        pending = self._get_pending()
+        padding = 1 if self.manager.buffer else 0
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            pending.update(tiles_for_bounds(*geometry.extent, zoom, padding))
+        self._local.using = using or DEFAULT_DB_ALIAS
+        if not getattr(self._local, "deferred", 0):
+            self._schedule_flush()
+
+    @contextmanager
+    def deferred(self):
+        """
+        Context manager collecting evictions until it exits, e.g., for bulk imports.
+        """
+        self._local.deferred = getattr(self._local, "deferred", 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.deferred -= 1
+            if not self._local.deferred:
+                self._schedule_flush()
+
+    def flush(self):
+        """
+        Updates the generalized tables of every saved and deleted row and evicts
+        every scheduled tile in batches of ``batch_size`` keys.
+        """
+        pks, self._local.pending_pks = self._get_pending_pks(), set()
+        if pks:
+            self.manager.update_generalized_tables(pks)
+        tiles, self._local.pending = self._get_pending(), set()
+        if not tiles:
+            return
+        keys = [self.tile_cache.make_slot_key(self.layer, *tile) for tile in tiles]
+        for start in range(0, len(keys), self.batch_size):
+            self.tile_cache.delete_many(keys[start : start + self.batch_size])
+        tiles_invalidated.send(sender=self.model, layer=self.layer, tiles=tiles)
+
+    def _get_pending(self):
+        if not hasattr(self._local, "pending"):
+            self._local.pending = set()
+        return self._local.pending
+
+    def _get_pending_pks(self):
+        if not hasattr(self._local, "pending_pks"):
+            self._local.pending_pks = set()
+        return self._local.pending_pks
+
+    def _regeneralize(self, instance):
+        if self.manager.generalizations and instance.pk is not None:
+            self._get_pending_pks().add(instance.pk)
+
+    def _schedule_flush(self):
+        using = getattr(self._local, "using", DEFAULT_DB_ALIAS)
+        connection = connections[using]
+        if not connection.in_atomic_block:
+            self.flush()
+        # pylint: disable=comparison-with-callable
+        elif not any(entry[1] == self.flush for entry in connection.run_on_commit):
+            # tiles of rolled back transactions stay pending until the next flush
+            transaction.on_commit(self.flush, using=using)
+
+    def _get_geometry(self, instance):
+        # read from __dict__ so a deferred geometry is never fetched
+        value = instance.__dict__.get(self.geo_attname)
+        if value is None or value == "" or isinstance(value, GEOSGeometry):
+            return value or None
+        # the field also accepts WKT, HEX and WKB, e.g., obj.geom = "POINT(1 2)"
+        geometry = GEOSGeometry(value)
+        if geometry.srid is None:
+            geometry.srid = self.geo_srid
+        return geometry
+
+    # pylint: disable=unused-argument
+    def _remember_geometry(self, sender, instance, **kwargs):
+        instance._mvt_initial_geometry = self._get_geometry(instance)
+
+    # pylint: disable=unused-argument
+    def _on_save(self, sender, instance, using=None, **kwargs):
+        self._regeneralize(instance)
+        initial_geometry = getattr(instance, "_mvt_initial_geometry", None)
+        self.invalidate_geometry(initial_geometry, using)
+        self.invalidate_geometry(self._get_geometry(instance), using)
+        instance._mvt_initial_geometry = self._get_geometry(instance)
+
+    # pylint: disable=unused-argument
+    def _on_delete(self, sender, instance, using=None, **kwargs):
+        self._regeneralize(instance)
+        initial_geometry = getattr(instance, "_mvt_initial_geometry", None)
+        self.invalidate_geometry(initial_geometry, using)
+        self.invalidate_geometry(self._get_geometry(instance), using)
+
+
+def connect_tile_invalidators(tile_cache, models=None, **kwargs):
+    """
+    Creates and connects a :py:class:`TileInvalidator` for every model.
+
+    Args:
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache the
+                        models' tiles are stored in.
+        models (list): GeoDjango models to invalidate tiles for.  The default is
+                       every installed model with a ``vector_tiles`` MVTManager.
+        kwargs: Keyword arguments passed to :py:class:`TileInvalidator`.
+    Returns:
+        list:
+        The connected invalidators.
+    """
+    # pylint: disable=import-outside-toplevel
+    from django.apps import apps
+    from rest_framework_mvt.managers import MVTManager
+
+    if models is None:
+        models = [
+            model
+            for model in apps.get_models()
+            if isinstance(getattr(model, "vector_tiles", None), MVTManager)
+        ]
+    invalidators = []
+    for model in models:
+        invalidator = TileInvalidator(model, tile_cache, **kwargs)
+        invalidator.connect()
+        invalidators.append(invalidator)
+    return invalidators
@@ -0,0 +1,100 @@
+from django.contrib.gis.geos import GEOSException, GEOSGeometry
+from django.core.management.base import BaseCommand, CommandError
+
+
+# the commands subclassing it implement handle()
+# pylint: disable=abstract-method
+class BaseTileCommand(BaseCommand):
+    """
+    Base class of the commands rendering the tiles of an MVT view or model over a
+    zoom range and area.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "target",
+            help="app_label.ModelName of a model or dotted path of an MVT view",
+        )
+        parser.add_argument("--min-zoom", type=int, default=0)
+        parser.add_argument("--max-zoom", type=int, default=14)
+        parser.add_argument(
+            "--bbox", help="west,south,east,north in EPSG:4326 (default: data extent)"
+        )
+        parser.add_argument("--polygon", help="WKT, EWKT or GeoJSON of the area")
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument(
+            "--report-every",
+            type=int,
+            default=1000,
+            help="Number of tiles between progress reports",
+        )
+
+    def get_seeder_options(self, options):
+        """
+        Returns:
+            dict:
+            Keyword arguments of :py:class:`rest_framework_mvt.seeding.TileSeeder`
+            from the common command line options.
+        """
+        if options["min_zoom"] < 0 or options["max_zoom"] < options["min_zoom"]:
+            raise CommandError("Invalid zoom range")
+        return {
+            "min_zoom": options["min_zoom"],
+            "max_zoom": options["max_zoom"],
+            "bounds": self._parse_bbox(options["bbox"]),
+            "polygon": self._parse_polygon(options["polygon"]),
+            "processes": options["processes"],
+        }
+
+    def run_with_progress(self, render, options, verb):
+        """
+        Calls ``render`` with a progress callback reporting the rendering rate.
+
+        Args:
+            render (callable): Function taking the progress callback.
+            options (dict): The command's options.
+            verb (str): Past tense of what was done with the tiles.
+        """
+        report_every = max(options["report_every"], 1)
+        last = {"count": 0, "elapsed": 0.0}
+
+        def progress(count, elapsed):
+            last.update(count=count, elapsed=elapsed)
+            if count % report_every == 0:
+                self.stdout.write(self._format_rate(count, elapsed))
+
+        try:
+            render(progress)
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        rate = self._format_rate(last["count"], last["elapsed"])
+        # Style's attributes are created from the color palette at runtime
+        # pylint: disable=no-member
+        self.stdout.write(self.style.SUCCESS(f"{verb} {rate}"))
+
+    @staticmethod
+    def _format_rate(count, elapsed):
+        rate = count / elapsed if elapsed > 0 else 0.0
+        return f"{count} tiles in {elapsed:.1f}s ({rate:.1f} tiles/s)"
+
+    @staticmethod
+    def _parse_bbox(bbox):
+        if bbox is None:
+            return None
+        try:
+            west, south, east, north = (float(edge) for edge in bbox.split(","))
+        except ValueError as error:
+            raise CommandError("--bbox must be west,south,east,north") from error
+        return west, south, east, north
+
+    @staticmethod
+    def _parse_polygon(polygon):
+        if polygon is None:
+            return None
+        try:
+            geometry = GEOSGeometry(polygon)
+        except (GEOSException, ValueError) as error:
+            raise CommandError(f"Invalid --polygon: {error}") from error
+        if geometry.srid is None:
+            geometry.srid = 4326
+        return geometry
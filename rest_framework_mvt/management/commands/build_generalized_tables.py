@@ -0,0 +1,58 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework_mvt.managers import MVTManager
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds or rebuilds the generalized geometry tables of models whose "
+        "MVTManager has generalizations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="app_label.ModelName of the models (default: every model with "
+            "generalizations)",
+        )
+        parser.add_argument(
+            "--manager",
+            default="vector_tiles",
+            help="Name of the models' MVTManager (default: vector_tiles)",
+        )
+
+    def handle(self, *args, **options):
+        managers = self._get_managers(options["models"], options["manager"])
+        if not managers:
+            raise CommandError("No MVTManager has generalizations")
+        for manager in managers:
+            started = time.monotonic()
+            for table in manager.build_generalized_tables():
+                self.stdout.write(f"Built {table} in {time.monotonic() - started:.1f}s")
+                started = time.monotonic()
+
+    @staticmethod
+    def _get_managers(labels, manager_name):
+        if labels:
+            try:
+                models = [apps.get_model(label) for label in labels]
+            except (LookupError, ValueError) as error:
+                raise CommandError(str(error)) from error
+        else:
+            models = apps.get_models()
+        managers = [getattr(model, manager_name, None) for model in models]
+        managers = [
+            manager
+            for manager in managers
+            if isinstance(manager, MVTManager) and manager.generalizations
+        ]
+        if labels and len(managers) < len(labels):
+            raise CommandError(
+                f"Every model needs an MVTManager named {manager_name} "
+                "with generalizations"
+            )
+        return managers
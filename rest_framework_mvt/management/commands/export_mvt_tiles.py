@@ -0,0 +1,33 @@
+from django.core.management.base import CommandError
+
+from rest_framework_mvt.archives import create_archive
+from rest_framework_mvt.management.base import BaseTileCommand
+from rest_framework_mvt.seeding import TileSeeder
+
+
+class Command(BaseTileCommand):
+    help = (
+        "Renders the tiles of an MVT view or model that contain data into an "
+        "MBTiles (.mbtiles) or PMTiles (.pmtiles) archive."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("output", help="Path of the .mbtiles or .pmtiles file")
+        parser.add_argument("--name", help="Name of the tileset")
+
+    def handle(self, *args, **options):
+        try:
+            seeder = TileSeeder(options["target"], **self.get_seeder_options(options))
+            writer = create_archive(
+                options["output"],
+                name=options["name"],
+                layer_names=seeder.get_layer_names(),
+                bounds=seeder.bounds,
+            )
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        with writer:
+            self.run_with_progress(
+                lambda progress: seeder.export(writer, progress), options, "Exported"
+            )
@@ -0,0 +1,48 @@
+from django.core.management.base import CommandError
+
+from rest_framework_mvt.caches import DjangoTileCache, FileSystemTileCache
+from rest_framework_mvt.management.base import BaseTileCommand
+from rest_framework_mvt.seeding import TileSeeder
+
+
+class Command(BaseTileCommand):
+    help = (
+        "Renders the tiles of an MVT view or model that contain data into a tile "
+        "cache, e.g., to warm the cache ahead of traffic."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--encoding",
+            action="append",
+            dest="encodings",
+            help="Content encoding to seed, may be repeated (default: uncompressed)",
+        )
+        parser.add_argument(
+            "--state-file", help="File recording completed tiles to resume from"
+        )
+        parser.add_argument(
+            "--cache", help="Alias of a Django cache to seed instead of the view's"
+        )
+        parser.add_argument(
+            "--directory", help="Directory of a file system tile cache to seed"
+        )
+
+    def handle(self, *args, **options):
+        tile_cache = None
+        if options["cache"]:
+            tile_cache = DjangoTileCache(options["cache"])
+        elif options["directory"]:
+            tile_cache = FileSystemTileCache(options["directory"])
+        try:
+            seeder = TileSeeder(
+                options["target"],
+                tile_cache=tile_cache,
+                encodings=options["encodings"] or (None,),
+                state_file=options["state_file"],
+                **self.get_seeder_options(options),
+            )
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        self.run_with_progress(seeder.seed, options, "Seeded")
@@ -1,22 +1,167 @@
+import hashlib
+import re
+import weakref
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
 from django.core.exceptions import FieldError
 from django.contrib.gis.db import models
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 from rest_framework.serializers import ValidationError
 
+from rest_framework_mvt.batching import BatchMixin
+from rest_framework_mvt.clustering import ClusterMixin
+from rest_framework_mvt.degradation import DegradationMixin
+from rest_framework_mvt.filters import TileFilters
+from rest_framework_mvt.generalization import GeneralizationMixin
+from rest_framework_mvt.metrics import Stopwatch
+from rest_framework_mvt.pagination import KeysetPaginationMixin
+from rest_framework_mvt.routing import ReplicaRouter
+from rest_framework_mvt.signals import tile_queried
+
 
-class MVTManager(models.Manager):
+# the manager's tile settings are its constructor arguments
+# pylint: disable=too-many-instance-attributes
+class MVTManager(
+    BatchMixin,
+    ClusterMixin,
+    DegradationMixin,
+    GeneralizationMixin,
+    KeysetPaginationMixin,
+    models.Manager,
+):
     """
     Args:
         geo_col (str): Column name with the geometry. The default is "geom".
         source_name (str): Connection source to use.  If not provided the app's default
                            connection is used.
+        prepared (bool): Execute tile queries as server side prepared statements so
+                         Postgres plans each query once per connection.  At most
+                         256 statements are kept per connection.  The default is
+                         False.
+        extent (int): Tile extent in tile units.  Smaller extents, e.g., 512, make
+                      lighter tiles.  The default is 4096.
+        buffer (int): Buffer around the tile in tile units.  Geometries are kept this
+                      far outside the tile to avoid rendering seams.  The default is 0.
+        clip (bool): Clip geometries to the buffered tile.  The default is False.
+        layer_name (str): Name of the layer in the tile.  The default is "default".
+        async_pool (:py:class:`psycopg_pool.AsyncConnectionPool`): Pool of psycopg 3
+                   async connections :py:meth:`aintersect` queries tiles with.  The
+                   default is None (queries run on Django's connection in a thread).
+        statement_timeout (float): Seconds a tile query may run before Postgres
+                          cancels it, so a runaway tile can not hold on to a
+                          connection.  The query then runs in its own transaction
+                          or savepoint.  The default is None (no timeout).
+        cluster_aggregates (dict): Attributes of point clusters mapped to an
+                          aggregate function ("sum", "avg", "min" or "max") and a
+                          column, e.g., ``{"total_power": ("sum", "power")}``.  See
+                          the ``cluster`` argument of :py:meth:`intersect`.  The
+                          default is None (only the number of points).
+        generalizations (dict): Tolerances in EPSG:3857 units keyed by the minimum
+                          zoom level of a band, e.g., ``{0: 2000, 6: 200, 10: None}``.
+                          Tiles of a band with a tolerance are queried from a copy
+                          of the geometries pre-transformed to EPSG:3857 and
+                          simplified with the tolerance, see
+                          :py:meth:`GeneralizationMixin.build_generalized_tables`.  A tolerance of 0
+                          only transforms the geometries.  The default is None (no
+                          generalized tables).
+        replicas (list): Database aliases tile queries, :py:meth:`has_features` and
+                         :py:meth:`get_bounds` are routed across round-robin, or a
+                         :py:class:`rest_framework_mvt.routing.ReplicaRouter` to
+                         choose the strategy and health checks.  ``async_pool``
+                         may then be a dict of a pool per alias.  Generalized
+                         tables are still written through ``source_name``.  The
+                         default is None (every query uses ``source_name``).
+        query_cache_size (int): Maximum number of compiled queries kept.  The least
+                          recently used query is discarded first.  The default is
+                          256.
+
+    Note:
+        The SELECT list and SQL template of each distinct WHERE clause are compiled
+        once and reused, so only the parameters vary per tile.  Filters are
+        compiled to a WHERE clause once per distinct filters, and without a
+        queryset with a :py:class:`rest_framework_mvt.filters.FilterSchema`.  The
+        compiled queries are cleared after migrations run.  Call
+        ``clear_query_cache`` after changing the manager's attributes at runtime.
     """
 
-    def __init__(self, *args, geo_col="geom", source_name=None, **kwargs):
+    _instances = weakref.WeakSet()
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def __init__(
+        self,
+        *args,
+        geo_col="geom",
+        source_name=None,
+        prepared=False,
+        extent=4096,
+        buffer=0,
+        clip=False,
+        layer_name="default",
+        async_pool=None,
+        statement_timeout=None,
+        cluster_aggregates=None,
+        generalizations=None,
+        replicas=None,
+        query_cache_size=256,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
         self.geo_col = geo_col
         self.source_name = source_name
+        self.prepared = prepared
+        self.extent = extent
+        self.buffer = buffer
+        self.clip = clip
+        self.layer_name = layer_name
+        self.async_pool = async_pool
+        self.statement_timeout = statement_timeout
+        self.cluster_aggregates = cluster_aggregates
+        self.generalizations = generalizations
+        if replicas is not None and not isinstance(replicas, ReplicaRouter):
+            replicas = ReplicaRouter(replicas)
+        self.replicas = replicas
+        self.query_cache_size = query_cache_size
+        self._query_cache = _QueryCache(query_cache_size)
+        MVTManager._instances.add(self)
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        # managers are copied for inherited models; never share compiled queries
+        self._query_cache = _QueryCache(self.query_cache_size)
+        MVTManager._instances.add(self)
 
-    def intersect(self, bbox="", limit=-1, offset=0, filters={}):
+    def clear_query_cache(self):
+        """
+        Discards the compiled SELECT list and SQL templates of the manager.
+        """
+        self._query_cache = _QueryCache(self.query_cache_size)
+
+    # pylint: disable=too-many-arguments
+    def intersect(
+        self,
+        bbox="",
+        limit=-1,
+        offset=0,
+        filters={},
+        gzip=False,
+        simplify=None,
+        simplify_method="simplify",
+        min_size=None,
+        columns=None,
+        extent=None,
+        buffer=None,
+        clip=None,
+        layer_name=None,
+        cluster=None,
+        cluster_method="grid",
+        cluster_aggregates=None,
+        zoom=None,
+        tile=None,
+    ):
         """
         Args:
             bbox (str): A string representing a bounding box, e.g., '-90,29,-89,35'.
@@ -25,12 +170,51 @@ class MVTManager(models.Manager):
             offset (int): Index to start collecting entries from.  Index size is the limit
                           size.  The default is 0.
             filters (dict): The keys represent column names and the values represent column
-                            values to filter on.
+                            values to filter on.  Filters cleaned by a
+                            :py:class:`rest_framework_mvt.filters.FilterSchema`
+                            are compiled to SQL without a queryset.
+            gzip (bool): Compress non-empty tiles with gzip in Postgres.  Requires the
+                         `pgsql-gzip <https://github.com/pramsey/pgsql-gzip>`_ extension.
+                         The default is False.
+            simplify (float): Tolerance in EPSG:3857 units to simplify geometries with
+                              before encoding them.  The default is None (no
+                              simplification).
+            simplify_method (str): "simplify" for ST_SimplifyPreserveTopology or "snap"
+                                   for ST_SnapToGrid.  The default is "simplify".
+            min_size (float): Minimum length in EPSG:3857 units of the diagonal of a
+                              line or polygon's bounding box.  Smaller features are left
+                              out of the tile.  Points are always included.  The default
+                              is None (no minimum).
+            columns (list): Names of the columns to include as feature attributes.
+                            The default is None (all columns).
+            extent (int): Overrides the manager's extent.
+            buffer (int): Overrides the manager's buffer.
+            clip (bool): Overrides the manager's clip.
+            layer_name (str): Overrides the manager's layer name.
+            cluster (float): Distance in EPSG:3857 units to cluster points within.
+                             Each cluster is a feature at the centroid of its points
+                             with a ``point_count`` attribute and the
+                             ``cluster_aggregates`` instead of the columns.  Limit
+                             and offset apply to clusters.  The default is None (no
+                             clustering).
+            cluster_method (str): "grid" to cluster points in the cells of a grid
+                                  aligned with the tiles or "dbscan" for
+                                  ST_ClusterDBSCAN.  The default is "grid".
+            cluster_aggregates (dict): Overrides the manager's cluster aggregates.
+            zoom (int): Zoom level of the tile, which routes the query to the zoom
+                        band's generalized table.  The default is None (the model's
+                        table), or the tile's zoom level when a tile is given.
+            tile (tuple): The z, x and y of the tile.  Its envelope is built once by
+                          Postgres with ST_TileEnvelope instead of parsing and
+                          transforming the bbox, which is ignored.  The default is
+                          None (the tile of the bbox).
         Returns:
             bytes:
             Bytes representing a Google Protobuf encoded Mapbox Vector Tile.  The
             vector tile will store each applicable row from the database as a
-            feature.  Applicable rows fall within the passed in bbox.
+            feature.  Applicable rows fall within the passed in bbox.  The tile
+            is the buffer returned by the database driver, e.g., a memoryview
+            with psycopg2, and is not copied.
 
         Raises:
             ValidationError: If filters include keys or values not accepted by
@@ -42,12 +226,175 @@ class MVTManager(models.Manager):
 
             https://docs.djangoproject.com/en/2.2/topics/db/sql/#performing-raw-queries
         """
-        limit = "ALL" if limit == -1 else limit
-        query, parameters = self._build_query(filters=filters)
-        with self._get_connection().cursor() as cursor:
-            cursor.execute(query, [str(bbox), str(bbox)] + parameters + [limit, offset])
-            mvt = cursor.fetchall()[-1][-1]  # should always return one tile on success
-        return mvt
+        stopwatch = Stopwatch()
+        query, parameters = self._build_tile_query(
+            bbox,
+            limit,
+            offset,
+            counted=tile_queried.has_listeners(self.model),
+            filters=filters,
+            gzip=gzip,
+            simplify=simplify,
+            simplify_method=simplify_method,
+            min_size=min_size,
+            columns=columns,
+            extent=extent,
+            buffer=buffer,
+            clip=clip,
+            layer_name=layer_name,
+            cluster=cluster,
+            cluster_method=cluster_method,
+            cluster_aggregates=cluster_aggregates,
+            zoom=zoom,
+            tile=tile,
+        )
+        stopwatch.lap("build")
+        return self._fetch_tile_row(query, parameters, stopwatch)[-1]
+
+    async def aintersect(self, bbox="", limit=-1, offset=0, filters={}, **kwargs):
+        """
+        Async counterpart of :py:meth:`intersect` taking the same arguments.
+
+        With an ``async_pool`` the tile is queried on a psycopg 3 async connection,
+        so a single process can wait on many tile queries at once.  Without one the
+        query runs on Django's connection through ``sync_to_async``, which
+        serializes queries on a single thread.
+
+        Returns:
+            bytes:
+            Bytes representing a Google Protobuf encoded Mapbox Vector Tile.
+        """
+        if self.async_pool is None:
+            return await sync_to_async(self.intersect)(
+                bbox=bbox, limit=limit, offset=offset, filters=filters, **kwargs
+            )
+        stopwatch = Stopwatch()
+        kwargs.setdefault("counted", tile_queried.has_listeners(self.model))
+        # compiling the filters may ask Django's connection for server details
+        query, parameters = await sync_to_async(self._build_tile_query)(
+            bbox, limit, offset, filters=filters, **kwargs
+        )
+        stopwatch.lap("build")
+        return (await self._afetch_tile_row(query, parameters, stopwatch))[-1]
+
+    # pylint: disable=too-many-arguments
+    def _build_tile_query(self, bbox, limit, offset, tile=None, **kwargs):
+        """
+        Returns:
+            tuple:
+            The parameterized query of the tile, or of the bbox without one, for
+            the keyword arguments of :py:meth:`_build_query` and all of its
+            parameters.
+        """
+        limit = None if limit == -1 else limit  # LIMIT NULL is the same as LIMIT ALL
+        envelope, kwargs = self._get_envelope_parameters(bbox, tile, kwargs)
+        query, parameters = self._build_query(**kwargs)
+        return query, envelope + parameters + [limit, offset]
+
+    @staticmethod
+    def _get_envelope_parameters(bbox, tile, options):
+        """
+        Args:
+            bbox (str): A string representing a bounding box.
+            tile (tuple): The z, x and y of the tile or None to query the bbox.
+            options (dict): Keyword arguments of :py:meth:`_build_query`.
+        Returns:
+            tuple:
+            The parameters preceding the WHERE clause's parameters, i.e., the
+            tile's z, x and y or the bbox once per placeholder, and the options
+            rendering them.  A tile's zoom level is the default ``zoom``.
+        """
+        if tile is None:
+            return [str(bbox)] * 3, options
+        z, x, y = (int(value) for value in tile)
+        zoom = z if options.get("zoom") is None else options["zoom"]
+        return [z, x, y], dict(options, tiles="tile", zoom=zoom)
+
+    def _fetch_tile_row(self, query, parameters, stopwatch=None, many=False):
+        return self._route(
+            lambda connection: _fetch_row(
+                connection,
+                query,
+                parameters,
+                self.prepared,
+                self.statement_timeout,
+                self.model,
+                stopwatch,
+                many=many,
+            )
+        )
+
+    async def _afetch_tile_row(self, query, parameters, stopwatch=None):
+        if self.replicas is None or not isinstance(self.async_pool, dict):
+            return await self._afetch_pool_row(
+                self.async_pool, query, parameters, stopwatch
+            )
+        return await self.replicas.aexecute(
+            lambda alias: self._afetch_pool_row(
+                self.async_pool[alias], query, parameters, stopwatch
+            )
+        )
+
+    async def _afetch_pool_row(self, pool, query, parameters, stopwatch=None):
+        stopwatch = stopwatch or Stopwatch()
+        async with pool.connection() as connection:
+            async with connection.cursor() as cursor:
+                if self.statement_timeout is not None:
+                    # the pool's connection context ends the transaction
+                    await cursor.execute(
+                        _SET_STATEMENT_TIMEOUT,
+                        [_to_milliseconds(self.statement_timeout)],
+                    )
+                await cursor.execute(query, parameters, prepare=self.prepared or None)
+                stopwatch.lap("execute")
+                row = await cursor.fetchone()
+                stopwatch.lap("fetch")
+        _send_tile_queried(self.model, [row], stopwatch)
+        return row
+
+    def has_features(self, bbox="", filters={}):
+        """
+        Args:
+            bbox (str): A string representing a bounding box, e.g., '-90,29,-89,35'.
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+        Returns:
+            bool:
+            Whether any row intersects the bbox, e.g., to skip empty tiles.
+        """
+        table = self.model._meta.db_table
+        where_clause, parameters = self._create_where_clause_with_params(table, filters)
+
+        def query(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT EXISTS(SELECT 1 FROM {table} WHERE {where_clause})",
+                    [str(bbox)] * 2 + parameters,
+                )
+                return bool(cursor.fetchone()[0])
+
+        return self._route(query)
+
+    def get_bounds(self):
+        """
+        Returns:
+            tuple:
+            The west, south, east and north edges in EPSG:4326 of all geometries or
+            None if the table has no geometries.
+        """
+        table = self.model._meta.db_table
+        extent = f"ST_SetSRID(ST_Extent({table}.{self.geo_col})::geometry, {int(self._get_srid())})"
+
+        def query(connection):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e) "
+                    f"FROM (SELECT ST_Transform({extent}, 4326) AS e FROM {table}) AS q"
+                )
+                return cursor.fetchone()
+
+        bounds = self._route(query)
+        return None if bounds is None or bounds[0] is None else tuple(bounds)
 
     def _get_non_geom_columns(self):
         """
@@ -61,11 +408,79 @@ class MVTManager(models.Manager):
                     columns.append(column_name)
         return columns
 
-    def _build_query(self, filters={}):
+    def _get_geo_field(self):
+        """
+        Retrieves the model field of the defined geometry column or None when the
+        column can not be matched to a model field.
+        """
+        return self._memoize("geo_field", self._find_geo_field)
+
+    def _find_geo_field(self):
+        for field in self.model._meta.get_fields():
+            if hasattr(field, "get_attname_column"):
+                if field.get_attname_column()[1] == self.geo_col:
+                    return field
+        return None
+
+    def _get_srid(self):
+        """
+        Retrieves the SRID of the defined geometry column.  Falls back to 4326 when
+        the column can not be matched to a model field.
+        """
+        return getattr(self._get_geo_field(), "srid", 4326)
+
+    # pylint: disable=too-many-arguments
+    def _build_query(
+        self,
+        filters={},
+        gzip=False,
+        simplify=None,
+        simplify_method="simplify",
+        min_size=None,
+        columns=None,
+        extent=None,
+        buffer=None,
+        clip=None,
+        layer_name=None,
+        keyset=None,
+        counted=False,
+        cluster=None,
+        cluster_method="grid",
+        cluster_aggregates=None,
+        zoom=None,
+        tiles=None,
+    ):
         """
         Args:
             filters (dict): keys represent column names and values represent column
                             values to filter on.
+            gzip (bool): Compress the tile with gzip in Postgres.
+            simplify (float): Tolerance in EPSG:3857 units to simplify geometries with.
+            simplify_method (str): "simplify" or "snap".
+            min_size (float): Minimum bounding box diagonal in EPSG:3857 units of lines
+                              and polygons.
+            columns (list): Names of the columns to include as feature attributes.
+            extent (int): Tile extent in tile units.  The default is the manager's.
+            buffer (int): Buffer in tile units.  The default is the manager's.
+            clip (bool): Clip geometries to the buffer.  The default is the manager's.
+            layer_name (str): Name of the layer.  The default is the manager's.
+            keyset (str): "first" or "after" to query the first or a following
+                          keyset page ordered by primary key.  The default is None
+                          (LIMIT/OFFSET pagination).
+            counted (bool): Select the number of features along with the tile.
+                            Keyset pages are always counted.
+            cluster (float): Distance in EPSG:3857 units to cluster points within.
+            cluster_method (str): "grid" or "dbscan".
+            cluster_aggregates (dict): Aggregated attributes of clusters.  The
+                                       default is the manager's.
+            zoom (int): Zoom level of the tile, which selects the generalized table
+                        to query.
+            tiles (str): "tile" to render the tile of three integer z, x and y
+                         parameters or "tiles" to render a tile per z/x/y of three
+                         integer array parameters, see :py:meth:`BatchMixin.intersect_tiles`,
+                         with envelopes built by ST_TileEnvelope.  These
+                         parameters precede the WHERE clause's parameters.  The
+                         default is None (the tile of three bbox parameters).
         Returns:
             tuple:
             A tuple of length two.  The first element is a string representing a
@@ -73,62 +488,322 @@ class MVTManager(models.Manager):
             used as inputs to the query's WHERE clause.
         """
         table = self.model._meta.db_table.replace('"', "")
-        select_statement = self._create_select_statement()
+        source = self._get_geometry_source(table, zoom)
+        if tiles == "tiles" and keyset is not None:
+            raise ValueError("Tiles rendered together can not be keyset paginated")
         (
             parameterized_where_clause,
             where_clause_parameters,
-        ) = self._create_where_clause_with_params(table, filters)
+        ) = self._create_where_clause_with_params(
+            table, filters, min_size, source, "tiles.bounds" if tiles else None
+        )
+        columns = None if columns is None else tuple(columns)
+        pk_column = self.model._meta.pk.column
+        if keyset is not None and columns is not None and pk_column not in columns:
+            # the next page's cursor is read from the page's primary keys
+            columns += (pk_column,)
+        tile_format = self._get_tile_format(extent, buffer, clip, layer_name)
+        cluster_format = None
+        if cluster:
+            if keyset is not None:
+                raise ValueError("Clustered tiles can not be keyset paginated")
+            cluster_format = self._get_cluster_format(
+                cluster, cluster_method, cluster_aggregates
+            )
+        key = (
+            "query",
+            parameterized_where_clause,
+            gzip,
+            simplify,
+            simplify_method,
+            columns,
+            tile_format,
+            keyset,
+            counted,
+            cluster_format,
+            source,
+            tiles,
+        )
+        query = self._query_cache.get(key)
+        if query is None:
+            geometry = self._create_geometry_expression(
+                table, simplify, simplify_method, source
+            )
+            query = self._create_query(
+                table,
+                parameterized_where_clause,
+                gzip,
+                geometry,
+                columns,
+                tile_format,
+                keyset,
+                counted,
+                cluster_format,
+                source,
+                tiles,
+            )
+            self._query_cache[key] = query
+        return (query, where_clause_parameters)
+
+    def _get_tile_format(self, extent=None, buffer=None, clip=None, layer_name=None):
+        """
+        Returns:
+            tuple:
+            The layer name, extent, buffer and clip of the tile, falling back to the
+            manager's settings for values that are None.
+        """
+        layer_name = self.layer_name if layer_name is None else layer_name
+        extent = self.extent if extent is None else int(extent)
+        buffer = self.buffer if buffer is None else int(buffer)
+        clip = self.clip if clip is None else bool(clip)
+        if extent <= 0 or buffer < 0:
+            raise ValueError("extent must be positive and buffer must not be negative")
+        return str(layer_name), extent, buffer, clip
+
+    # pylint: disable=too-many-arguments
+    def _create_query(
+        self,
+        table,
+        parameterized_where_clause,
+        gzip=False,
+        geometry=None,
+        columns=None,
+        tile_format=None,
+        keyset=None,
+        counted=False,
+        cluster=None,
+        source=None,
+        tiles=None,
+    ):
+        source = source or self._get_geometry_source(table)
+        if geometry is None:
+            geometry = self._create_geometry_expression(table, source=source)
+        layer_name, extent, buffer, clip = tile_format or self._get_tile_format()
+        # quotes are doubled for SQL and percent signs for the parameter placeholders
+        layer_name = layer_name.replace("'", "''").replace("%", "%%")
+        tile = f"ST_AsMVT(q, '{layer_name}', {extent}, 'mvt_geom')"
+        if gzip:
+            # empty tiles stay empty so they are still served as 204s
+            tile = f"COALESCE(gzip(NULLIF({tile}, '')), '')"
+        if keyset is None:
+            head = "NULL AS id, COUNT(*)" if counted else "NULL AS id"
+            pagination = "LIMIT %s\n            OFFSET %s"
+        else:
+            pk = self.model._meta.pk.column
+            # the last primary key of the page and its size decide the next cursor
+            head = f"(ARRAY_AGG(q.{pk} ORDER BY q.{pk} DESC))[1] AS id, COUNT(*)"
+            if keyset == "after":
+                parameterized_where_clause += f" AND {table}.{pk} > %s"
+            pagination = f"ORDER BY {table}.{pk}\n            LIMIT %s"
+        envelope = "ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857)"
+        if tiles:
+            envelope = "tiles.envelope"
+        tile_envelope = f"{envelope}, {extent}, {buffer}, {str(clip).lower()}"
+        if cluster is None:
+            rows = f"""SELECT {self._create_select_statement(columns)}
+                ST_AsMVTGeom({geometry},
+                {tile_envelope}) AS mvt_geom
+            FROM {table}{source[2]}
+            WHERE {parameterized_where_clause}"""
+        else:
+            rows = self._create_cluster_rows(
+                table, parameterized_where_clause, tile_envelope, cluster, source
+            )
         query = f"""
-        SELECT NULL AS id, ST_AsMVT(q, 'default', 4096, 'mvt_geom')
-            FROM (SELECT {select_statement}
-                ST_AsMVTGeom(ST_Transform({table}.{self.geo_col}, 3857),
-                ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
-            FROM {table}
-            WHERE {parameterized_where_clause}
-            LIMIT %s
-            OFFSET %s) AS q;
+        SELECT {head}, {tile}
+            FROM ({rows}
+            {pagination}) AS q;
+        """
+        if tiles:
+            query = self._create_tiles_query(
+                query.strip().rstrip(";"), source[1], many=tiles == "tiles"
+            )
+        return query.strip()
+
+    def _create_geometry_expression(
+        self, table, simplify=None, simplify_method="simplify", source=None
+    ):
         """
-        return (query.strip(), where_clause_parameters)
+        Args:
+            table (str): A string representing the name of the table to query on.
+            simplify (float): Tolerance in EPSG:3857 units to simplify geometries with.
+            simplify_method (str): "simplify" for ST_SimplifyPreserveTopology or "snap"
+                                   for ST_SnapToGrid.
+            source (tuple): The geometry column, its SRID and the join of its table
+                            as returned by :py:meth:`GeneralizationMixin._get_geometry_source`.  The
+                            default is the model's geometry column.
+        Returns:
+            str:
+            A SQL expression of the geometry column in EPSG:3857.
+        """
+        column, srid, _ = source or self._get_geometry_source(table)
+        geometry = column if srid == 3857 else f"ST_Transform({column}, 3857)"
+        if simplify:
+            functions = {
+                "simplify": "ST_SimplifyPreserveTopology",
+                "snap": "ST_SnapToGrid",
+            }
+            if simplify_method not in functions:
+                raise ValueError(f"Unknown simplify_method: {simplify_method}")
+            geometry = f"{functions[simplify_method]}({geometry}, {float(simplify)!r})"
+        return geometry
 
-    def _create_where_clause_with_params(self, table, filters):
+    # pylint: disable=too-many-arguments
+    def _create_where_clause_with_params(
+        self, table, filters, min_size=None, source=None, envelope=None
+    ):
         """
         Args:
             table (str): A string representing the name of the table to query on.
             filters (dict): keys represent column names and values represent column
-                            values to filter on.
+                            values to filter on, or
+                            :py:class:`rest_framework_mvt.filters.TileFilters`
+                            cleaned by a filter schema, whose SQL is used as is.
+            min_size (float): Minimum bounding box diagonal in EPSG:3857 units of lines
+                              and polygons.
+            source (tuple): The geometry column, its SRID and the join of its table.
+                            The default is the model's geometry column.
+            envelope (str): SQL expression of the tile's envelope in the SRID of the
+                            geometry column.  The default is the bbox parameter.
         Returns:
             tuple:
             A tuple of length two.  The first element is a string representing a
             parameterized SQL query WHERE clause.  The second element is a list
             of parameters used as inputs to the WHERE clause.
         """
-        try:
-            sql, params = self.filter(**filters).query.sql_with_params()
-        except FieldError as error:
-            raise ValidationError(str(error)) from error
-        extra_wheres = " AND " + sql.split("WHERE")[1].strip() if params else ""
+        sql, params = "", []
+        if isinstance(filters, TileFilters):
+            extra_wheres = " AND " + filters.sql if filters.sql else ""
+            params = filters.params
+        else:
+            if filters:
+                sql, params = self._compile_filters(filters)
+            extra_wheres = " AND " + sql.split("WHERE")[1].strip() if params else ""
+        # The bbox is transformed to the column's SRID (not the other way around) so
+        # that a GiST index on the geometry column can be used by the planner.
+        geometry, srid, _ = source or self._get_geometry_source(table)
+        if envelope is None:
+            envelope = "ST_SetSRID(ST_GeomFromText(%s), 4326)"
+            if srid != 4326:
+                envelope = f"ST_Transform({envelope}, {int(srid)})"
         where_clause = (
-            f"ST_Intersects(ST_Transform({table}.{self.geo_col}, 4326), "
-            f"ST_SetSRID(ST_GeomFromText(%s), 4326)){extra_wheres}"
+            f"{geometry} && {envelope} "
+            f"AND ST_Intersects({geometry}, {envelope}){extra_wheres}"
         )
+        if min_size:
+            # only the bounding box diagonal is transformed, not the whole geometry
+            diagonal = f"ST_BoundingDiagonal({geometry})"
+            if srid != 3857:
+                diagonal = f"ST_Transform({diagonal}, 3857)"
+            where_clause += (
+                f" AND (ST_Dimension({geometry}) = 0 OR "
+                f"ST_Length({diagonal}) >= {float(min_size)!r})"
+            )
         return where_clause, list(params)
 
-    def _create_select_statement(self):
+    def _compile_filters(self, filters):
+        """
+        Args:
+            filters (dict): keys represent column names and values represent column
+                            values to filter on.
+        Returns:
+            tuple:
+            The SQL of the filters' queryset and its parameters.  Django compiles
+            filters to SQL depending on their values, e.g., of "in" and "isnull"
+            lookups, so the SQL is compiled once per distinct filters and values.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if a filter is not a field
+                                                        of the model
+        """
+
+        def compile_filters():
+            try:
+                sql, params = self.filter(**filters).query.sql_with_params()
+            except FieldError as error:
+                raise ValidationError(str(error)) from error
+            return sql, tuple(params)
+
+        key = ("where", tuple(sorted(filters.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable values, e.g., lists, are compiled every time
+            return compile_filters()
+        return self._memoize(key, compile_filters)
+
+    def _create_select_statement(self, columns=None):
         """
         Create a SELECT statement that only includes columns defined on the
         model.  Each column must be named in the SELECT statement to specify
         only the required columns.  Including the geom column raises an error
         in the PostGIS ST_AsMVT function.
 
+        Args:
+            columns (tuple): Names of the columns to include.  The default is None
+                             (all columns).
         Returns:
             str:
             A string representing a parameterized SQL query SELECT statement.
         """
-        columns = self._get_non_geom_columns()
+        return self._memoize(
+            ("select", columns), lambda: self._compile_select_statement(columns)
+        )
+
+    def _compile_select_statement(self, columns=None):
+        model_columns = self._get_non_geom_columns()
+        if columns is None:
+            columns = model_columns
+        elif not set(columns).issubset(model_columns):
+            unknown = ", ".join(sorted(set(columns) - set(model_columns)))
+            raise ValueError(f"Unknown columns: {unknown}")
+        if not columns:
+            return ""
         sql, _ = self.only(*columns).query.sql_with_params()
         select_sql = sql.split("FROM")[0].lstrip("SELECT ").strip() + ","
         return select_sql
 
+    @staticmethod
+    def _execute_prepared(connection, cursor, query, parameters):
+        """
+        Executes the query as a named prepared statement.  The statement is prepared
+        the first time it is executed on a database connection and again after
+        Django reconnects.  Only the ``_MAX_PREPARED_STATEMENTS`` most recently
+        used statements of a connection are kept, since filters, and so the
+        queries, are chosen by clients; older ones are deallocated.
+
+        Args:
+            connection (django.db.connection): The connection the cursor belongs to.
+            cursor (django.db.backends.utils.CursorWrapper): Cursor to execute with.
+            query (str): A parameterized SQL query.
+            parameters (list): Parameters of the query.
+        """
+        name = "mvt_" + hashlib.md5(query.encode()).hexdigest()
+        prepared_statements = connection.__dict__.setdefault(
+            "mvt_prepared_statements", OrderedDict()
+        )
+        if name in prepared_statements:
+            prepared_statements.move_to_end(name)
+        else:
+            while len(prepared_statements) >= _MAX_PREPARED_STATEMENTS:
+                evicted, _ = prepared_statements.popitem(last=False)
+                cursor.execute(f"DEALLOCATE {evicted}")
+            positions = iter(range(1, len(parameters) + 1))
+            statement = _PLACEHOLDER_PATTERN.sub(
+                lambda match: "%" if match.group() == "%%" else f"${next(positions)}",
+                query.rstrip(";"),
+            )
+            cursor.execute(f"PREPARE {name} AS {statement}")
+            prepared_statements[name] = None
+        placeholders = ", ".join(["%s"] * len(parameters))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", parameters)
+
+    def _memoize(self, key, compile_value):
+        try:
+            return self._query_cache[key]
+        except KeyError:
+            value = self._query_cache[key] = compile_value()
+            return value
+
     def _get_connection(self):
         """
 
@@ -140,3 +815,139 @@ class MVTManager(models.Manager):
         from django.db import connection, connections
 
         return connection if self.source_name is None else connections[self.source_name]
+
+    def _route(self, query):
+        """
+        Args:
+            query (callable): Function running a read-only query on the Django
+                              database connection it is called with.
+        Returns:
+            object:
+            The result of the function called with a connection to one of the
+            ``replicas`` or, without replicas, to ``source_name``.
+        """
+        if self.replicas is None:
+            return query(self._get_connection())
+        # pylint: disable=import-outside-toplevel
+        from django.db import connections
+
+        return self.replicas.execute(lambda alias: query(connections[alias]))
+
+
+class _QueryCache(OrderedDict):
+    """
+    Compiled queries keyed by their WHERE clause and options.  Only the
+    ``maxsize`` most recently used queries are kept, since filters, and so the
+    keys, are chosen by clients.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        try:
+            self.move_to_end(key)
+        except KeyError:
+            # discarded by another thread in between
+            pass
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        while len(self) > self.maxsize:
+            try:
+                self.popitem(last=False)
+            except KeyError:
+                break
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+_PLACEHOLDER_PATTERN = re.compile("%s|%%")
+_MAX_PREPARED_STATEMENTS = 256
+
+
+# pylint: disable=too-many-arguments
+def _fetch_row(
+    connection,
+    query,
+    parameters,
+    prepared=False,
+    statement_timeout=None,
+    sender=None,
+    stopwatch=None,
+    many=False,
+):
+    """
+    Executes a tile query and returns its row, or with ``many`` all of its rows.
+    With a statement timeout the query runs in an atomic block, which the timeout
+    is local to.  The execution is reported to
+    :py:data:`rest_framework_mvt.signals.tile_queried` receivers.
+    """
+    stopwatch = stopwatch or Stopwatch()
+    atomic = nullcontext()
+    if statement_timeout is not None:
+        atomic = transaction.atomic(using=connection.alias)
+    with atomic, connection.cursor() as cursor:
+        if statement_timeout is not None:
+            cursor.execute(
+                _SET_STATEMENT_TIMEOUT, [_to_milliseconds(statement_timeout)]
+            )
+        if prepared:
+            MVTManager._execute_prepared(connection, cursor, query, parameters)
+        else:
+            cursor.execute(query, parameters)
+        stopwatch.lap("execute")
+        # a row per tile, each fetched without copying the tile
+        rows = cursor.fetchall() if many else [cursor.fetchone()]
+        stopwatch.lap("fetch")
+    _send_tile_queried(sender, rows, stopwatch)
+    return rows if many else rows[0]
+
+
+def _send_tile_queried(sender, rows, stopwatch):
+    if not tile_queried.has_listeners(sender):
+        return
+    features = None
+    # counted queries return the id, the number of features and the tile
+    if rows and all(len(row) == 3 for row in rows):
+        features = sum(row[1] for row in rows)
+    tile_queried.send(
+        sender=sender,
+        timings=dict(stopwatch.timings),
+        size=sum(len(row[-1] or b"") for row in rows),
+        features=features,
+    )
+
+
+def _to_milliseconds(seconds):
+    return str(max(1, round(seconds * 1000)))
+
+
+_SET_STATEMENT_TIMEOUT = "SELECT set_config('statement_timeout', %s, true);"
+
+
+# pylint: disable=unused-argument
+def _clear_query_caches(sender, **kwargs):
+    for manager in list(MVTManager._instances):
+        manager.clear_query_cache()
+
+
+post_migrate.connect(_clear_query_caches, dispatch_uid="rest_framework_mvt.managers")
+
+
+# pylint: disable=unused-argument
+def _forget_prepared_statements(sender, connection, **kwargs):
+    # prepared statements only live as long as the database session
+    connection.__dict__["mvt_prepared_statements"] = OrderedDict()
+
+
+connection_created.connect(
+    _forget_prepared_statements, dispatch_uid="rest_framework_mvt.managers"
+)
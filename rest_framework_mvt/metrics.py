@@ -0,0 +1,250 @@
+import bisect
+import math
+import threading
+import time
+
+from django.http import HttpResponse
+
+from rest_framework_mvt.signals import tile_queried, tile_served
+
+
+class Stopwatch:
+    """
+    Measures the seconds between laps, e.g., the phases of serving a tile.
+    """
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.timings = {}
+
+    def lap(self, name):
+        """
+        Records the seconds since the previous lap under ``name``.
+        """
+        now = time.perf_counter()
+        self.timings[name] = self.timings.get(name, 0.0) + now - self.last
+        self.last = now
+
+    def total(self):
+        """
+        Returns:
+            dict:
+            The laps and their "total".
+        """
+        return dict(self.timings, total=self.last - self.started)
+
+
+class Histogram:
+    """
+    Thread safe histogram with labels in the style of a Prometheus histogram.
+
+    Args:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        buckets (tuple): Upper bounds of the buckets in ascending order.
+        label_names (tuple): Names of the labels of each observation.
+    """
+
+    def __init__(self, name, documentation, buckets, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, **labels):
+        """
+        Args:
+            value (float): The observed value.
+            labels: A value for each label name.
+        """
+        key = tuple(str(labels[name]) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def quantile(self, q, **labels):
+        """
+        Estimates a quantile from the buckets like Prometheus'
+        ``histogram_quantile``.
+
+        Args:
+            q (float): The quantile, e.g., 0.99.
+            labels: A value for each label name.
+        Returns:
+            float:
+            The estimated quantile or None if nothing was observed.
+        """
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            counts = list(self._series.get(key, [[]])[0])
+        total = sum(counts)
+        if not total:
+            return None
+        rank, cumulative = q * total, 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1] if self.buckets else math.inf
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return None  # pragma: no cover
+
+    def collect(self):
+        """
+        Returns:
+            list:
+            The lines of the histogram in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted(
+                (key, list(counts), total)
+                for key, (counts, total) in self._series.items()
+            )
+        for key, counts, total in series:
+            labels = [
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.label_names, key)
+            ]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                bucket_labels = ",".join(labels + [f'le="{le}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total!r}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of tile metrics fed by the :py:data:`tile_served` and
+    :py:data:`tile_queried` signals and exposed in the Prometheus text format,
+    see :py:func:`metrics_view_factory`.
+
+    Metrics are histograms, so p50 and p99 per layer and zoom level can be
+    computed with ``histogram_quantile`` or :py:meth:`Histogram.quantile`:
+
+    - ``mvt_tile_seconds``: Time to serve a tile by layer, zoom, status and cache.
+    - ``mvt_tile_bytes``: Size of served tiles by layer and zoom.
+    - ``mvt_query_seconds``: Time of each tile query phase by model and phase.
+    - ``mvt_query_features``: Number of features per tile query by model.
+
+    Args:
+        latency_buckets (tuple): Upper bounds in seconds of the latency buckets.
+        size_buckets (tuple): Upper bounds in bytes of the size buckets.
+        feature_buckets (tuple): Upper bounds of the feature count buckets.
+    """
+
+    def __init__(
+        self,
+        latency_buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        size_buckets=(1024, 4096, 16384, 65536, 262144, 524288, 1048576, 4194304),
+        feature_buckets=(10, 100, 1000, 10000, 50000, 100000, 500000),
+    ):
+        self.tile_seconds = Histogram(
+            "mvt_tile_seconds",
+            "Seconds to serve a tile.",
+            latency_buckets,
+            ("layer", "zoom", "status", "cache"),
+        )
+        self.tile_bytes = Histogram(
+            "mvt_tile_bytes", "Bytes of served tiles.", size_buckets, ("layer", "zoom")
+        )
+        self.query_seconds = Histogram(
+            "mvt_query_seconds",
+            "Seconds of each phase of tile queries.",
+            latency_buckets,
+            ("model", "phase"),
+        )
+        self.query_features = Histogram(
+            "mvt_query_features",
+            "Features per tile query.",
+            feature_buckets,
+            ("model",),
+        )
+
+    def connect(self):
+        """
+        Connects the registry to the tile signals.
+        """
+        uid = f"rest_framework_mvt.metrics.{id(self)}"
+        tile_served.connect(self._on_tile_served, weak=False, dispatch_uid=uid)
+        tile_queried.connect(self._on_tile_queried, weak=False, dispatch_uid=uid)
+
+    def disconnect(self):
+        uid = f"rest_framework_mvt.metrics.{id(self)}"
+        tile_served.disconnect(dispatch_uid=uid)
+        tile_queried.disconnect(dispatch_uid=uid)
+
+    def render(self):
+        """
+        Returns:
+            str:
+            Every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for histogram in (
+            self.tile_seconds,
+            self.tile_bytes,
+            self.query_seconds,
+            self.query_features,
+        ):
+            lines += histogram.collect()
+        return "\n".join(lines) + "\n"
+
+    # pylint: disable=unused-argument,too-many-arguments
+    def _on_tile_served(
+        self, sender, layer, zoom, status, size, cache, timings, **kwargs
+    ):
+        zoom = "" if zoom is None else zoom
+        self.tile_seconds.observe(
+            timings["total"], layer=layer, zoom=zoom, status=status, cache=cache or ""
+        )
+        if status == 200:
+            self.tile_bytes.observe(size, layer=layer, zoom=zoom)
+
+    # pylint: disable=unused-argument
+    def _on_tile_queried(self, sender, timings, features, **kwargs):
+        model = getattr(getattr(sender, "_meta", None), "label_lower", "")
+        for phase, seconds in timings.items():
+            self.query_seconds.observe(seconds, model=model, phase=phase)
+        if features is not None:
+            self.query_features.observe(features, model=model)
+
+
+def metrics_view_factory(registry):
+    """
+    Creates a Django view exposing a registry's metrics to Prometheus.
+
+    Args:
+        registry (:py:class:`MetricsRegistry`): The registry.
+    Returns:
+        callable:
+        A view function.
+    """
+
+    # pylint: disable=unused-argument
+    def metrics_view(request):
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    return metrics_view
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+
+from rest_framework_mvt.metrics import Stopwatch
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset paginated tile queries of
+    :py:class:`rest_framework_mvt.managers.MVTManager`.
+    """
+
+    def intersect_page(self, bbox="", limit=-1, after=None, filters={}, **kwargs):
+        """
+        Keyset paginated counterpart of :py:meth:`MVTManager.intersect`.  Entries are ordered
+        by primary key and a page starts after the last entry of the previous page,
+        so deep pages cost as little as the first one, unlike offsets, which rescan
+        every skipped row.
+
+        Args:
+            bbox (str): A string representing a bounding box, e.g., '-90,29,-89,35'.
+            limit (int): Number of entries to include in the page.  The default is
+                         -1 (includes all results).
+            after: Primary key of the last entry of the previous page.  The default
+                   is None (the first page).
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+            kwargs: Any other keyword argument of :py:meth:`MVTManager.intersect`, e.g.,
+                    ``tile``.  The primary key is always included in the columns.
+        Returns:
+            tuple:
+            A tuple of length two.  The first element is the tile.  The second
+            element is the primary key to pass as ``after`` for the next page or
+            None if this is the last page.
+        """
+        stopwatch = Stopwatch()
+        query, parameters = self._build_page_query(
+            bbox, limit, after, filters=filters, **kwargs
+        )
+        stopwatch.lap("build")
+        row = self._fetch_tile_row(query, parameters, stopwatch)
+        return self._get_page(row, limit)
+
+    async def aintersect_page(
+        self, bbox="", limit=-1, after=None, filters={}, **kwargs
+    ):
+        """
+        Async counterpart of :py:meth:`intersect_page` taking the same arguments.
+
+        Returns:
+            tuple:
+            The tile and the primary key to pass as ``after`` for the next page or
+            None if this is the last page.
+        """
+        if self.async_pool is None:
+            return await sync_to_async(self.intersect_page)(
+                bbox=bbox, limit=limit, after=after, filters=filters, **kwargs
+            )
+        stopwatch = Stopwatch()
+        query, parameters = await sync_to_async(self._build_page_query)(
+            bbox, limit, after, filters=filters, **kwargs
+        )
+        stopwatch.lap("build")
+        row = await self._afetch_tile_row(query, parameters, stopwatch)
+        return self._get_page(row, limit)
+
+    # pylint: disable=too-many-arguments
+    def _build_page_query(self, bbox, limit, after, tile=None, **kwargs):
+        """
+        Returns:
+            tuple:
+            The parameterized keyset page query for the keyword arguments of
+            :py:meth:`MVTManager._build_query` and all of its parameters.
+        """
+        limit = None if limit == -1 else limit
+        keyset = "first" if after is None else "after"
+        envelope, kwargs = self._get_envelope_parameters(bbox, tile, kwargs)
+        query, parameters = self._build_query(keyset=keyset, **kwargs)
+        after = [] if after is None else [after]
+        return query, envelope + parameters + after + [limit]
+
+    @staticmethod
+    def _get_page(row, limit):
+        """
+        Returns:
+            tuple:
+            The tile of a keyset page query's row and the primary key the next
+            page starts after or None if the page is not full.
+        """
+        last_pk, count, mvt = row
+        if limit in (None, -1) or count < int(limit):
+            return mvt, None
+        return mvt, last_pk
@@ -0,0 +1,194 @@
+import itertools
+import threading
+import time
+
+
+# pylint: disable=too-many-instance-attributes
+class ReplicaRouter:
+    """
+    Routes read-only tile queries across database aliases, e.g., read replicas,
+    so tile traffic is kept off the primary.
+
+    An alias failing to connect ``max_failures`` times in a row is ejected for
+    ``ejection_seconds`` and then tried again; a single failure ejects it again
+    until a query succeeds.  When every alias is ejected, the one ejected first is
+    tried anyway.  Queries failing to connect are retried on another alias, which
+    is safe since tile queries only read.
+
+    Routing holds no database session state, so aliases may point at connection
+    poolers such as pgbouncer in transaction mode, unless the manager uses
+    ``prepared=True``.  Prepared statements live in the database session, which a
+    transaction mode pooler does not keep between transactions.
+
+    Args:
+        aliases (list): Django database aliases of the replicas.  With an
+                        ``async_pool`` per alias, see :py:class:`MVTManager`, the
+                        keys of the pools.
+        strategy (str): "round_robin" to take turns or "least_in_flight" to pick
+                        the alias with the fewest queries running in this process.
+                        The default is "round_robin".
+        max_failures (int): Consecutive connection failures ejecting an alias.
+                            The default is 3.
+        ejection_seconds (float): Seconds an ejected alias is skipped for.  The
+                                  default is 30.
+        retries (int): Number of other aliases a query is retried on after a
+                       connection failure.  The default is 1.
+    Raises:
+        ValueError: If there are no aliases or the strategy is unknown.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        aliases,
+        strategy="round_robin",
+        max_failures=3,
+        ejection_seconds=30,
+        retries=1,
+    ):
+        if not aliases:
+            raise ValueError("At least one alias is required")
+        if strategy not in ("round_robin", "least_in_flight"):
+            raise ValueError(f"Unknown routing strategy: {strategy}")
+        self.aliases = list(aliases)
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.ejection_seconds = ejection_seconds
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._turns = itertools.count()
+        self._in_flight = dict.fromkeys(self.aliases, 0)
+        self._failures = dict.fromkeys(self.aliases, 0)
+        self._ejected_until = dict.fromkeys(self.aliases, 0.0)
+
+    def execute(self, function):
+        """
+        Args:
+            function (callable): Function querying the alias it is called with.
+        Returns:
+            object:
+            The result of the function.
+        """
+        tried = []
+        while True:
+            alias = self._begin(tried)
+            try:
+                result = function(alias)
+            except Exception as error:  # pylint: disable=broad-except
+                if not self._fail(alias, error, tried):
+                    raise
+                continue
+            finally:
+                self._end(alias)
+            self._succeed(alias)
+            return result
+
+    async def aexecute(self, function):
+        """
+        Async version of :py:meth:`execute`.
+
+        Args:
+            function (callable): Coroutine function querying the alias it is
+                                 called with.
+        Returns:
+            object:
+            The result of the coroutine.
+        """
+        tried = []
+        while True:
+            alias = self._begin(tried)
+            try:
+                result = await function(alias)
+            except Exception as error:  # pylint: disable=broad-except
+                if not self._fail(alias, error, tried):
+                    raise
+                continue
+            finally:
+                self._end(alias)
+            self._succeed(alias)
+            return result
+
+    def get_status(self):
+        """
+        Returns:
+            dict:
+            The number of queries in flight, consecutive failures and whether it
+            is ejected by alias, e.g., for a health check endpoint.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                alias: {
+                    "in_flight": self._in_flight[alias],
+                    "failures": self._failures[alias],
+                    "ejected": self._ejected_until[alias] > now,
+                }
+                for alias in self.aliases
+            }
+
+    def _begin(self, tried):
+        now = time.monotonic()
+        with self._lock:
+            candidates = [alias for alias in self.aliases if alias not in tried]
+            healthy = [
+                alias for alias in candidates if self._ejected_until[alias] <= now
+            ]
+            if healthy:
+                # rotating the start spreads ties of least_in_flight as well
+                turn = next(self._turns) % len(healthy)
+                candidates = healthy[turn:] + healthy[:turn]
+                if self.strategy == "least_in_flight":
+                    candidates.sort(key=self._in_flight.__getitem__)
+            else:
+                candidates.sort(key=self._ejected_until.__getitem__)
+            alias = candidates[0]
+            self._in_flight[alias] += 1
+        return alias
+
+    def _end(self, alias):
+        with self._lock:
+            self._in_flight[alias] -= 1
+
+    def _succeed(self, alias):
+        with self._lock:
+            self._failures[alias] = 0
+
+    def _fail(self, alias, error, tried):
+        """
+        Returns:
+            bool:
+            Whether the query should be retried on another alias.
+        """
+        if not is_unavailable(error):
+            return False
+        with self._lock:
+            self._failures[alias] += 1
+            if self._failures[alias] >= self.max_failures:
+                self._ejected_until[alias] = time.monotonic() + self.ejection_seconds
+        tried.append(alias)
+        return len(tried) <= self.retries and len(tried) < len(self.aliases)
+
+
+def is_unavailable(error):
+    """
+    Args:
+        error (Exception): An error raised by a query.
+    Returns:
+        bool:
+        Whether the error means the database could not be reached, as opposed to
+        an error of the query itself, e.g., a cancelled statement.
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if not names & {"OperationalError", "InterfaceError"}:
+        return False
+    for cause in (error, error.__cause__):
+        # psycopg 2 and 3 name the SQLSTATE differently
+        code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+        if code:
+            return code.startswith("08") or code in _SHUTDOWN_CODES
+    # errors without a SQLSTATE are raised by the client, e.g., a lost connection
+    return True
+
+
+# admin_shutdown, crash_shutdown and cannot_connect_now
+_SHUTDOWN_CODES = ("57P01", "57P02", "57P03")
@@ -30,3 +30,49 @@ MVT_SCHEMA = ManualSchema(
         ),
     ]
 )
+
+MVT_BATCH_SCHEMA = ManualSchema(
+    fields=[
+        coreapi.Field(
+            "tiles",
+            required=False,
+            location="query",
+            schema=coreschema.String(
+                description="Comma separated z/x/y coordinates of the requested tiles."
+            ),
+        ),
+        coreapi.Field(
+            "zoom",
+            required=False,
+            location="query",
+            schema=coreschema.Integer(
+                description="Zoom level of the requested tiles when tiles is not given."
+            ),
+        ),
+        coreapi.Field(
+            "bbox",
+            required=False,
+            location="query",
+            schema=coreschema.String(
+                description="West, south, east and north edges in EPSG:4326 the "
+                "requested tiles intersect when tiles is not given."
+            ),
+        ),
+        coreapi.Field(
+            "limit",
+            required=False,
+            location="query",
+            schema=coreschema.String(
+                description="Number of results to return per tile."
+            ),
+        ),
+        coreapi.Field(
+            "offset",
+            required=False,
+            location="query",
+            schema=coreschema.String(
+                description="The initial index from which to return the results of each tile."
+            ),
+        ),
+    ]
+)
@@ -0,0 +1,305 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+
+import django
+from django.apps import apps
+from django.contrib.gis.geos import Polygon
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from rest_framework_mvt.tiles import tile_bounds, tile_children
+from rest_framework_mvt.composite import BaseCompositeMVTView
+from rest_framework_mvt.views import BaseMVTView, _unpack_etag, _unpack_page
+
+
+def resolve_view(target, tile_cache=None):
+    """
+    Args:
+        target (str): "app_label.ModelName" of a model with a ``vector_tiles``
+                      MVTManager or the dotted path of a view, i.e., a
+                      :py:class:`BaseMVTView` subclass or a view returned by
+                      ``mvt_view_factory``.
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache to
+                        render tiles into.  The default is the view's tile cache.
+    Returns:
+        :py:class:`rest_framework_mvt.views.BaseMVTView`:
+        An instance of the view.
+    Raises:
+        ValueError: If the target is neither a model nor an MVT view.
+    """
+    model = None
+    if target.count(".") == 1:
+        try:
+            model = apps.get_model(target)
+        except (LookupError, ValueError):
+            pass
+    if model is not None:
+        view_class = type(f"{model.__name__}MVTView", (BaseMVTView,), {"model": model})
+    else:
+        try:
+            view_class = import_string(target)
+        except ImportError as error:
+            raise ValueError(f"{target} is neither a model nor a view") from error
+        # views returned by as_view() keep a reference to their class
+        view_class = getattr(view_class, "cls", view_class)
+    if not isinstance(view_class, type) or not issubclass(view_class, BaseMVTView):
+        raise ValueError(f"{target} is not an MVT view")
+    view = view_class()
+    if tile_cache is not None:
+        view.tile_cache = tile_cache
+    return view
+
+
+# pylint: disable=too-many-instance-attributes
+class TileSeeder:
+    """
+    Renders the tiles of an MVT view into its tile cache ahead of traffic or
+    into a tile archive, see :py:mod:`rest_framework_mvt.archives`.
+
+    Tiles are enumerated by descending the quadtree from zoom level 0 and
+    branches without data are skipped, so sparse layers are seeded in a fraction
+    of the tiles of their bounding box.
+
+    Args:
+        target (str): Model or view to seed, see :py:func:`resolve_view`.
+        min_zoom (int): Lowest zoom level to render.
+        max_zoom (int): Highest zoom level to render.
+        bounds (tuple): West, south, east and north edges in EPSG:4326 to seed.
+                        The default is the extent of the data.
+        polygon (:py:class:`django.contrib.gis.geos.GEOSGeometry`): Area to seed.
+                        The default is the bounds.
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache to
+                        render tiles into.  The default is the view's tile cache.
+        encodings (tuple): Content encodings to render each tile in.  The default
+                           is uncompressed tiles only.
+        processes (int): Number of processes rendering tiles.  The default is 1.
+        state_file (str): File seeded tiles are appended to.  Tiles listed in
+                          it are skipped, so an interrupted run resumes where it
+                          stopped.  The default is None (no state).
+    Raises:
+        ValueError: If the target is neither a model nor an MVT view.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        target,
+        min_zoom,
+        max_zoom,
+        bounds=None,
+        polygon=None,
+        tile_cache=None,
+        encodings=(None,),
+        processes=1,
+        state_file=None,
+    ):
+        self.target = target
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.bounds = bounds
+        if polygon is not None and polygon.srid not in (None, 4326):
+            polygon = polygon.transform(4326, clone=True)
+        self.polygon = polygon
+        self.tile_cache = tile_cache
+        self.encodings = tuple(encodings) or (None,)
+        self.processes = processes
+        self.state_file = state_file
+        self.view = resolve_view(target, tile_cache)
+
+    def iter_tiles(self):
+        """
+        Returns:
+            generator:
+            The z/x/y tuples of the tiles to render, depth first.
+        """
+        managers = self._get_managers()
+        area = self._get_area(managers)
+        if area is None:
+            return
+        stack = [(0, 0, 0)]
+        while stack:
+            tile = stack.pop()
+            bbox = Polygon.from_bbox(tile_bounds(*tile))
+            if not area.intersects(bbox):
+                continue
+            if not any(manager.has_features(bbox) for manager in managers):
+                continue
+            if tile[0] >= self.min_zoom:
+                yield tile
+            if tile[0] < self.max_zoom:
+                stack.extend(reversed(tile_children(*tile)))
+
+    def seed(self, progress=None):
+        """
+        Args:
+            progress (callable): Called with the number of rendered tiles and the
+                                 elapsed seconds after each tile.
+        Returns:
+            int:
+            The number of rendered tiles.
+        Raises:
+            ValueError: If the view has no tile cache or, with several
+                        ``processes``, a cache local to a process.
+        """
+        if self.view.tile_cache is None:
+            raise ValueError(f"{self.target} has no tile cache to seed")
+        if self.processes > 1 and self.view.tile_cache.process_local:
+            # every worker process would fill its own copy of the cache
+            raise ValueError(
+                f"{type(self.view.tile_cache).__name__} is local to a process and "
+                "can not be seeded by several processes"
+            )
+        completed = self._load_state()
+        tiles = (tile for tile in self.iter_tiles() if tile not in completed)
+        started = time.monotonic()
+        count = 0
+        with ExitStack() as stack:
+            state = None
+            if self.state_file is not None:
+                state = stack.enter_context(
+                    open(self.state_file, "a", encoding="utf-8")
+                )
+            for tile in self._run(tiles, _seed_tile, self.encodings):
+                count += 1
+                if state is not None:
+                    state.write(f"{tile[0]}/{tile[1]}/{tile[2]}\n")
+                    state.flush()
+                if progress is not None:
+                    progress(count, time.monotonic() - started)
+        return count
+
+    def export(self, writer, progress=None):
+        """
+        Renders the tiles into a tile archive.  Empty tiles are left out.
+
+        Args:
+            writer (:py:class:`rest_framework_mvt.archives.BaseTileArchiveWriter`):
+                        Writer of the archive.
+            progress (callable): Called with the number of rendered tiles and the
+                                 elapsed seconds after each tile.
+        Returns:
+            int:
+            The number of rendered tiles.
+        """
+        started = time.monotonic()
+        count = 0
+        for tile, mvt in self._run(self.iter_tiles(), _export_tile):
+            writer.add_tile(*tile, mvt)
+            count += 1
+            if progress is not None:
+                progress(count, time.monotonic() - started)
+        return count
+
+    def get_layer_names(self):
+        """
+        Returns:
+            list:
+            Names of the layers in the view's tiles.
+        """
+        if isinstance(self.view, BaseCompositeMVTView):
+            return [layer_name for _, layer_name in self.view._get_layers()]
+        layer_name = self.view.layer_name
+        if layer_name is None:
+            layer_name = self.view.model.vector_tiles.layer_name
+        return [layer_name]
+
+    def _run(self, tiles, function, *args):
+        """
+        Calls ``function`` with the view, each tile and ``args`` in this process or
+        in a pool of ``processes`` worker processes.
+        """
+        if self.processes <= 1:
+            for tile in tiles:
+                yield function(self.view, tile, *args)
+            return
+        # forked workers must not share the parent's database sockets
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_worker,
+            initargs=(self.target, self.tile_cache),
+        ) as executor:
+            pending = set()
+            for tile in tiles:
+                pending.add(executor.submit(_run_in_worker, function, tile, args))
+                if len(pending) >= self.processes * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    def _get_managers(self):
+        if isinstance(self.view, BaseCompositeMVTView):
+            return [manager for manager, _ in self.view._get_layers()]
+        return [self.view.model.vector_tiles]
+
+    def _get_area(self, managers):
+        bounds = self.bounds
+        if bounds is None:
+            extents = [manager.get_bounds() for manager in managers]
+            extents = [extent for extent in extents if extent is not None]
+            if not extents:
+                return None
+            bounds = (
+                min(extent[0] for extent in extents),
+                min(extent[1] for extent in extents),
+                max(extent[2] for extent in extents),
+                max(extent[3] for extent in extents),
+            )
+        area = Polygon.from_bbox(bounds)
+        return area if self.polygon is None else area.intersection(self.polygon)
+
+    def _load_state(self):
+        if self.state_file is None or not os.path.exists(self.state_file):
+            return set()
+        with open(self.state_file, encoding="utf-8") as state:
+            return {
+                tuple(int(part) for part in line.split("/"))
+                for line in state
+                if line.strip()
+            }
+
+
+def _seed_tile(view, tile, encodings):
+    # tiles are rendered even if they are cached, so seeding refreshes stale tiles
+    z, x, y = tile
+    layer = view._get_layer_key()
+    generation = view.tile_cache.get_generation(layer, z, x, y)
+    options = view._get_render_options(z, None)
+    for encoding in encodings:
+        view.tile_cache.set_tile(
+            layer,
+            z,
+            x,
+            y,
+            view._render(tile, None, None, {}, encoding),
+            view._get_variant({}, None, None, encoding, options),
+            generation,
+        )
+    return tile
+
+
+def _export_tile(view, tile):
+    mvt = _unpack_etag(view._render(tile, None, None, {}, None))[1]
+    if view.keyset_pagination:
+        mvt = _unpack_page(mvt)[1]
+    mvt = bytes(mvt)
+    return tile, mvt
+
+
+_WORKER_VIEW = None
+
+
+def _init_worker(target, tile_cache):
+    # pylint: disable=global-statement
+    global _WORKER_VIEW
+    if not apps.ready:
+        django.setup()
+    _WORKER_VIEW = resolve_view(target, tile_cache)
+
+
+def _run_in_worker(function, tile, args):
+    return function(_WORKER_VIEW, tile, *args)
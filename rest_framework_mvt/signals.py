@@ -0,0 +1,19 @@
+from django.dispatch import Signal
+
+# Sent after cached tiles were evicted.  Receivers get ``layer`` (str) and ``tiles``
+# (a set of z/x/y tuples), e.g., to purge the same tiles from a CDN.
+tiles_invalidated = Signal()
+
+# Sent after a tile query ran.  Receivers get ``timings`` (a dict of the seconds
+# spent to "build", "execute" and "fetch" the query), ``size`` (the tile's bytes)
+# and ``features`` (int, or None if the query did not count them).  The sender is
+# the model, or None for tiles of several layers.  While a receiver is connected
+# tile queries also count their features.
+tile_queried = Signal()
+
+# Sent after a view answered a tile request.  Receivers get ``layer`` (str),
+# ``zoom`` (int, or None for invalid requests), ``status`` (int), ``size`` (bytes),
+# ``cache`` ("hit", "miss" or None without a tile cache) and ``timings`` (a dict of
+# the seconds spent to "parse" the request, "render" the tile and build the
+# "response", and their "total").  The sender is the view class.
+tile_served = Signal()
@@ -0,0 +1,131 @@
+import math
+
+from rest_framework.serializers import ValidationError
+from rest_framework_gis.tilenames import tile_edges
+
+# Highest zoom level served, whose tile columns and rows still fit 32 bits
+MAX_ZOOM = 30
+
+
+def parse_tile(tile):
+    """
+    Args:
+        tile (str): A string representing a tile address, e.g., '2/1/1'.
+    Returns:
+        tuple:
+        A tuple of length three containing the integer z, x and y of the tile.
+    Raises:
+        `rest_framework.serializers.ValidationError`: if the tile is not a valid
+                                                      z/x/y address or its zoom
+                                                      level exceeds ``MAX_ZOOM``
+    """
+    try:
+        z, x, y = (int(n) for n in str(tile).split("/"))
+    except ValueError as value_error:
+        raise ValidationError(f"Invalid tile: {tile}") from value_error
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise ValidationError(f"Invalid tile: {tile}")
+    return z, x, y
+
+
+def get_zoom_value(zoom_values, zoom, default=None):
+    """
+    Looks up the value configured for a zoom level.
+
+    Args:
+        zoom_values (object, dict): Either a single value used at every zoom level or
+                                    a dict keyed by the minimum zoom level each value
+                                    applies to, e.g., ``{0: 86400, 12: 3600}``.
+        zoom (int): Zoom level of the requested tile.
+        default (object): Value returned when no zoom band applies.
+    Returns:
+        object:
+        The value of the highest zoom band starting at or below ``zoom``.
+    """
+    if not isinstance(zoom_values, dict):
+        return default if zoom_values is None else zoom_values
+    bands = [min_zoom for min_zoom in zoom_values if min_zoom <= zoom]
+    return zoom_values[max(bands)] if bands else default
+
+
+# Latitude bounds of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798066
+
+
+def tile_bounds(z, x, y):
+    """
+    Args:
+        z (int): Zoom level of the tile.
+        x (int): Column of the tile.
+        y (int): Row of the tile, counted from the north.
+    Returns:
+        tuple:
+        The west, south, east and north edges of the tile in EPSG:4326.
+    """
+    west, south, east, north = tile_edges(x, y, z)
+    return west, south, east, north
+
+
+# pylint: disable=too-many-arguments
+def tiles_for_bounds(west, south, east, north, zoom, padding=0):
+    """
+    Args:
+        west (float): Western edge of the bounds in EPSG:4326.
+        south (float): Southern edge of the bounds in EPSG:4326.
+        east (float): Eastern edge of the bounds in EPSG:4326.
+        north (float): Northern edge of the bounds in EPSG:4326.
+        zoom (int): Zoom level of the tiles.
+        padding (int): Number of neighbouring tiles to include on every side.
+                       The default is 0.
+    Returns:
+        generator:
+        The z/x/y tuples of every tile at ``zoom`` intersecting the bounds.
+    """
+    min_x, min_y = _lonlat_to_tile(west, north, zoom)
+    max_x, max_y = _lonlat_to_tile(east, south, zoom)
+    last = 2**zoom - 1
+    min_x, min_y = max(min_x - padding, 0), max(min_y - padding, 0)
+    max_x, max_y = min(max_x + padding, last), min(max_y + padding, last)
+    for x in range(min_x, max_x + 1):
+        for y in range(min_y, max_y + 1):
+            yield zoom, x, y
+
+
+def tile_children(z, x, y):
+    """
+    Args:
+        z (int): Zoom level of the tile.
+        x (int): Column of the tile.
+        y (int): Row of the tile.
+    Returns:
+        list:
+        The z/x/y tuples of the four tiles covering the tile at the next zoom level.
+    """
+    return [
+        (z + 1, 2 * x + dx, 2 * y + dy) for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1))
+    ]
+
+
+def _lonlat_to_tile(lon, lat, zoom):
+    tiles = 2**zoom
+    lat = math.radians(min(max(lat, -MAX_LATITUDE), MAX_LATITUDE))
+    x = int((min(max(lon, -180.0), 180.0) + 180.0) / 360.0 * tiles)
+    y = int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * tiles)
+    return min(x, tiles - 1), min(max(y, 0), tiles - 1)
+
+
+# Width of the EPSG:3857 world in meters
+WEB_MERCATOR_WIDTH = 2 * 20037508.342789244
+
+
+def tile_units_to_meters(value, zoom, extent=4096):
+    """
+    Args:
+        value (float): A distance in tile units, i.e., 1/extent of the tile's width.
+        zoom (int): Zoom level of the tile.
+        extent (int): Tile extent in tile units.  The default is 4096.
+    Returns:
+        float:
+        The distance in EPSG:3857 units (meters at the equator).
+    """
+    return value * WEB_MERCATOR_WIDTH / 2**zoom / extent
@@ -1,21 +1,160 @@
+# the tile views share the request handling of BaseMVTView
+# pylint: disable=too-many-lines
+import asyncio
+import base64
+import binascii
+import gzip
+import hashlib
+import itertools
+import os
+import struct
+
+from asgiref.sync import sync_to_async
+import django
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
-from rest_framework_gis.filters import TMSTileFilter
+from rest_framework_mvt.archives import open_archive
+from rest_framework_mvt.caches import BaseTileCache, get_layer_key
+from rest_framework_mvt.coalescing import (
+    SingleFlight,
+    arender_tile_once,
+    render_tile_once,
+)
+from rest_framework_mvt.compression import compress, negotiate_encoding
+from rest_framework_mvt.metrics import Stopwatch
 from rest_framework_mvt.renderers import BinaryRenderer
-from rest_framework_mvt.schemas import MVT_SCHEMA
+from rest_framework_mvt.schemas import MVT_BATCH_SCHEMA, MVT_SCHEMA
+from rest_framework_mvt.signals import tile_served
+from rest_framework_mvt.tiles import (
+    MAX_ZOOM,
+    get_zoom_value,
+    parse_tile,
+    tile_units_to_meters,
+    tiles_for_bounds,
+)
 
 
 class BaseMVTView(APIView):
     """
     Base view for serving a model as a Mapbox Vector Tile given X/Y/Z tile constraints.
+
+    Set ``tile_cache`` to a :py:class:`rest_framework_mvt.caches.BaseTileCache` to
+    cache rendered tiles, including empty ones, on the server.
+
+    Tile responses carry a strong ETag and requests with a matching If-None-Match
+    header, compared weakly, are answered with a 304.  The ETag is cached along
+    with the tile, so cached tiles are not hashed again.  Set
+    ``cache_control_max_age`` to a number of seconds, or a dict mapping minimum
+    zoom levels to seconds, to send a Cache-Control header.
+
+    Set ``content_encodings`` to the encodings to offer, e.g., ``("br", "gzip")``, to
+    compress tiles according to the request's Accept-Encoding header.  Tiles are
+    compressed once and cached compressed.  With ``database_compression`` gzip
+    tiles are compressed by Postgres, see :py:meth:`MVTManager.intersect`.
+
+    The following attributes take a single value or a dict mapping minimum zoom
+    levels to values, e.g., ``{0: 8, 10: 2, 14: None}``, to shrink low zoom tiles:
+
+    - ``simplification``: Tolerance in tile units (1/extent of the tile's width)
+      geometries are simplified with using ``simplification_method``
+      ("simplify" for ST_SimplifyPreserveTopology or "snap" for ST_SnapToGrid).
+    - ``min_feature_size``: Lines and polygons with a bounding box diagonal
+      shorter than this many tile units are left out of the tile.
+    - ``tile_columns``: List of the columns included as feature attributes.
+    - ``cluster_size``: Distance in tile units points are clustered within using
+      ``cluster_method`` ("grid" or "dbscan").  Clusters carry a ``point_count``
+      and the ``cluster_aggregates`` attributes, see :py:meth:`MVTManager.intersect`.
+      Clustered tiles can not be keyset paginated.
+
+    ``extent``, ``buffer``, ``clip`` and ``layer_name`` override the settings of
+    the model's MVTManager when they are not None.
+
+    With ``coalesce_requests`` concurrent requests for the same tile, filters and
+    pagination in a process share a single query.  Set ``coalesce_lock_timeout`` to
+    a number of seconds to also render each cached tile in only one process, see
+    :py:func:`rest_framework_mvt.coalescing.render_tile_once`.
+
+    With ``keyset_pagination`` a tile is paged with a ``limit`` and an opaque
+    ``cursor`` instead of an offset.  Features are ordered by primary key and each
+    page starts after the previous page's last feature, so deep pages of dense tiles
+    are as fast as the first one.  The cursor of the next page is sent in the
+    X-Next-Cursor header, which is left out on the last page.  See
+    :py:meth:`MVTManager.intersect_page`.
+
+    Set ``max_features`` and ``max_tile_bytes`` to bound tiles.  A tile exceeding
+    a limit is rendered again with the settings of the next of ``degradations``,
+    dicts overriding any of the zoom level attributes above, e.g., to cluster
+    points, and the last degradation's tile is truncated to ``max_features``.  See
+    :py:meth:`MVTManager.intersect_limited`.  Keyset pages are bounded by their
+    limit instead.
+
+    Tiles of at least ``streaming_min_bytes`` bytes are streamed in chunks from the
+    buffer the database driver returned, with a Content-Length header, instead of
+    being copied into the response, so a request holds about one copy of a large
+    tile.  Set it to None to always send tiles in a DRF response.
+
+    Set ``filter_schema`` to a :py:class:`rest_framework_mvt.filters.FilterSchema`
+    to accept only the declared, indexed filters and lookups.  Other query
+    parameters and invalid values are answered with a 400, and filters are
+    normalized before they reach the tile cache and the tile query.  The schema is
+    compiled by ``as_view()``, so a schema not fitting the model raises a
+    ValueError when the URLconf is loaded.  Without a schema every query parameter
+    is passed to the model's queryset.
     """
 
     model = None
     geom_col = None
+    tile_cache = None
+    cache_control_max_age = None
+    content_encodings = ()
+    database_compression = False
+    simplification = None
+    simplification_method = "simplify"
+    min_feature_size = None
+    tile_columns = None
+    cluster_size = None
+    cluster_method = "grid"
+    cluster_aggregates = None
+    extent = None
+    buffer = None
+    clip = None
+    layer_name = None
+    coalesce_requests = False
+    coalesce_lock_timeout = None
+    keyset_pagination = False
+    filter_schema = None
+    max_features = None
+    max_tile_bytes = None
+    degradations = (
+        {"simplification": 8, "min_feature_size": 8},
+        {"simplification": 32, "min_feature_size": 32},
+    )
+    streaming_min_bytes = 262144
+    tile_content_type = "application/vnd.mapbox-vector-tile"
+    single_flight = SingleFlight()
+    _cache_status = None
     renderer_classes = (BinaryRenderer,)
     schema = MVT_SCHEMA
 
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Raises:
+            ValueError: If the ``filter_schema`` does not fit the model, see
+                        :py:meth:`rest_framework_mvt.filters.FilterSchema.compile`.
+        """
+        filter_schema = initkwargs.get("filter_schema", cls.filter_schema)
+        model = initkwargs.get("model", cls.model)
+        if filter_schema is not None and model is not None:
+            # fail on startup rather than with a 500 on the first filtered request
+            filter_schema.compile(model)
+        return super().as_view(**initkwargs)
+
     # pylint: disable=unused-argument
     def get(self, request, *args, **kwargs):
         """
@@ -24,31 +163,354 @@ class BaseMVTView(APIView):
         Returns:
             :py:class:`rest_framework.response.Response`:  Standard DRF response object
         """
+        stopwatch = Stopwatch()
+        tile_request = self._parse_tile_request(request)
+        if tile_request is None:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        params, limit, offset, encoding = tile_request
+        try:
+            tile = parse_tile(request.query_params.get("tile"))
+            params = self._clean_filters(params)
+            stopwatch.lap("parse")
+            mvt = self._intersect(tile, limit, offset, params, encoding)
+            stopwatch.lap("render")
+        except ValidationError:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        response = self._page_response(request, mvt, tile[0], encoding)
+        stopwatch.lap("response")
+        return self._served(response, tile[0], stopwatch)
+
+    def _parse_tile_request(self, request):
+        """
+        Args:
+            request (:py:class:`rest_framework.request.Request`): Standard DRF request object
+        Returns:
+            tuple:
+            The filters, limit, offset and negotiated content encoding of the
+            request or None if the request has no tile or, with
+            ``keyset_pagination``, an invalid limit or cursor.  With
+            ``keyset_pagination`` the offset is the primary key the cursor decodes
+            to.
+        """
         params = request.GET.dict()
-        if params.pop("tile", None) is not None:
+        if params.pop("tile", None) is None:
+            return None
+        if self.keyset_pagination:
             try:
-                limit, offset = self._validate_paginate(
-                    params.pop("limit", None), params.pop("offset", None)
+                limit, offset = self._validate_cursor(
+                    params.pop("limit", None), params.pop("cursor", None)
                 )
             except ValidationError:
-                limit, offset = None, None
-            bbox = TMSTileFilter().get_filter_bbox(request)
+                return None
+        else:
             try:
-                mvt = self.model.vector_tiles.intersect(
-                    bbox=bbox, limit=limit, offset=offset, filters=params
+                limit, offset = self._validate_paginate(
+                    params.pop("limit", None), params.pop("offset", None)
                 )
-                status = 200 if mvt else 204
             except ValidationError:
-                mvt = b""
-                status = 400
+                limit, offset = None, None
+        return params, limit, offset, self._negotiate_encoding(request)
+
+    def _clean_filters(self, params):
+        """
+        Args:
+            params (dict): Filters of the request.
+        Returns:
+            dict:
+            The filters cleaned by the ``filter_schema`` or as they are without one.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if a filter is not accepted
+                                                        by the ``filter_schema``
+        """
+        if self.filter_schema is None:
+            return params
+        return self.filter_schema.clean(self.model, params)
+
+    def _negotiate_encoding(self, request):
+        if not self.content_encodings:
+            return None
+        return negotiate_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.content_encodings
+        )
+
+    def _page_response(self, request, mvt, zoom, encoding=None):
+        """
+        Returns:
+            :py:class:`rest_framework.response.Response`:
+            The conditional response of the tile packed by :py:func:`_pack_etag`,
+            or with ``keyset_pagination`` of the page, with the next page's cursor
+            in the X-Next-Cursor header.
+        """
+        etag, mvt = _unpack_etag(mvt)
+        if not self.keyset_pagination:
+            return self._conditional_tile_response(request, mvt, zoom, encoding, etag)
+        cursor, mvt = _unpack_page(mvt)
+        response = self._conditional_tile_response(request, mvt, zoom, encoding, etag)
+        if cursor:
+            response["X-Next-Cursor"] = cursor
+        return response
+
+    # pylint: disable=too-many-arguments
+    def _conditional_tile_response(self, request, mvt, zoom, encoding=None, etag=None):
+        """
+        Args:
+            request (:py:class:`rest_framework.request.Request`): Standard DRF request object
+            mvt (bytes): The tile or a memoryview of it.
+            zoom (int): Zoom level of the tile.
+            encoding (str): Content encoding the tile is compressed with.
+            etag (str): ETag of the tile.  The tile is hashed when it is None.
+        Returns:
+            :py:class:`rest_framework.response.Response`:
+            A response with the tile and its validators, or an empty 304 response if
+            the client's copy of the tile is current.
+        """
+        if etag is None:
+            etag = f'"{hashlib.md5(mvt).hexdigest()}"'
+        # If-None-Match uses the weak comparison, e.g., GZipMiddleware weakens the
+        # ETags of the responses it compresses
+        if_none_match = [
+            tag[2:] if tag.startswith("W/") else tag
+            for tag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        ]
+        if etag in if_none_match or "*" in if_none_match:
+            response = self._tile_response(b"", 304)
         else:
-            mvt = b""
-            status = 400
+            response = self._tile_response(mvt, 200 if mvt else 204)
+            if encoding is not None and mvt:
+                response["Content-Encoding"] = encoding
+        if self.content_encodings:
+            patch_vary_headers(response, ["Accept-Encoding"])
+        response["ETag"] = etag
+        max_age = get_zoom_value(self.cache_control_max_age, zoom)
+        if max_age is not None:
+            patch_cache_control(response, public=True, max_age=max_age)
+        return response
+
+    def _served(self, response, zoom, stopwatch):
+        """
+        Reports a tile response to :py:data:`rest_framework_mvt.signals.tile_served`
+        receivers.
+
+        Returns:
+            :py:class:`rest_framework.response.Response`:
+            The response.
+        """
+        if tile_served.has_listeners(type(self)):
+            tile_served.send(
+                sender=type(self),
+                layer=self._get_layer_key(),
+                zoom=zoom,
+                status=response.status_code,
+                size=_get_response_size(response),
+                cache=self._cache_status,
+                timings=stopwatch.total(),
+            )
+        return response
+
+    def _tile_response(self, mvt, status):
+        """
+        Returns:
+            :py:class:`rest_framework.response.Response` or
+            :py:class:`django.http.StreamingHttpResponse`:
+            A response with the tile, streamed if it has at least
+            ``streaming_min_bytes`` bytes.
+        """
+        if self.streaming_min_bytes is not None and len(mvt) >= max(
+            self.streaming_min_bytes, 1
+        ):
+            response = StreamingHttpResponse(
+                self._iter_chunks(memoryview(mvt)),
+                content_type=self.tile_content_type,
+                status=status,
+            )
+            response["Content-Length"] = str(len(mvt))
+            return response
+        return Response(mvt, content_type=self.tile_content_type, status=status)
+
+    @staticmethod
+    def _iter_chunks(mvt):
+        # slices of a memoryview share its buffer, so only one chunk is copied at a time
+        for start in range(0, len(mvt), _STREAMING_CHUNK_SIZE):
+            yield mvt[start : start + _STREAMING_CHUNK_SIZE]
+
+    # pylint: disable=too-many-arguments
+    def _intersect(self, tile, limit, offset, filters, encoding=None):
+        """
+        Retrieves the tile from the tile cache when one is configured and falls back
+        to querying the model's MVTManager.  Concurrent identical queries are
+        coalesced with ``coalesce_requests``.
+
+        Args:
+            tile (tuple): The z, x and y of the tile.
+            limit (int): Number of entries to include in the tile.
+            offset (int): Index to start collecting entries from or, with
+                          ``keyset_pagination``, the primary key to start after.
+            filters (dict): The keys represent column names and the values represent
+                            column values to filter on.
+            encoding (str): Content encoding to compress the tile with.
+        Returns:
+            bytes:
+            Bytes representing a Google Protobuf encoded Mapbox Vector Tile, packed
+            with its ETag by :py:func:`_pack_etag`.  With ``keyset_pagination`` the
+            tile is also prefixed with the next page's cursor, so the cursor is
+            cached and coalesced along with the tile.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if the tile or filters are invalid
+        """
+        z, x, y = tile
+        layer = self._get_layer_key()
+        variant = self._get_variant(
+            filters, limit, offset, encoding, self._get_render_options(z, None)
+        )
+        self._cache_status = None
+        generation = None
+        if self.tile_cache is not None:
+            mvt, generation = self._get_cached_tile(layer, z, x, y, variant)
+            self._cache_status = "miss" if mvt is None else "hit"
+            if mvt is not None:
+                return mvt
+
+        def render():
+            if self.tile_cache is None:
+                return self._render(tile, limit, offset, filters, encoding)
+            if self.coalesce_lock_timeout is not None:
+                return render_tile_once(
+                    self.tile_cache,
+                    layer,
+                    z,
+                    x,
+                    y,
+                    variant,
+                    lambda: self._render(tile, limit, offset, filters, encoding),
+                    self.coalesce_lock_timeout,
+                    generation,
+                )
+            mvt = self._render(tile, limit, offset, filters, encoding)
+            self.tile_cache.set_tile(layer, z, x, y, mvt, variant, generation)
+            return mvt
 
-        return Response(
-            bytes(mvt), content_type="application/vnd.mapbox-vector-tile", status=status
+        if not self.coalesce_requests:
+            return render()
+        return self.single_flight.do((layer, z, x, y, variant), render)
+
+    # pylint: disable=too-many-arguments
+    def _get_cached_tile(self, layer, z, x, y, variant):
+        # the generation is captured before rendering, so a tile rendered from data
+        # changed in the meantime is not cached
+        generation = self.tile_cache.get_generation(layer, z, x, y)
+        return self.tile_cache.get_tile(layer, z, x, y, variant, generation), generation
+
+    # pylint: disable=too-many-arguments
+    def _get_variant(self, filters, limit, offset, encoding, options=None):
+        if self.keyset_pagination:
+            # pages are never mixed up with offset tiles of the same model
+            offset = ("after", offset)
+        tile_cache = self.tile_cache or BaseTileCache
+        variant = tile_cache.make_variant(filters, limit, offset, options)
+        return variant if encoding is None else f"{variant}.{encoding}"
+
+    # pylint: disable=too-many-arguments
+    def _render(self, tile, limit, offset, filters, encoding):
+        options = self._get_render_options(tile[0], encoding)
+        if not self.keyset_pagination:
+            mvt = self._query_tile(tile, limit, offset, filters, options)
+            return _pack_etag(mvt if options.get("gzip") else compress(mvt, encoding))
+        mvt, after = self._query_page(tile, limit, offset, filters, options)
+        mvt = mvt if options.get("gzip") else compress(mvt, encoding)
+        return _pack_etag(_pack_page(after, mvt))
+
+    def _get_render_options(self, zoom, encoding):
+        options = self._get_intersect_options(zoom)
+        if encoding == "gzip" and self.database_compression:
+            options["gzip"] = True
+        limited = self.max_features is not None or self.max_tile_bytes is not None
+        if limited and not self.keyset_pagination:
+            options["max_features"] = self.max_features
+            options["max_bytes"] = self.max_tile_bytes
+            options["fallbacks"] = [
+                self._get_intersect_options(zoom, **degradation)
+                for degradation in self.degradations
+            ]
+        return options
+
+    # pylint: disable=too-many-arguments
+    def _query_tile(self, tile, limit, offset, filters, options):
+        if "fallbacks" in options:
+            return self.model.vector_tiles.intersect_limited(
+                tile=tile, limit=limit, offset=offset, filters=filters, **options
+            )
+        return self.model.vector_tiles.intersect(
+            tile=tile, limit=limit, offset=offset, filters=filters, **options
+        )
+
+    # pylint: disable=too-many-arguments
+    def _query_page(self, tile, limit, after, filters, options):
+        return self.model.vector_tiles.intersect_page(
+            tile=tile, limit=limit, after=after, filters=filters, **options
         )
 
+    def _get_layer_key(self):
+        return get_layer_key(self.model, self.model.vector_tiles.geo_col)
+
+    def _get_extent(self):
+        return self.model.vector_tiles.extent
+
+    def _get_intersect_options(self, zoom, **overrides):
+        """
+        Args:
+            zoom (int): Zoom level of the tile.
+            overrides: Values replacing the view's attributes of the same name,
+                       e.g., one of ``degradations``.
+        Returns:
+            dict:
+            Keyword arguments of :py:meth:`MVTManager.intersect` for the zoom level,
+            the view's tile format and the zoom level's simplification, minimum
+            feature size, columns and clustering.
+        """
+        settings = dict(
+            {
+                name: getattr(self, name)
+                for name in (
+                    "extent",
+                    "buffer",
+                    "clip",
+                    "layer_name",
+                    "simplification",
+                    "simplification_method",
+                    "min_feature_size",
+                    "tile_columns",
+                    "cluster_size",
+                    "cluster_method",
+                    "cluster_aggregates",
+                )
+            },
+            **overrides,
+        )
+        options = {
+            name: settings[name]
+            for name in ("extent", "buffer", "clip", "layer_name")
+            if settings[name] is not None
+        }
+        options["zoom"] = zoom
+        extent = options.get("extent", self._get_extent())
+        simplify = get_zoom_value(settings["simplification"], zoom)
+        if simplify:
+            options["simplify"] = tile_units_to_meters(simplify, zoom, extent)
+            options["simplify_method"] = settings["simplification_method"]
+        min_size = get_zoom_value(settings["min_feature_size"], zoom)
+        if min_size:
+            options["min_size"] = tile_units_to_meters(min_size, zoom, extent)
+        columns = get_zoom_value(settings["tile_columns"], zoom)
+        if columns is not None:
+            options["columns"] = columns
+        cluster = get_zoom_value(settings["cluster_size"], zoom)
+        if cluster:
+            options["cluster"] = tile_units_to_meters(cluster, zoom, extent)
+            options["cluster_method"] = settings["cluster_method"]
+            if settings["cluster_aggregates"] is not None:
+                options["cluster_aggregates"] = settings["cluster_aggregates"]
+        return options
+
     @staticmethod
     def _validate_paginate(limit, offset):
         """
@@ -74,8 +536,465 @@ class BaseMVTView(APIView):
 
         return limit, offset
 
+    def _validate_cursor(self, limit, cursor):
+        """
+        Args:
+            limit (str): A string representing the size of the page.
+            cursor (str): The cursor of the page as sent in the X-Next-Cursor header.
+        Returns:
+            tuple:
+            A tuple of length two.  The first element is an integer representing
+            the limit or None.  The second element is the primary key the page
+            starts after, converted by the model's primary key field, or None for
+            the first page.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if the limit is not a
+                                                        positive integer or the
+                                                        cursor is malformed
+        """
+        try:
+            limit = None if limit is None else int(limit)
+            if cursor is not None:
+                cursor = base64.b64decode(
+                    cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True
+                ).decode()
+                cursor = self.model._meta.pk.to_python(cursor)
+        except (ValueError, TypeError, binascii.Error, DjangoValidationError) as error:
+            raise ValidationError(
+                "Query param validation error: " + str(error)
+            ) from error
+        if limit is not None and limit <= 0:
+            raise ValidationError(
+                "Query param validation error: limit must be positive"
+            )
+        return limit, cursor
+
+
+def _pack_page(after, mvt):
+    """
+    Prefixes a page's tile with its length-prefixed next cursor.
+    """
+    cursor = b""
+    if after is not None:
+        cursor = base64.urlsafe_b64encode(str(after).encode()).rstrip(b"=")
+    return len(cursor).to_bytes(2, "big") + cursor + bytes(mvt)
+
 
-def mvt_view_factory(model_class, geom_col="geom"):
+def _unpack_page(page):
+    """
+    Returns:
+        tuple:
+        The next cursor of a page packed by :py:func:`_pack_page`, or an empty
+        string for the last page, and a memoryview of the tile.
+    """
+    page = memoryview(page)
+    length = int.from_bytes(page[:2], "big")
+    return bytes(page[2 : 2 + length]).decode(), page[2 + length :]
+
+
+def _pack_etag(mvt):
+    """
+    Prefixes a tile with the MD5 digest of its ETag.
+    """
+    return hashlib.md5(mvt).digest() + mvt
+
+
+def _unpack_etag(packed):
+    """
+    Returns:
+        tuple:
+        The ETag of a tile packed by :py:func:`_pack_etag` and a memoryview of the
+        tile.
+    """
+    packed = memoryview(packed)
+    return f'"{packed[:_DIGEST_SIZE].hex()}"', packed[_DIGEST_SIZE:]
+
+
+def _pack_tiles(tiles, mvts):
+    """
+    Returns:
+        bytes:
+        The body of a :py:class:`BatchMVTView` response.
+    """
+    return b"".join(
+        itertools.chain.from_iterable(
+            (_BATCH_HEADER.pack(*tile, len(mvt)), mvt) for tile, mvt in zip(tiles, mvts)
+        )
+    )
+
+
+def unpack_tiles(body):
+    """
+    Args:
+        body (bytes): The uncompressed body of a :py:class:`BatchMVTView` response.
+    Returns:
+        list:
+        A (z, x, y, tile) tuple per tile of the response.
+    """
+    tiles, position = [], 0
+    while position < len(body):
+        z, x, y, length = _BATCH_HEADER.unpack_from(body, position)
+        position += _BATCH_HEADER.size
+        tiles.append((z, x, y, bytes(body[position : position + length])))
+        position += length
+    return tiles
+
+
+def _get_response_size(response):
+    if response.streaming:
+        return int(response["Content-Length"])
+    return len(response.data or b"")
+
+
+_STREAMING_CHUNK_SIZE = 65536
+_BATCH_HEADER = struct.Struct(">BIII")
+_GZIP_MAGIC = b"\x1f\x8b"
+_DIGEST_SIZE = hashlib.md5().digest_size
+
+
+class AsyncMVTView(BaseMVTView):
+    """
+    Async counterpart of :py:class:`BaseMVTView` for ASGI servers.  Tiles are
+    queried with :py:meth:`MVTManager.aintersect`, so a worker is not blocked while
+    Postgres renders a tile.  Give the model's MVTManager an ``async_pool`` to run
+    many tile queries concurrently.
+
+    Authentication, permission and throttle checks as well as the tile cache run
+    through ``sync_to_async``.  Large tiles are streamed with an async iterator on
+    Django 4.2 and later.
+    """
+
+    # Django runs views with an async dispatch as coroutines and, like APIView,
+    # dispatch stores the request state on the view instance
+    # pylint: disable=invalid-overridden-method,attribute-defined-outside-init
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Async version of :py:meth:`rest_framework.views.APIView.dispatch`.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            method = request.method.lower()
+            handler = self.http_method_not_allowed
+            if method in self.http_method_names:
+                handler = getattr(self, method, self.http_method_not_allowed)
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:  # pylint: disable=broad-except
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    # pylint: disable=invalid-overridden-method,unused-argument
+    async def get(self, request, *args, **kwargs):
+        """
+        Args:
+            request (:py:class:`rest_framework.request.Request`): Standard DRF request object
+        Returns:
+            :py:class:`rest_framework.response.Response`:  Standard DRF response object
+        """
+        stopwatch = Stopwatch()
+        tile_request = self._parse_tile_request(request)
+        if tile_request is None:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        params, limit, offset, encoding = tile_request
+        try:
+            tile = parse_tile(request.query_params.get("tile"))
+            params = self._clean_filters(params)
+            stopwatch.lap("parse")
+            mvt = await self._aintersect(tile, limit, offset, params, encoding)
+            stopwatch.lap("render")
+        except ValidationError:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        response = self._page_response(request, mvt, tile[0], encoding)
+        stopwatch.lap("response")
+        return self._served(response, tile[0], stopwatch)
+
+    # pylint: disable=too-many-arguments
+    async def _aintersect(self, tile, limit, offset, filters, encoding=None):
+        """
+        Async version of :py:meth:`BaseMVTView._intersect`.
+        """
+        z, x, y = tile
+        layer = self._get_layer_key()
+        variant = self._get_variant(
+            filters, limit, offset, encoding, self._get_render_options(z, None)
+        )
+        self._cache_status = None
+        generation = None
+        if self.tile_cache is not None:
+            mvt, generation = await sync_to_async(self._get_cached_tile)(
+                layer, z, x, y, variant
+            )
+            self._cache_status = "miss" if mvt is None else "hit"
+            if mvt is not None:
+                return mvt
+
+        async def render():
+            if self.tile_cache is None:
+                return await self._arender(tile, limit, offset, filters, encoding)
+            if self.coalesce_lock_timeout is not None:
+                return await arender_tile_once(
+                    self.tile_cache,
+                    layer,
+                    z,
+                    x,
+                    y,
+                    variant,
+                    lambda: self._arender(tile, limit, offset, filters, encoding),
+                    self.coalesce_lock_timeout,
+                    generation,
+                )
+            mvt = await self._arender(tile, limit, offset, filters, encoding)
+            await sync_to_async(self.tile_cache.set_tile)(
+                layer, z, x, y, mvt, variant, generation
+            )
+            return mvt
+
+        if not self.coalesce_requests:
+            return await render()
+        return await self.single_flight.ado((layer, z, x, y, variant), render)
+
+    @staticmethod
+    def _iter_chunks(mvt):
+        if django.VERSION < (4, 2):
+            # StreamingHttpResponse only accepts async iterators since Django 4.2
+            return BaseMVTView._iter_chunks(mvt)
+
+        async def iter_chunks():
+            # ASGI handlers buffer synchronous iterators of streaming responses
+            for chunk in BaseMVTView._iter_chunks(mvt):
+                yield chunk
+
+        return iter_chunks()
+
+    # pylint: disable=too-many-arguments
+    async def _arender(self, tile, limit, offset, filters, encoding):
+        options = self._get_render_options(tile[0], encoding)
+        if not self.keyset_pagination:
+            manager = self.model.vector_tiles
+            aintersect = (
+                manager.aintersect_limited
+                if "fallbacks" in options
+                else manager.aintersect
+            )
+            mvt = await aintersect(
+                tile=tile, limit=limit, offset=offset, filters=filters, **options
+            )
+            return _pack_etag(mvt if options.get("gzip") else compress(mvt, encoding))
+        mvt, after = await self.model.vector_tiles.aintersect_page(
+            tile=tile, limit=limit, after=offset, filters=filters, **options
+        )
+        mvt = mvt if options.get("gzip") else compress(mvt, encoding)
+        return _pack_etag(_pack_page(after, mvt))
+
+
+class BatchMVTView(BaseMVTView):
+    """
+    Serves many tiles of a model in one response, e.g., for clients fetching every
+    tile of their viewport or syncing an area for offline use.  Tiles are requested
+    as a comma separated ``tiles`` list of z/x/y addresses or as every tile of a
+    ``zoom`` level intersecting a ``bbox`` of west, south, east and north edges in
+    EPSG:4326, along with the usual filters, ``limit`` and ``offset``.  At most
+    ``max_batch_tiles`` tiles are served per request.
+
+    Tiles missing from the tile cache are rendered in a single query per zoom
+    level, see :py:meth:`MVTManager.intersect_tiles`, and cached like the tiles
+    of a :py:class:`BaseMVTView`.  The response body is compressed as a whole with
+    the negotiated content encoding.  Keyset pagination and tile limits do not
+    apply to batches.
+
+    The body holds each tile prefixed with a header of its zoom level (unsigned
+    byte), column, row and length in bytes (unsigned 32 bit integers), all big
+    endian, see :py:func:`unpack_tiles`.
+    """
+
+    max_batch_tiles = 64
+    tile_content_type = "application/vnd.mapbox-vector-tile-batch"
+    schema = MVT_BATCH_SCHEMA
+
+    # pylint: disable=unused-argument
+    def get(self, request, *args, **kwargs):
+        """
+        Args:
+            request (:py:class:`rest_framework.request.Request`): Standard DRF request object
+        Returns:
+            :py:class:`rest_framework.response.Response`:  Standard DRF response object
+        """
+        stopwatch = Stopwatch()
+        params = request.GET.dict()
+        try:
+            tiles = self._parse_tiles(params)
+        except ValidationError:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        try:
+            limit, offset = self._validate_paginate(
+                params.pop("limit", None), params.pop("offset", None)
+            )
+        except ValidationError:
+            limit, offset = None, None
+        encoding = self._negotiate_encoding(request)
+        stopwatch.lap("parse")
+        try:
+            params = self._clean_filters(params)
+            mvts = self._intersect_tiles(tiles, limit, offset, params)
+        except ValidationError:
+            return self._served(self._tile_response(b"", 400), None, stopwatch)
+        stopwatch.lap("render")
+        body = compress(_pack_tiles(tiles, mvts), encoding)
+        zoom = min(z for z, _, _ in tiles)
+        response = self._conditional_tile_response(request, body, zoom, encoding)
+        stopwatch.lap("response")
+        return self._served(response, zoom, stopwatch)
+
+    def _parse_tiles(self, params):
+        """
+        Args:
+            params (dict): Query parameters of the request.  The tile parameters are
+                           removed.
+        Returns:
+            list:
+            The distinct z/x/y tuples of the requested tiles.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if the tiles are invalid,
+                                                        missing or too many
+        """
+        tiles = params.pop("tiles", None)
+        zoom, bbox = params.pop("zoom", None), params.pop("bbox", None)
+        if tiles is not None:
+            tiles = [parse_tile(tile) for tile in tiles.split(",") if tile]
+        elif zoom is not None and bbox is not None:
+            try:
+                zoom = int(zoom)
+                west, south, east, north = (float(edge) for edge in bbox.split(","))
+            except ValueError as value_error:
+                raise ValidationError("Invalid zoom or bbox") from value_error
+            if not 0 <= zoom <= MAX_ZOOM:
+                raise ValidationError(f"Invalid zoom: {zoom}")
+            tiles = list(
+                itertools.islice(
+                    tiles_for_bounds(west, south, east, north, zoom),
+                    self.max_batch_tiles + 1,
+                )
+            )
+        else:
+            raise ValidationError("Either tiles or zoom and bbox are required")
+        tiles = list(dict.fromkeys(tiles))
+        if not tiles or len(tiles) > self.max_batch_tiles:
+            raise ValidationError(
+                f"Between 1 and {self.max_batch_tiles} tiles can be requested"
+            )
+        return tiles
+
+    def _intersect_tiles(self, tiles, limit, offset, filters):
+        """
+        Returns:
+            list:
+            The tiles from the tile cache or rendered in a query per zoom level, in
+            the order of ``tiles``.
+        Raises:
+            `rest_framework.serializers.ValidationError`: if the filters are invalid
+        """
+        layer = self._get_layer_key()
+        options, variants = {}, {}
+        for zoom in {z for z, _, _ in tiles}:
+            options[zoom] = self._get_intersect_options(zoom)
+            variants[zoom] = self._get_variant(
+                filters, limit, offset, None, options[zoom]
+            )
+        mvts, generations = self._get_cached_tiles(layer, tiles, variants)
+        missing = [tile for tile in tiles if tile not in mvts]
+        for zoom in sorted({z for z, _, _ in missing}):
+            group = [tile for tile in missing if tile[0] == zoom]
+            for tile, mvt in zip(
+                group,
+                self.model.vector_tiles.intersect_tiles(
+                    group,
+                    limit=-1 if limit is None else limit,
+                    offset=0 if offset is None else offset,
+                    filters=filters,
+                    **options[zoom],
+                ),
+            ):
+                mvts[tile] = mvt
+                if self.tile_cache is not None:
+                    # cached like the tiles of BaseMVTView, which share the variants
+                    self.tile_cache.set_tile(
+                        layer, *tile, _pack_etag(mvt), variants[zoom], generations[tile]
+                    )
+        return [mvts[tile] for tile in tiles]
+
+    def _get_cached_tiles(self, layer, tiles, variants):
+        """
+        Returns:
+            tuple:
+            The tiles found in the tile cache and the generation of every tile's
+            slot, captured before the missing tiles are rendered.
+        """
+        mvts, generations = {}, {}
+        self._cache_status = None
+        if self.tile_cache is None:
+            return mvts, generations
+        for tile in tiles:
+            mvt, generations[tile] = self._get_cached_tile(
+                layer, *tile, variants[tile[0]]
+            )
+            if mvt is not None:
+                mvts[tile] = _unpack_etag(mvt)[1]
+        self._cache_status = "hit" if len(mvts) == len(tiles) else "miss"
+        return mvts, generations
+
+
+class ArchiveMVTView(BaseMVTView):
+    """
+    Serves tiles from an MBTiles or PMTiles archive, see
+    :py:mod:`rest_framework_mvt.archives`, instead of querying Postgres, e.g., for
+    static reference layers.  Set ``archive`` to a reader returned by
+    :py:func:`rest_framework_mvt.archives.open_archive`.
+
+    Gzip compressed tiles, recognized by their magic bytes, are sent as they are
+    to clients accepting gzip.  Tiles missing from the archive are empty.  Filters
+    are not supported.
+    """
+
+    archive = None
+    content_encodings = ("gzip",)
+
+    def _get_layer_key(self):
+        # archived tiles belong to no model, so they are reported by file name
+        return os.path.basename(self.archive.path)
+
+    # pylint: disable=too-many-arguments
+    def _intersect(self, tile, limit, offset, filters, encoding=None):
+        if filters:
+            raise ValidationError("Archived tiles can not be filtered")
+        mvt = self.archive.get_tile(*tile)
+        if mvt is None:
+            return _pack_etag(b"")
+        # archives of other tools may hold uncompressed tiles
+        compression = "gzip" if mvt[:2] == _GZIP_MAGIC else None
+        if encoding == compression:
+            return _pack_etag(mvt)
+        if compression == "gzip":
+            mvt = gzip.decompress(mvt)
+        return _pack_etag(compress(mvt, encoding))
+
+
+# pylint: disable=too-many-arguments
+def mvt_view_factory(
+    model_class,
+    geom_col="geom",
+    tile_cache=None,
+    cache_control_max_age=None,
+    content_encodings=(),
+    database_compression=False,
+    asynchronous=False,
+):
     """
     Creates an MVTView that serves Mapbox Vector Tiles for the
     given model and geom column.
@@ -84,6 +1003,17 @@ def mvt_view_factory(model_class, geom_col="geom"):
         model_class (:py:class:`django.contrib.gis.db.models.Model`): A GeoDjango model
         geom_col (str): A string representing the column name containing
                         PostGIS geometry types.
+        tile_cache (:py:class:`rest_framework_mvt.caches.BaseTileCache`): Cache to
+                        store rendered tiles in.  The default is None (no caching).
+        cache_control_max_age (int, dict): Seconds clients may cache tiles for, or a
+                        dict mapping minimum zoom levels to seconds.  The default is
+                        None (no Cache-Control header).
+        content_encodings (tuple): Content encodings to compress tiles with, e.g.,
+                        ``("br", "gzip")``.  The default is no compression.
+        database_compression (bool): Compress gzip tiles in Postgres.  The default
+                        is False.
+        asynchronous (bool): Create an :py:class:`AsyncMVTView` for ASGI servers.
+                        The default is False.
     Returns:
         :py:class:`rest_framework_mvt.views.MVTView`:
         A subclass of :py:class:`rest_framework_mvt.views.MVTView` with its geom_col
@@ -91,6 +1021,55 @@ def mvt_view_factory(model_class, geom_col="geom"):
     """
     return type(
         f"{model_class.__name__}MVTView",
-        (BaseMVTView,),
-        {"model": model_class, "geom_col": geom_col},
+        (AsyncMVTView if asynchronous else BaseMVTView,),
+        {
+            "model": model_class,
+            "geom_col": geom_col,
+            "tile_cache": tile_cache,
+            "cache_control_max_age": cache_control_max_age,
+            "content_encodings": content_encodings,
+            "database_compression": database_compression,
+        },
+    ).as_view()
+
+
+def batch_mvt_view_factory(model_class, **kwargs):
+    """
+    Creates a :py:class:`BatchMVTView` that serves many tiles of a model per
+    request.
+
+    Args:
+        model_class (:py:class:`django.contrib.gis.db.models.Model`): A GeoDjango model
+        kwargs: Any attribute of :py:class:`BatchMVTView`, e.g., ``tile_cache`` or
+                ``max_batch_tiles``.
+    Returns:
+        :py:class:`rest_framework_mvt.views.BatchMVTView`:
+        A subclass of :py:class:`rest_framework_mvt.views.BatchMVTView` serving the
+        model.
+    """
+    return type(
+        f"{model_class.__name__}BatchMVTView",
+        (BatchMVTView,),
+        {"model": model_class, **kwargs},
+    ).as_view()
+
+
+def archive_view_factory(path, cache_control_max_age=None):
+    """
+    Creates an MVTView that serves tiles from an MBTiles or PMTiles archive.
+
+    Args:
+        path (str): Path of the .mbtiles or .pmtiles archive.
+        cache_control_max_age (int, dict): Seconds clients may cache tiles for, or a
+                        dict mapping minimum zoom levels to seconds.  The default is
+                        None (no Cache-Control header).
+    Returns:
+        :py:class:`rest_framework_mvt.views.ArchiveMVTView`:
+        A subclass of :py:class:`rest_framework_mvt.views.ArchiveMVTView` serving
+        the archive.
+    """
+    return type(
+        "ArchiveMVTView",
+        (ArchiveMVTView,),
+        {"archive": open_archive(path), "cache_control_max_age": cache_control_max_age},
     ).as_view()
@@ -31,7 +31,7 @@ setup(
     include_package_data=True,
     install_requires=[
         "coreapi>=2.3",
-        "django>=2.2.9",
+        "django>=4.1",
         "djangorestframework>=3.9",
         "djangorestframework-gis>=0.14",
         "django-filter>=2.1.0",
@@ -41,17 +41,22 @@ setup(
     long_description_content_type="text/markdown",
     name="djangorestframework-mvt",
     packages=find_packages(include=["rest_framework_mvt*"]),
+    python_requires=">=3.8",
     extras_require={
+        "async": ["psycopg[pool]>=3.1"],
+        "brotli": ["brotli"],
         "dev": [
             "black",
             "coveralls",
             "mock",
+            "pmtiles",
             "pylint",
             "pytest",
+            "pytest-benchmark",
             "pytest-cov",
             "sphinx",
             "sphinx_rtd_theme",
-        ]
+        ],
     },
     url="https://github.com/corteva/djangorestframework-mvt",
     version=VERSION,
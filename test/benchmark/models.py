@@ -0,0 +1,58 @@
+from django.contrib.gis.db import models
+from rest_framework_mvt.managers import MVTManager
+
+
+class BenchmarkPoint(models.Model):
+    name = models.CharField(max_length=64)
+    category = models.IntegerField()
+    geom = models.PointField(srid=4326)
+
+    objects = models.Manager()
+    vector_tiles = MVTManager(source_name="benchmark")
+
+    class Meta:
+        app_label = "benchmark"
+        db_table = "mvt_benchmark_point"
+        managed = False
+
+
+class SyntheticPoint(models.Model):
+    name = models.CharField(max_length=64)
+    category = models.IntegerField()
+    geom = models.PointField(srid=4326)
+
+    objects = models.Manager()
+    vector_tiles = MVTManager(source_name="benchmark")
+
+    class Meta:
+        app_label = "benchmark"
+        db_table = "mvt_synthetic_point"
+        managed = False
+
+
+class SyntheticLine(models.Model):
+    name = models.CharField(max_length=64)
+    category = models.IntegerField()
+    geom = models.LineStringField(srid=4326)
+
+    objects = models.Manager()
+    vector_tiles = MVTManager(source_name="benchmark")
+
+    class Meta:
+        app_label = "benchmark"
+        db_table = "mvt_synthetic_line"
+        managed = False
+
+
+class SyntheticPolygon(models.Model):
+    name = models.CharField(max_length=64)
+    category = models.IntegerField()
+    geom = models.PolygonField(srid=4326)
+
+    objects = models.Manager()
+    vector_tiles = MVTManager(source_name="benchmark")
+
+    class Meta:
+        app_label = "benchmark"
+        db_table = "mvt_synthetic_polygon"
+        managed = False
@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+import pytest
+
+from rest_framework_mvt.tiles import tile_bounds, tiles_for_bounds
+from test.benchmark.conftest import BENCHMARK_BOUNDS
+
+WORKERS = 16
+TILES_PER_ROUND = 256
+
+
+@pytest.fixture(scope="module")
+def bboxes():
+    tiles = itertools.cycle(tiles_for_bounds(*BENCHMARK_BOUNDS, 12))
+    return [
+        Polygon.from_bbox(tile_bounds(*tile))
+        for tile in itertools.islice(tiles, TILES_PER_ROUND)
+    ]
+
+
+def test_intersect_throughput__threads(benchmark, benchmark_points, bboxes):
+    benchmark.group = f"{TILES_PER_ROUND} z12 tiles, {WORKERS} workers"
+    manager = benchmark_points.vector_tiles
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        benchmark.pedantic(
+            lambda: list(
+                executor.map(lambda bbox: manager.intersect(bbox=bbox), bboxes)
+            ),
+            rounds=5,
+            warmup_rounds=1,
+        )
+
+
+def test_intersect_throughput__async(benchmark, benchmark_points, bboxes):
+    psycopg_pool = pytest.importorskip("psycopg_pool")
+    # pylint: disable=import-outside-toplevel
+    from psycopg.conninfo import make_conninfo
+
+    benchmark.group = f"{TILES_PER_ROUND} z12 tiles, {WORKERS} workers"
+    database = settings.DATABASES["benchmark"]
+    conninfo = make_conninfo(
+        host=database["HOST"],
+        port=database["PORT"],
+        dbname=database["NAME"],
+        user=database["USER"],
+        password=database["PASSWORD"],
+    )
+    manager = benchmark_points.vector_tiles
+    loop = asyncio.new_event_loop()
+    pool = psycopg_pool.AsyncConnectionPool(
+        conninfo, min_size=WORKERS, max_size=WORKERS, open=False
+    )
+    loop.run_until_complete(pool.open(wait=True))
+
+    async def render_tiles():
+        return await asyncio.gather(*(manager.aintersect(bbox=bbox) for bbox in bboxes))
+
+    manager.async_pool = pool
+    try:
+        benchmark.pedantic(
+            lambda: loop.run_until_complete(render_tiles()), rounds=5, warmup_rounds=1
+        )
+    finally:
+        manager.async_pool = None
+        loop.run_until_complete(pool.close())
+        loop.close()
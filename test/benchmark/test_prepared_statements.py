@@ -0,0 +1,24 @@
+import itertools
+
+from django.contrib.gis.geos import Polygon
+import pytest
+
+from rest_framework_mvt.tiles import tile_bounds, tiles_for_bounds
+from test.benchmark.conftest import BENCHMARK_BOUNDS
+
+
+@pytest.mark.parametrize("prepared", [False, True], ids=["planned", "prepared"])
+def test_intersect_latency__prepared_statements(benchmark, benchmark_points, prepared):
+    benchmark.group = "prepared statements, z12 tiles"
+    manager = benchmark_points.vector_tiles
+    bboxes = itertools.cycle(
+        [
+            Polygon.from_bbox(tile_bounds(*tile))
+            for tile in tiles_for_bounds(*BENCHMARK_BOUNDS, 12)
+        ]
+    )
+    manager.prepared = prepared
+    try:
+        benchmark(lambda: manager.intersect(bbox=next(bboxes)))
+    finally:
+        manager.prepared = False
@@ -0,0 +1,66 @@
+import itertools
+import statistics
+
+from django.contrib.gis.geos import Polygon
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_mvt.tiles import tile_bounds, tiles_for_bounds
+from rest_framework_mvt.views import BaseMVTView
+from test.benchmark.conftest import BENCHMARK_BOUNDS, BENCHMARK_ZOOMS
+
+
+def _cycle_tiles(zoom):
+    return itertools.cycle(tiles_for_bounds(*BENCHMARK_BOUNDS, zoom))
+
+
+def _record_sizes(benchmark, sizes):
+    benchmark.extra_info["tiles"] = len(sizes)
+    benchmark.extra_info["mean_bytes"] = statistics.mean(sizes)
+    benchmark.extra_info["max_bytes"] = max(sizes)
+
+
+@pytest.mark.parametrize("envelope", ["bbox", "tile"])
+@pytest.mark.parametrize("zoom", BENCHMARK_ZOOMS)
+def test_intersect_latency(benchmark, synthetic_dataset, zoom, envelope):
+    model, dataset = synthetic_dataset
+    benchmark.group = f"intersect {dataset} z{zoom}"
+    manager = model.vector_tiles
+    tiles = _cycle_tiles(zoom)
+    sizes = []
+
+    def render():
+        tile = next(tiles)
+        if envelope == "tile":
+            mvt = manager.intersect(tile=tile)
+        else:
+            mvt = manager.intersect(
+                bbox=Polygon.from_bbox(tile_bounds(*tile)), zoom=zoom
+            )
+        sizes.append(len(mvt))
+
+    benchmark(render)
+    _record_sizes(benchmark, sizes)
+
+
+@pytest.mark.parametrize("zoom", BENCHMARK_ZOOMS)
+def test_view_latency(benchmark, synthetic_dataset, zoom):
+    model, dataset = synthetic_dataset
+    benchmark.group = f"view {dataset}"
+    view = type("SyntheticMVTView", (BaseMVTView,), {"model": model}).as_view()
+    factory = APIRequestFactory()
+    tiles = _cycle_tiles(zoom)
+    sizes = []
+
+    def serve():
+        request = factory.get("/", {"tile": "{}/{}/{}".format(*next(tiles))})
+        response = view(request)
+        assert response.status_code in (200, 204)
+        if response.streaming:
+            # tiles of at least streaming_min_bytes are streamed
+            sizes.append(sum(len(chunk) for chunk in response.streaming_content))
+        else:
+            sizes.append(len(response.render().content))
+
+    benchmark(serve)
+    _record_sizes(benchmark, sizes)
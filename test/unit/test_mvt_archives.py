@@ -0,0 +1,112 @@
+import gzip
+
+import pytest
+
+from rest_framework_mvt.archives import (
+    MBTilesReader,
+    PMTilesReader,
+    PMTilesWriter,
+    create_archive,
+    open_archive,
+    zxy_to_tile_id,
+)
+
+
+@pytest.fixture(params=["mbtiles", "pmtiles"])
+def archive_path(request, tmp_path):
+    return str(tmp_path / f"layer.{request.param}")
+
+
+def test_zxy_to_tile_id():
+    assert [
+        zxy_to_tile_id(*tile)
+        for tile in [(0, 0, 0), (1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 1, 0), (2, 0, 0)]
+    ] == [0, 1, 2, 3, 4, 5]
+    assert zxy_to_tile_id(3, 7, 0) == 84
+
+
+def test_archive__round_trip(archive_path):
+    with create_archive(archive_path, layer_names=["roads"]) as writer:
+        writer.add_tile(0, 0, 0, b"world")
+        writer.add_tile(2, 1, 3, b"south")
+        writer.add_tile(2, 2, 0, b"")
+
+    archive = open_archive(archive_path)
+
+    assert gzip.decompress(archive.get_tile(0, 0, 0)) == b"world"
+    assert gzip.decompress(archive.get_tile(2, 1, 3)) == b"south"
+    assert archive.get_tile(2, 1, 0) is None
+    assert archive.get_tile(2, 2, 0) is None
+    assert archive.get_tile(5, 0, 0) is None
+    metadata = archive.get_metadata()
+    assert metadata["name"] == "layer"
+    assert str(metadata["maxzoom"]) == "2"
+
+
+def test_MBTiles__rows_are_counted_from_the_south(tmp_path):
+    path = str(tmp_path / "layer.mbtiles")
+    with create_archive(path) as writer:
+        writer.add_tile(1, 0, 0, b"north west")
+
+    rows = (
+        MBTilesReader(path)
+        ._get_connection()
+        .execute("SELECT zoom_level, tile_column, tile_row FROM tiles")
+    )
+
+    assert list(rows) == [(1, 0, 1)]
+
+
+def test_PMTiles__leaf_directories_and_deduplication(tmp_path):
+    path = str(tmp_path / "layer.pmtiles")
+    tiles = {}
+    with PMTilesWriter(path) as writer:
+        for z in range(10):
+            for x in range(min(2**z, 64)):
+                for y in range(min(2**z, 64)):
+                    mvt = f"{z}/{x}/{y}".encode() * (x * y % 7 + 1)
+                    tiles[(z, x, y)] = b"water" if x % 3 == 1 else mvt
+                    writer.add_tile(z, x, y, tiles[(z, x, y)])
+
+    archive = PMTilesReader(path)
+
+    assert archive._leaves_offset < archive._data_offset  # leaves were needed
+    for tile, mvt in tiles.items():
+        assert gzip.decompress(archive.get_tile(*tile)) == mvt
+    assert archive.get_tile(7, 100, 100) is None
+
+
+def test_PMTiles__readable_by_the_reference_reader(tmp_path):
+    reader = pytest.importorskip("pmtiles.reader")
+    path = str(tmp_path / "layer.pmtiles")
+    tiles = {}
+    with PMTilesWriter(path) as writer:
+        for z in range(9):
+            for x in range(min(2**z, 64)):
+                for y in range(min(2**z, 64)):
+                    tiles[(z, x, y)] = (
+                        b"water" if x % 3 == 1 else f"{z}/{x}/{y}".encode()
+                    )
+                    writer.add_tile(z, x, y, tiles[(z, x, y)])
+
+    with open(path, "rb") as archive:
+        pmtiles = reader.Reader(reader.MmapSource(archive))
+        header = pmtiles.header()
+        assert header["leaf_directory_length"] > 0
+        assert header["addressed_tiles_count"] == len(tiles)
+        assert header["tile_contents_count"] < len(tiles)
+        assert header["max_zoom"] == 8
+        # a sample of the tiles, since the reader decodes directories per tile
+        for tile in list(tiles)[::97]:
+            assert gzip.decompress(pmtiles.get(*tile)) == tiles[tile]
+
+
+def test_open_archive__unsupported_files(tmp_path):
+    with pytest.raises(ValueError):
+        open_archive(str(tmp_path / "layer.zip"))
+    with pytest.raises(FileNotFoundError):
+        open_archive(str(tmp_path / "missing.mbtiles"))
+    not_pmtiles = tmp_path / "layer.pmtiles"
+    not_pmtiles.write_bytes(b"\\0" * 127)
+    with pytest.raises(ValueError):
+        open_archive(str(not_pmtiles))
@@ -0,0 +1,198 @@
+import pickle
+
+from mock import MagicMock
+import pytest
+
+from rest_framework_mvt.caches import (
+    BaseTileCache,
+    DjangoTileCache,
+    FileSystemTileCache,
+    LRUTileCache,
+    RedisTileCache,
+    get_layer_key,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.timeouts = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if ex is not None and ex <= 0:
+            raise ValueError("invalid expire time in 'set' command")
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.timeouts[key] = ex
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture(params=["django", "lru", "filesystem", "redis"])
+def tile_cache(request, tmp_path):
+    if request.param == "django":
+        return DjangoTileCache(key_prefix=f"mvt-{tmp_path.name}")
+    if request.param == "lru":
+        return LRUTileCache()
+    if request.param == "filesystem":
+        return FileSystemTileCache(str(tmp_path))
+    return RedisTileCache(FakeRedis())
+
+
+def test_BaseTileCache__requires_storage_primitives():
+    with pytest.raises(TypeError):
+        BaseTileCache()
+
+
+def test_get_layer_key():
+    model = MagicMock(_meta=MagicMock(label_lower="my_app.parcel"))
+
+    assert get_layer_key(model, "geom") == "my_app.parcel.geom"
+
+
+def test_tile_cache__round_trip_and_stats(tile_cache):
+    assert tile_cache.get_tile("layer", 2, 1, 1) is None
+
+    tile_cache.set_tile("layer", 2, 1, 1, memoryview(b"mvt goes here"))
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) == b"mvt goes here"
+    assert tile_cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_tile_cache__pickles(tile_cache):
+    tile_cache.set_tile("layer", 2, 1, 1, b"mvt goes here")
+
+    copy = pickle.loads(pickle.dumps(tile_cache))
+
+    assert copy.get_tile("layer", 2, 1, 1) == b"mvt goes here"
+    assert copy.stats() == {"hits": 1, "misses": 0}
+
+
+def test_tile_cache__caches_empty_tiles(tile_cache):
+    tile_cache.set_tile("layer", 2, 1, 1, b"")
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) == b""
+    assert tile_cache.hits == 1
+
+
+def test_tile_cache__slot_eviction_evicts_every_variant(tile_cache):
+    variant = tile_cache.make_variant({"city": "johnston"}, 10, 0)
+    tile_cache.set_tile("layer", 2, 1, 1, b"all")
+    tile_cache.set_tile("layer", 2, 1, 1, b"johnston", variant)
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) == b"all"
+    assert tile_cache.get_tile("layer", 2, 1, 1, variant) == b"johnston"
+
+    tile_cache.delete_many([tile_cache.make_slot_key("layer", 2, 1, 1)])
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) is None
+    assert tile_cache.get_tile("layer", 2, 1, 1, variant) is None
+
+    tile_cache.set_tile("layer", 2, 1, 1, b"all again")
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) == b"all again"
+    assert tile_cache.get_tile("layer", 2, 1, 1, variant) is None
+
+
+def test_tile_cache__does_not_cache_tiles_rendered_before_invalidation(tile_cache):
+    generation = tile_cache.get_generation("layer", 2, 1, 1)
+    assert tile_cache.get_generation("layer", 2, 1, 1) == generation
+
+    tile_cache.delete_many([tile_cache.make_slot_key("layer", 2, 1, 1)])
+    tile_cache.set_tile("layer", 2, 1, 1, b"stale", generation=generation)
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) is None
+    assert tile_cache.get_tile("layer", 2, 1, 1, generation=generation) is None
+
+    generation = tile_cache.get_generation("layer", 2, 1, 1)
+    tile_cache.set_tile("layer", 2, 1, 1, b"fresh", generation=generation)
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) == b"fresh"
+
+
+def test_tile_cache__stores_variants_under_their_own_keys():
+    client = FakeRedis()
+    tile_cache = RedisTileCache(client)
+    tile_cache.set_tile("layer", 2, 1, 1, b"all")
+    tile_cache.set_tile("layer", 2, 1, 1, b"johnston", "variant")
+
+    generation = pickle.loads(client.data["mvt:layer:2:1:1"])
+    assert pickle.loads(client.data[f"mvt:layer:2:1:1:{generation}:"]) == b"all"
+    assert (
+        pickle.loads(client.data[f"mvt:layer:2:1:1:{generation}:variant"])
+        == b"johnston"
+    )
+
+
+def test_make_variant__normalizes_filter_order():
+    first = BaseTileCache.make_variant({"a": "1", "b": "2"}, 10, 0)
+    second = BaseTileCache.make_variant({"b": "2", "a": "1"}, 10, 0)
+
+    assert first == second
+    assert first != BaseTileCache.make_variant({"a": "1", "b": "2"}, 10, 10)
+
+
+def test_tile_cache__zero_timeout_caches_nothing(tile_cache):
+    tile_cache.timeout = 0
+
+    tile_cache.set_tile("layer", 2, 1, 1, b"mvt goes here")
+
+    assert tile_cache.get_tile("layer", 2, 1, 1) is None
+    assert tile_cache.acquire_lock("layer", 1, 0, 0, timeout=0)
+
+
+def test_tile_cache__per_zoom_timeouts():
+    client = FakeRedis()
+    tile_cache = RedisTileCache(client, timeout={0: 86400, 12: 600})
+
+    tile_cache.set_tile("layer", 4, 1, 1, b"low")
+    tile_cache.set_tile("layer", 14, 1, 1, b"high")
+
+    assert set(client.timeouts.values()) == {86400, 600}
+    assert client.timeouts["mvt:layer:4:1:1"] == 86400
+    assert client.timeouts["mvt:layer:14:1:1"] == 600
+
+
+def test_LRUTileCache__evicts_least_recently_used():
+    tile_cache = LRUTileCache(max_bytes=10)
+    tile_cache.set_tile("layer", 1, 0, 0, b"12345")
+    tile_cache.set_tile("layer", 1, 0, 1, b"12345")
+    tile_cache.get_tile("layer", 1, 0, 0)
+
+    tile_cache.set_tile("layer", 1, 1, 0, b"12345")
+
+    assert tile_cache.get_tile("layer", 1, 0, 0) == b"12345"
+    assert tile_cache.get_tile("layer", 1, 0, 1) is None
+    assert tile_cache.size == 10
+
+
+def test_LRUTileCache__expires_tiles():
+    tile_cache = LRUTileCache(timeout=-1)
+    tile_cache.set_tile("layer", 1, 0, 0, b"12345")
+
+    assert tile_cache.get_tile("layer", 1, 0, 0) is None
+    assert tile_cache.size == 0
+
+
+def test_tile_cache__locks(tile_cache):
+    assert tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+    assert not tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+    assert tile_cache.acquire_lock("layer", 1, 0, 0, "other-variant")
+
+    tile_cache.release_lock("layer", 1, 0, 0, "variant")
+
+    assert tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+    assert tile_cache.get_tile("layer", 1, 0, 0, "variant") is None
+
+
+def test_tile_cache__expired_locks_can_be_acquired(tmp_path):
+    for tile_cache in (LRUTileCache(), FileSystemTileCache(str(tmp_path))):
+        assert tile_cache.acquire_lock("layer", 1, 0, 0, timeout=-1)
+        assert tile_cache.acquire_lock("layer", 1, 0, 0)
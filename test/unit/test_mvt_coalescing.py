@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mock import MagicMock
+import pytest
+
+from rest_framework_mvt.caches import LRUTileCache
+from rest_framework_mvt.coalescing import (
+    SingleFlight,
+    arender_tile_once,
+    render_tile_once,
+)
+
+
+def test_SingleFlight__do_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    function = MagicMock(side_effect=lambda: release.wait() and b"tile")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(single_flight.do, ("layer", 1, 0, 0), function)
+            for _ in range(4)
+        ]
+        while not function.called:
+            pass
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [b"tile"] * 4
+    function.assert_called_once()
+    assert single_flight.do(("layer", 1, 0, 0), lambda: b"new tile") == b"new tile"
+
+
+def test_SingleFlight__do_shares_errors():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise ValueError("query failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", fail)
+        while not single_flight._calls:
+            pass
+        follower = executor.submit(single_flight.do, "key", fail)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_SingleFlight__ado_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def render():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return b"tile"
+
+    async def main():
+        return await asyncio.gather(
+            *(single_flight.ado("key", render) for _ in range(4))
+        )
+
+    assert asyncio.run(main()) == [b"tile"] * 4
+    assert len(calls) == 1
+    assert not single_flight._futures
+
+
+def test_SingleFlight__ado_follower_takes_over_cancelled_leader():
+    single_flight = SingleFlight()
+
+    async def main():
+        leader = asyncio.ensure_future(
+            single_flight.ado("key", lambda: asyncio.sleep(10))
+        )
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(
+            single_flight.ado("key", lambda: asyncio.sleep(0, b"tile"))
+        )
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == b"tile"
+
+
+def test_render_tile_once__renders_and_caches_tile():
+    tile_cache = LRUTileCache()
+    render = MagicMock(return_value=b"tile")
+
+    mvt = render_tile_once(tile_cache, "layer", 1, 0, 0, "variant", render, 10)
+
+    assert mvt == b"tile"
+    assert tile_cache.get_tile("layer", 1, 0, 0, "variant") == b"tile"
+    assert tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+
+
+def test_render_tile_once__waits_for_lock_holder():
+    tile_cache = LRUTileCache()
+    tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+    timer = threading.Timer(
+        0.1, tile_cache.set_tile, ("layer", 1, 0, 0, b"other process", "variant")
+    )
+    timer.start()
+    render = MagicMock(return_value=b"tile")
+
+    mvt = render_tile_once(tile_cache, "layer", 1, 0, 0, "variant", render, 10)
+
+    assert mvt == b"other process"
+    render.assert_not_called()
+
+
+def test_render_tile_once__renders_after_lock_timeout():
+    tile_cache = LRUTileCache()
+    tile_cache.acquire_lock("layer", 1, 0, 0, "variant", timeout=10)
+
+    mvt = render_tile_once(
+        tile_cache, "layer", 1, 0, 0, "variant", lambda: b"tile", 0.1
+    )
+
+    assert mvt == b"tile"
+    # the lock of the other process is left alone
+    assert not tile_cache.acquire_lock("layer", 1, 0, 0, "variant")
+    # waiting for the lock holder does not count cache misses
+    assert tile_cache.stats() == {"hits": 0, "misses": 0}
+
+
+def test_arender_tile_once__renders_and_caches_tile():
+    tile_cache = LRUTileCache()
+
+    async def render():
+        return b"tile"
+
+    mvt = asyncio.run(
+        arender_tile_once(tile_cache, "layer", 1, 0, 0, "variant", render, 10)
+    )
+
+    assert mvt == b"tile"
+    assert tile_cache.get_tile("layer", 1, 0, 0, "variant") == b"tile"
@@ -0,0 +1,153 @@
+from mock import patch, MagicMock
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_mvt.composite import BaseCompositeMVTView, intersect_layers
+
+
+def test_intersect_layers__concatenates_layers_in_one_query():
+    roads = MagicMock(
+        source_name=None,
+        prepared=False,
+        layer_name="default",
+        statement_timeout=None,
+        replicas=None,
+    )
+    roads._route.side_effect = lambda query: query(roads._get_connection())
+    roads._build_query.return_value = ("SELECT NULL AS id, roads;", ["paved"])
+    buildings = MagicMock(
+        source_name=None, prepared=False, layer_name="buildings", replicas=None
+    )
+    buildings._build_query.return_value = ("SELECT NULL AS id, buildings;", [])
+    cursor = roads._get_connection.return_value.cursor.return_value.__enter__()
+    cursor.fetchone.return_value = (None, b"tile")
+
+    mvt = intersect_layers(
+        [
+            (roads, {"layer_name": "roads", "filters": {"surface": "paved"}}),
+            (buildings, {}),
+        ],
+        bbox="POLYGON",
+        limit=10,
+        offset=20,
+    )
+
+    assert mvt == b"tile"
+    roads._build_query.assert_called_once_with(
+        layer_name="roads", filters={"surface": "paved"}
+    )
+    cursor.execute.assert_called_once_with(
+        "SELECT NULL AS id, "
+        "(SELECT tile FROM (SELECT NULL AS id, roads) AS layer_0(id, tile)) || "
+        "(SELECT tile FROM (SELECT NULL AS id, buildings) AS layer_1(id, tile));",
+        ["POLYGON"] * 3 + ["paved", 10, 20] + ["POLYGON"] * 3 + [10, 20],
+    )
+
+
+def test_intersect_layers__gzip():
+    manager = MagicMock(
+        source_name=None,
+        prepared=False,
+        layer_name="default",
+        statement_timeout=None,
+        replicas=None,
+    )
+    manager._route.side_effect = lambda query: query(manager._get_connection())
+    manager._build_query.return_value = ("SELECT NULL AS id, tile;", [])
+    cursor = manager._get_connection.return_value.cursor.return_value.__enter__()
+
+    intersect_layers([(manager, {})], gzip=True)
+
+    query = cursor.execute.call_args[0][0]
+    assert query.startswith("SELECT NULL AS id, COALESCE(gzip(NULLIF((SELECT tile")
+    assert cursor.execute.call_args[0][1] == [""] * 3 + [None, 0]
+
+
+def test_intersect_layers__tile():
+    manager = MagicMock(
+        source_name=None,
+        prepared=False,
+        layer_name="default",
+        statement_timeout=None,
+        replicas=None,
+    )
+    manager._route.side_effect = lambda query: query(manager._get_connection())
+    manager._build_query.return_value = ("SELECT NULL AS id, tile;", ["paved"])
+    cursor = manager._get_connection.return_value.cursor.return_value.__enter__()
+
+    intersect_layers([(manager, {"zoom": None})], tile=(3, 2, 1))
+
+    manager._build_query.assert_called_once_with(zoom=3, tiles="tile")
+    assert cursor.execute.call_args[0][1] == [3, 2, 1, "paved", None, 0]
+
+
+def test_intersect_layers__invalid_layers():
+    manager = MagicMock(source_name=None, layer_name="default", replicas=None)
+    other_database = MagicMock(source_name="replica", layer_name="other", replicas=None)
+
+    with pytest.raises(ValueError):
+        intersect_layers([])
+    with pytest.raises(ValueError):
+        intersect_layers([(manager, {}), (manager, {"layer_name": "default"})])
+    with pytest.raises(ValueError):
+        intersect_layers([(manager, {}), (other_database, {})])
+
+
+def _composite_view(**kwargs):
+    road, building = MagicMock(), MagicMock()
+    road.vector_tiles.extent = building.vector_tiles.extent = 4096
+    return BaseCompositeMVTView(
+        layers=(
+            (road, "vector_tiles", "roads"),
+            (building, "vector_tiles", "buildings"),
+        ),
+        **kwargs,
+    )
+
+
+@patch("rest_framework_mvt.composite.intersect_layers")
+def test_BaseCompositeMVTView__get_queries_layers_at_once(intersect_layers):
+    view = _composite_view(buffer=64)
+    intersect_layers.return_value = b"mvt goes here"
+    request = Request(
+        APIRequestFactory().get("/", {"tile": "1/0/0", "roads.surface": "gravel"})
+    )
+
+    response = view.get(request)
+
+    assert response.status_code == 200
+    assert response.data == b"mvt goes here"
+    road, building = view.layers[0][0], view.layers[1][0]
+    intersect_layers.assert_called_once_with(
+        [
+            (
+                road.vector_tiles,
+                {
+                    "buffer": 64,
+                    "zoom": 1,
+                    "layer_name": "roads",
+                    "filters": {"surface": "gravel"},
+                },
+            ),
+            (
+                building.vector_tiles,
+                {"buffer": 64, "zoom": 1, "layer_name": "buildings", "filters": {}},
+            ),
+        ],
+        tile=(1, 0, 0),
+        limit=-1,
+        offset=0,
+        gzip=False,
+    )
+
+
+@patch("rest_framework_mvt.composite.intersect_layers")
+def test_BaseCompositeMVTView__unprefixed_filter_returns_400(intersect_layers):
+    view = _composite_view()
+    request = Request(APIRequestFactory().get("/", {"tile": "1/0/0", "surface": "x"}))
+
+    response = view.get(request)
+
+    assert response.status_code == 400
+    intersect_layers.assert_not_called()
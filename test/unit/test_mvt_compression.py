@@ -0,0 +1,57 @@
+import gzip
+import time
+
+from mock import patch
+import pytest
+
+from rest_framework_mvt.compression import compress, negotiate_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,expected",
+    [
+        ("gzip, deflate", "gzip"),
+        ("br;q=0.9, gzip;q=0.8", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("gzip;q=0, *;q=0.1", "br"),
+        ("identity", None),
+        ("", None),
+        ("gzip;q=cat", None),
+    ],
+)
+@patch(
+    "rest_framework_mvt.compression.get_supported_encodings",
+    return_value=("br", "gzip"),
+)
+def test_negotiate_encoding(supported, accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, ("br", "gzip")) == expected
+
+
+@patch("rest_framework_mvt.compression.brotli", None)
+def test_negotiate_encoding__brotli_not_installed():
+    assert negotiate_encoding("br, gzip;q=0.5", ("br", "gzip")) == "gzip"
+
+
+def test_compress__gzip():
+    assert gzip.decompress(compress(memoryview(b"mvt goes here"), "gzip")) == (
+        b"mvt goes here"
+    )
+
+
+def test_compress__gzip_is_deterministic():
+    first = compress(b"mvt goes here", "gzip")
+    time.sleep(1.1)
+
+    assert compress(b"mvt goes here", "gzip") == first
+
+
+def test_compress__does_not_compress_empty_tiles():
+    assert compress(b"", "gzip") == b""
+    assert compress(b"mvt", None) == b"mvt"
+
+
+def test_compress__brotli():
+    brotli = pytest.importorskip("brotli")
+
+    assert brotli.decompress(compress(b"mvt goes here", "br")) == b"mvt goes here"
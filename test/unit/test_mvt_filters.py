@@ -0,0 +1,142 @@
+import datetime
+
+from django.db import models
+import pytest
+from rest_framework.serializers import ValidationError
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_mvt.caches import BaseTileCache
+from rest_framework_mvt.filters import FilterSchema, TileFilter, TileFilters
+from rest_framework_mvt.views import BaseMVTView
+
+
+class Road(models.Model):
+    surface = models.CharField(max_length=16, db_index=True)
+    lanes = models.IntegerField()
+    opened = models.DateField(null=True)
+    name = models.CharField(max_length=64)
+
+    class Meta:
+        app_label = "rest_framework_mvt"
+        db_table = "roads"
+        managed = False
+        indexes = [models.Index(fields=["lanes", "surface"])]
+
+
+@pytest.fixture
+def schema():
+    return FilterSchema(
+        {
+            "surface": TileFilter(("exact", "in", "icontains"), trigram_indexed=True),
+            "lanes": TileFilter(("exact", "gte", "lte")),
+            "opened": TileFilter(("gt", "isnull"), indexed=True),
+        }
+    )
+
+
+def test_FilterSchema_clean__compiles_sql_in_canonical_order(schema):
+    filters = schema.clean(
+        Road,
+        {"surface__in": "paved,gravel,paved", "lanes__lte": "04", "lanes__gte": "2"},
+    )
+
+    assert isinstance(filters, TileFilters)
+    assert list(filters.items()) == [
+        ("lanes__gte", 2),
+        ("lanes__lte", 4),
+        ("surface__in", ("gravel", "paved")),
+    ]
+    assert filters.sql == (
+        "roads.lanes >= %s AND roads.lanes <= %s AND roads.surface = ANY(%s)"
+    )
+    assert filters.params == [2, 4, ["gravel", "paved"]]
+
+
+def test_FilterSchema_clean__equivalent_filters_share_a_variant(schema):
+    first = schema.clean(Road, {"surface__exact": "paved", "lanes": "2"})
+    second = schema.clean(Road, {"lanes": "02", "surface": "paved"})
+
+    assert first.sql == second.sql
+    assert BaseTileCache.make_variant(first) == BaseTileCache.make_variant(second)
+
+
+def test_FilterSchema_clean__converts_lookups(schema):
+    filters = schema.clean(
+        Road,
+        {
+            "opened__gt": "2020-01-31",
+            "opened__isnull": "false",
+            "surface__icontains": "5%_",
+        },
+    )
+
+    assert filters["opened__gt"] == datetime.date(2020, 1, 31)
+    assert filters.sql == (
+        "roads.opened > %s AND roads.opened IS NOT NULL AND "
+        "UPPER(roads.surface::text) LIKE UPPER(%s)"
+    )
+    assert filters.params == [datetime.date(2020, 1, 31), "%5\\%\\_%"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"name": "Main St"},
+        {"lanes__in": "1,2"},
+        {"lanes": "two"},
+        {"opened__gt": "yesterday"},
+        {"opened__isnull": "maybe"},
+        {"surface__in": ","},
+        {"surface": "paved", "surface__exact": "gravel"},
+    ],
+)
+def test_FilterSchema_clean__invalid_filters_raise_ValidationError(schema, params):
+    with pytest.raises(ValidationError):
+        schema.clean(Road, params)
+
+
+def test_FilterSchema_compile__rejects_unindexed_fields():
+    with pytest.raises(ValueError):
+        FilterSchema({"name": TileFilter()}).compile(Road)
+    with pytest.raises(ValueError):
+        FilterSchema({"surface": TileFilter(field="missing")}).compile(Road)
+
+    schema = FilterSchema({"name": TileFilter()}, require_index=False)
+    assert schema.compile(Road)["name", "exact"][0] == "roads.name"
+    assert schema.compile(Road) is schema.compile(Road)
+
+
+def test_BaseMVTView_as_view__compiles_filter_schema():
+    schema = FilterSchema({"name": TileFilter()})
+
+    with pytest.raises(ValueError):
+        BaseMVTView.as_view(model=Road, filter_schema=schema)
+    with pytest.raises(ValueError):
+        type("RoadMVTView", (BaseMVTView,), {"filter_schema": schema}).as_view(
+            model=Road
+        )
+
+
+def test_FilterSchema_clean__rejects_contains_without_trigram_index():
+    schema = FilterSchema({"surface": TileFilter(("exact", "contains", "icontains"))})
+    view = BaseMVTView.as_view(model=Road, filter_schema=schema)
+
+    response = view(
+        APIRequestFactory().get("/", {"tile": "1/0/0", "surface__contains": "pav"})
+    )
+
+    assert response.status_code == 400
+    with pytest.raises(ValidationError):
+        schema.clean(Road, {"surface__icontains": "pav"})
+    assert schema.clean(Road, {"surface": "paved"}).sql == "roads.surface = %s"
+    unchecked = FilterSchema(
+        {"surface": TileFilter(("contains",))}, require_index=False
+    )
+    assert unchecked.clean(Road, {"surface__contains": "pav"}).sql == (
+        "roads.surface::text LIKE %s"
+    )
+
+
+def test_TileFilter__unknown_lookup_raises_ValueError():
+    with pytest.raises(ValueError):
+        TileFilter(("regex",))
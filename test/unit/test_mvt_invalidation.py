@@ -0,0 +1,133 @@
+from django.contrib.gis.geos import Point, Polygon
+from mock import MagicMock, patch
+import pytest
+
+from rest_framework_mvt.caches import LRUTileCache
+from rest_framework_mvt.invalidation import TileInvalidator
+from rest_framework_mvt.signals import tiles_invalidated
+
+
+class Instance:
+    def __init__(self, geom, pk=1):
+        self.geom = geom
+        self.pk = pk
+
+
+@pytest.fixture
+def tile_cache():
+    tile_cache = LRUTileCache()
+    for tile in [(0, 0, 0), (1, 0, 0), (1, 1, 1), (2, 0, 0)]:
+        tile_cache.set_tile("my_app.parcel.geom", *tile, b"mvt")
+    return tile_cache
+
+
+@pytest.fixture
+def invalidator(tile_cache):
+    model = MagicMock(_meta=MagicMock(label_lower="my_app.parcel"))
+    model.vector_tiles.geo_col = "geom"
+    model.vector_tiles.buffer = 0
+    model.vector_tiles.generalizations = None
+    model.vector_tiles._get_geo_field.return_value = MagicMock(attname="geom")
+    model.vector_tiles._get_srid.return_value = 4326
+    return TileInvalidator(model, tile_cache, min_zoom=0, max_zoom=1)
+
+
+def test_TileInvalidator__evicts_old_and_new_geometry_tiles(invalidator, tile_cache):
+    instance = Instance(Point(-90, 40, srid=4326))
+    invalidator._remember_geometry(sender=None, instance=instance)
+    instance.geom = Point(90, -40, srid=4326)
+
+    invalidator._on_save(sender=None, instance=instance)
+
+    assert tile_cache.get_tile("my_app.parcel.geom", 0, 0, 0) is None
+    assert tile_cache.get_tile("my_app.parcel.geom", 1, 0, 0) is None
+    assert tile_cache.get_tile("my_app.parcel.geom", 1, 1, 1) is None
+    assert tile_cache.get_tile("my_app.parcel.geom", 2, 0, 0) == b"mvt"
+    assert instance._mvt_initial_geometry == Point(90, -40, srid=4326)
+
+
+def test_TileInvalidator__accepts_geometries_assigned_as_text(invalidator, tile_cache):
+    instance = Instance("POINT(-90 40)")
+    invalidator._remember_geometry(sender=None, instance=instance)
+    instance.geom = Point(90, -40).hex.decode()
+
+    invalidator._on_save(sender=None, instance=instance)
+
+    assert tile_cache.get_tile("my_app.parcel.geom", 1, 0, 0) is None
+    assert tile_cache.get_tile("my_app.parcel.geom", 1, 1, 1) is None
+    assert instance._mvt_initial_geometry.srid == 4326
+
+
+def test_TileInvalidator__on_delete_sends_tiles_invalidated(invalidator):
+    receiver = MagicMock()
+    tiles_invalidated.connect(receiver, weak=False)
+    try:
+        invalidator._on_delete(
+            sender=None, instance=Instance(Point(-90, 40, srid=4326))
+        )
+    finally:
+        tiles_invalidated.disconnect(receiver)
+
+    receiver.assert_called_once()
+    assert receiver.call_args[1]["tiles"] == {(0, 0, 0), (1, 0, 0)}
+    assert receiver.call_args[1]["layer"] == "my_app.parcel.geom"
+
+
+def test_TileInvalidator__updates_generalized_tables_before_evicting(
+    invalidator, tile_cache
+):
+    invalidator.manager.generalizations = {0: 2000}
+    cached_tiles = []
+    invalidator.manager.update_generalized_tables.side_effect = lambda pks: (
+        cached_tiles.append(tile_cache.get_tile("my_app.parcel.geom", 0, 0, 0))
+    )
+    with invalidator.deferred():
+        invalidator._on_save(sender=None, instance=Instance(Point(-90, 40, srid=4326)))
+        invalidator._on_delete(
+            sender=None, instance=Instance(Point(90, -40, srid=4326), pk=2)
+        )
+        invalidator.manager.update_generalized_tables.assert_not_called()
+
+    invalidator.manager.update_generalized_tables.assert_called_once_with({1, 2})
+    assert cached_tiles == [b"mvt"]
+    assert tile_cache.get_tile("my_app.parcel.geom", 0, 0, 0) is None
+
+
+def test_TileInvalidator__deferred_flushes_once_in_batches(invalidator, tile_cache):
+    invalidator.batch_size = 2
+    with patch.object(tile_cache, "delete_many") as delete_many:
+        with invalidator.deferred():
+            invalidator.invalidate_geometry(Polygon.from_bbox((-90, -40, 90, 40)))
+            invalidator.invalidate_geometry(Point(-90, 40, srid=4326))
+            delete_many.assert_not_called()
+
+    assert delete_many.call_count == 3
+    assert sum(len(call[0][0]) for call in delete_many.call_args_list) == 5
+
+
+def test_TileInvalidator__defers_flush_until_commit(invalidator):
+    connection = MagicMock(in_atomic_block=True, run_on_commit=[])
+    with patch(
+        "rest_framework_mvt.invalidation.connections", {"default": connection}
+    ), patch("rest_framework_mvt.invalidation.transaction.on_commit") as on_commit:
+        invalidator.invalidate_geometry(Point(-90, 40, srid=4326))
+
+    on_commit.assert_called_once_with(invalidator.flush, using="default")
+
+
+def test_TileInvalidator__evicts_neighbours_with_buffer(invalidator):
+    invalidator.manager.buffer = 64
+    receiver = MagicMock()
+    tiles_invalidated.connect(receiver, weak=False)
+    try:
+        invalidator.invalidate_geometry(Point(-90, 40, srid=4326))
+    finally:
+        tiles_invalidated.disconnect(receiver)
+
+    assert receiver.call_args[1]["tiles"] == {
+        (0, 0, 0),
+        (1, 0, 0),
+        (1, 0, 1),
+        (1, 1, 0),
+        (1, 1, 1),
+    }
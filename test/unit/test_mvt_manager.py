@@ -1,7 +1,17 @@
 from django.core.exceptions import FieldError
-from rest_framework_mvt.managers import MVTManager
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from rest_framework_mvt.managers import (
+    MVTManager,
+    _clear_query_caches,
+    _forget_prepared_statements,
+)
+from rest_framework_mvt.filters import TileFilters
+from rest_framework_mvt.signals import tile_queried
 from rest_framework.serializers import ValidationError
-from mock import patch, MagicMock
+from mock import patch, AsyncMock, MagicMock
+import asyncio
+import io
 import pytest
 
 
@@ -14,7 +24,8 @@ def mvt_manager():
             get_attname_column=MagicMock(return_value=("other_column", "other_column"))
         ),
         MagicMock(
-            get_attname_column=MagicMock(return_value=("jazzy_geo", "jazzy_geo"))
+            get_attname_column=MagicMock(return_value=("jazzy_geo", "jazzy_geo")),
+            srid=4326,
         ),
         MagicMock(get_attname_column=MagicMock(return_value=("city", "city"))),
     ]
@@ -53,7 +64,23 @@ def test_mvt_manager_intersect__calls__build_query(get_conn, mvt_manager):
 
     mvt_manager.intersect(bbox="", limit=10, offset=7)
 
-    mvt_manager._build_query.assert_called_once_with(filters={})
+    mvt_manager._build_query.assert_called_once_with(
+        counted=False,
+        filters={},
+        gzip=False,
+        simplify=None,
+        simplify_method="simplify",
+        min_size=None,
+        columns=None,
+        extent=None,
+        buffer=None,
+        clip=None,
+        layer_name=None,
+        cluster=None,
+        cluster_method="grid",
+        cluster_aggregates=None,
+        zoom=None,
+    )
 
 
 @patch("rest_framework_mvt.managers.MVTManager.only")
@@ -68,7 +95,7 @@ def test_mvt_manager_build_query__all(get_conn, only, mvt_manager):
                 ST_AsMVTGeom(ST_Transform(test_table.jazzy_geo, 3857),
                 ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
             FROM test_table
-            WHERE ST_Intersects(ST_Transform(test_table.jazzy_geo, 4326), ST_SetSRID(ST_GeomFromText(%s), 4326))
+            WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326))
             LIMIT %s
             OFFSET %s) AS q;
     """.strip()
@@ -92,7 +119,7 @@ def test_mvt_manager_build_query__no_geo_col(get_conn, only, mvt_manager_no_col)
                 ST_AsMVTGeom(ST_Transform(test_table.geom, 3857),
                 ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
             FROM test_table
-            WHERE ST_Intersects(ST_Transform(test_table.geom, 4326), ST_SetSRID(ST_GeomFromText(%s), 4326))
+            WHERE test_table.geom && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.geom, ST_SetSRID(ST_GeomFromText(%s), 4326))
             LIMIT %s
             OFFSET %s) AS q;
     """.strip()
@@ -122,7 +149,7 @@ def test_mvt_manager_build_query__filter(get_conn, only, orm_filter, mvt_manager
                 ST_AsMVTGeom(ST_Transform(test_table.jazzy_geo, 3857),
                 ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
             FROM test_table
-            WHERE ST_Intersects(ST_Transform(test_table.jazzy_geo, 4326), ST_SetSRID(ST_GeomFromText(%s), 4326)) AND (city = %s)
+            WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326)) AND (city = %s)
             LIMIT %s
             OFFSET %s) AS q;
     """.strip()
@@ -153,7 +180,7 @@ def test_mvt_manager_build_query__multiple_filters(
                 ST_AsMVTGeom(ST_Transform(test_table.jazzy_geo, 3857),
                 ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
             FROM test_table
-            WHERE ST_Intersects(ST_Transform(test_table.jazzy_geo, 4326), ST_SetSRID(ST_GeomFromText(%s), 4326)) AND (city = %s AND other_column = %s)
+            WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326)) AND (city = %s AND other_column = %s)
             LIMIT %s
             OFFSET %s) AS q;
     """.strip()
@@ -210,7 +237,721 @@ def test_mvt_manager_create_where_clause_with_params(get_conn, orm_filter, mvt_m
     orm_filter.assert_called_once_with(col_1="filter_1", foreign_key=1)
     query_filter.sql_with_params.assert_called_once()
     assert parameterized_where_clause == (
-        "ST_Intersects(ST_Transform(my_schema.my_table.jazzy_geo, 4326), ST_SetSRID(ST_GeomFromText(%s), 4326)) "
+        "my_schema.my_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) "
+        "AND ST_Intersects(my_schema.my_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326)) "
         'AND ("my_schema"."my_table"."col_1" = %s AND "my_schema"."my_table"."foreign_key_id" = %s)'
     )
     assert where_clause_parameters == ["filter_1", 1]
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_create_where_clause_with_params__transforms_bbox_not_column(
+    get_conn, orm_filter, mvt_manager
+):
+    mvt_manager.model._meta.get_fields()[1].srid = 3857
+    query_filter = MagicMock()
+    query_filter.sql_with_params.return_value = ("SELECT * FROM test_table", ())
+    orm_filter.return_value = MagicMock(query=query_filter)
+
+    parameterized_where_clause, _ = mvt_manager._create_where_clause_with_params(
+        "test_table", {}
+    )
+
+    assert "ST_Transform(test_table.jazzy_geo" not in parameterized_where_clause
+    assert parameterized_where_clause == (
+        "test_table.jazzy_geo && ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857) "
+        "AND ST_Intersects(test_table.jazzy_geo, "
+        "ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857))"
+    )
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+def test_mvt_manager_create_where_clause_with_params__tile_filters_skip_queryset(
+    orm_filter, mvt_manager
+):
+    filters = TileFilters(
+        [("city", "Ames")], sql="test_table.city = %s", params=["Ames"]
+    )
+
+    where_clause, parameters = mvt_manager._create_where_clause_with_params(
+        "test_table", filters, envelope="tiles.bounds"
+    )
+
+    assert where_clause == (
+        "test_table.jazzy_geo && tiles.bounds AND "
+        "ST_Intersects(test_table.jazzy_geo, tiles.bounds) AND test_table.city = %s"
+    )
+    assert parameters == ["Ames"]
+    orm_filter.assert_not_called()
+
+
+def test_mvt_manager_get_srid__defaults_to_4326(mvt_manager_no_col):
+    assert mvt_manager_no_col._get_srid() == 4326
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__memoizes_compiled_query(
+    only, orm_filter, mvt_manager
+):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+
+    first = mvt_manager._build_query()
+    second = mvt_manager._build_query()
+
+    assert first == second
+    only.assert_called_once()
+    orm_filter.assert_not_called()
+    assert mvt_manager.model._meta.get_fields.call_count == 2
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__memoizes_per_where_clause(
+    only, orm_filter, mvt_manager
+):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+    filter_query = MagicMock()
+    filter_query.sql_with_params.side_effect = [
+        ("SELECT city FROM table WHERE (city = %s)", ["johnston"]),
+        ("SELECT city FROM table WHERE (city = %s)", ["ankeny"]),
+    ]
+    orm_filter.return_value = MagicMock(query=filter_query)
+
+    first_query, first_parameters = mvt_manager._build_query({"city": "johnston"})
+    second_query, second_parameters = mvt_manager._build_query({"city": "ankeny"})
+
+    assert first_query == second_query
+    assert first_parameters == ["johnston"]
+    assert second_parameters == ["ankeny"]
+    only.assert_called_once()
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+def test_mvt_manager_create_where_clause_with_params__memoizes_filters(
+    orm_filter, mvt_manager
+):
+    filter_query = MagicMock()
+    filter_query.sql_with_params.return_value = (
+        "SELECT city FROM table WHERE (city = %s)",
+        ["johnston"],
+    )
+    orm_filter.return_value = MagicMock(query=filter_query)
+
+    first = mvt_manager._create_where_clause_with_params("table", {"city": "johnston"})
+    second = mvt_manager._create_where_clause_with_params("table", {"city": "johnston"})
+    mvt_manager._create_where_clause_with_params("table", {"city__in": ["a", "b"]})
+    mvt_manager._create_where_clause_with_params("table", {"city__in": ["a", "b"]})
+
+    assert first == second
+    assert first[1] == ["johnston"]
+    assert orm_filter.call_count == 3
+
+
+@patch("rest_framework_mvt.managers.MVTManager.filter")
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__keeps_recently_used_queries(
+    only, orm_filter, mvt_manager
+):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+    orm_filter.side_effect = lambda **filters: MagicMock(
+        query=MagicMock(
+            sql_with_params=MagicMock(
+                return_value=(f"SELECT city FROM table WHERE ({filters})", ["x"])
+            )
+        )
+    )
+    mvt_manager.query_cache_size = 6
+    mvt_manager.clear_query_cache()
+
+    for column in ["a", "b", "c", "a", "d"]:
+        mvt_manager._build_query({column: "x"})
+
+    queries = [key[1] for key in mvt_manager._query_cache if key[0] == "query"]
+    assert len(mvt_manager._query_cache) == 6
+    assert len(queries) == 2
+    assert "{'a': 'x'}" in queries[0]
+    assert "{'d': 'x'}" in queries[1]
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_clear_query_cache__after_migrations(only, mvt_manager):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+    mvt_manager._build_query()
+
+    _clear_query_caches(sender=None)
+    mvt_manager._build_query()
+
+    assert only.call_count == 2
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect__limit_all_is_null(get_conn, mvt_manager):
+    mvt_manager._build_query = MagicMock(return_value=("foo", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+
+    mvt_manager.intersect(bbox="bbox")
+
+    cursor.execute.assert_called_once_with("foo", ["bbox"] * 3 + [None, 0])
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect__tile_envelope_built_by_postgres(get_conn, mvt_manager):
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (None, b"tile")
+
+    with patch.object(
+        mvt_manager, "_create_select_statement", return_value="other_column, city,"
+    ), patch.object(
+        mvt_manager, "_get_geometry_source", wraps=mvt_manager._get_geometry_source
+    ) as get_geometry_source:
+        mvt = mvt_manager.intersect(bbox="ignored", limit=10, tile=("12", 1, 2))
+
+    assert mvt == b"tile"
+    query, parameters = cursor.execute.call_args[0]
+    assert "ST_TileEnvelope(%s::integer, %s::integer, %s::integer)" in query
+    assert "ST_Transform(envelope, 4326) AS bounds" in query
+    assert "tiles.envelope, 4096, 0, false) AS mvt_geom" in query
+    assert "ST_GeomFromText" not in query
+    assert parameters == [12, 1, 2, 10, 0]
+    get_geometry_source.assert_called_once_with("test_table", 12)
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect__prepared_statements(get_conn, mvt_manager):
+    mvt_manager.prepared = True
+    mvt_manager._build_query = MagicMock(
+        return_value=("SELECT %s, %s, %s, '%%' LIMIT %s OFFSET %s;", [])
+    )
+    connection = MagicMock()
+    get_conn.return_value = connection
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    mvt_manager.intersect(bbox="bbox", limit=10, offset=0)
+    mvt_manager.intersect(bbox="bbox", limit=10, offset=10)
+    _forget_prepared_statements(sender=None, connection=connection)
+    mvt_manager.intersect(bbox="bbox", limit=10, offset=20)
+
+    statements = [call[0][0] for call in cursor.execute.call_args_list]
+    name = statements[0].split()[1]
+    assert (
+        statements[0] == f"PREPARE {name} AS SELECT $1, $2, $3, '%' LIMIT $4 OFFSET $5"
+    )
+    assert statements[1:3] == [f"EXECUTE {name} (%s, %s, %s, %s, %s)"] * 2
+    assert statements[3].startswith(f"PREPARE {name} AS")
+    assert cursor.execute.call_args_list[2][0][1] == ["bbox"] * 3 + [10, 10]
+
+
+@patch("rest_framework_mvt.managers._MAX_PREPARED_STATEMENTS", 2)
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect__deallocates_least_recently_used_statements(
+    get_conn, mvt_manager
+):
+    mvt_manager.prepared = True
+    mvt_manager._build_query = MagicMock()
+    connection = MagicMock()
+    get_conn.return_value = connection
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    for query in ["SELECT 1;", "SELECT 2;", "SELECT 1;", "SELECT 3;"]:
+        mvt_manager._build_query.return_value = (query, [])
+        mvt_manager.intersect(bbox="bbox")
+
+    statements = [call[0][0] for call in cursor.execute.call_args_list]
+    first, second, third = [
+        statement.split()[1] for statement in statements if "PREPARE" in statement
+    ]
+    assert statements[-3:-1] == [f"DEALLOCATE {second}", f"PREPARE {third} AS SELECT 3"]
+    assert list(connection.__dict__["mvt_prepared_statements"]) == [first, third]
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__gzip(only, mvt_manager):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+
+    query, _ = mvt_manager._build_query(gzip=True)
+
+    assert query.startswith(
+        "SELECT NULL AS id, "
+        "COALESCE(gzip(NULLIF(ST_AsMVT(q, 'default', 4096, 'mvt_geom'), '')), '')"
+    )
+    assert mvt_manager._build_query()[0] != query
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__simplify_min_size_and_columns(only, mvt_manager):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT city FROM table", [])
+    only.return_value = MagicMock(query=query)
+    expected_query = """
+        SELECT NULL AS id, ST_AsMVT(q, 'default', 4096, 'mvt_geom')
+            FROM (SELECT city,
+                ST_AsMVTGeom(ST_SimplifyPreserveTopology(ST_Transform(test_table.jazzy_geo, 3857), 152.5),
+                ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
+            FROM test_table
+            WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326)) AND (ST_Dimension(test_table.jazzy_geo) = 0 OR ST_Length(ST_Transform(ST_BoundingDiagonal(test_table.jazzy_geo), 3857)) >= 305.0)
+            LIMIT %s
+            OFFSET %s) AS q;
+    """.strip()
+
+    query, _ = mvt_manager._build_query(simplify=152.5, min_size=305, columns=["city"])
+
+    assert query == expected_query
+    only.assert_called_once_with("city")
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__snap_to_grid_without_columns(only, mvt_manager):
+    query, _ = mvt_manager._build_query(simplify=10, simplify_method="snap", columns=[])
+
+    assert "FROM (SELECT \n" in query
+    assert "ST_SnapToGrid(ST_Transform(test_table.jazzy_geo, 3857), 10.0)" in query
+    only.assert_not_called()
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__keyset_page(only, mvt_manager):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT city, other_column FROM table", [])
+    only.return_value = MagicMock(query=query)
+    mvt_manager.model._meta.pk.column = "other_column"
+    expected_query = """
+        SELECT (ARRAY_AGG(q.other_column ORDER BY q.other_column DESC))[1] AS id, COUNT(*), ST_AsMVT(q, 'default', 4096, 'mvt_geom')
+            FROM (SELECT city, other_column,
+                ST_AsMVTGeom(ST_Transform(test_table.jazzy_geo, 3857),
+                ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
+            FROM test_table
+            WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326)) AND test_table.other_column > %s
+            ORDER BY test_table.other_column
+            LIMIT %s) AS q;
+    """.strip()
+
+    query, _ = mvt_manager._build_query(columns=["city"], keyset="after")
+
+    assert query == expected_query
+    only.assert_called_once_with("city", "other_column")
+    first_page, _ = mvt_manager._build_query(columns=["city"], keyset="first")
+    assert " > %s" not in first_page
+    assert "ORDER BY test_table.other_column" in first_page
+
+
+@pytest.mark.parametrize(
+    "limit,after,count,expected_parameters,expected_after",
+    [
+        (2, None, 2, ["POLYGON"] * 3 + [2], 8),
+        (2, "5", 2, ["POLYGON"] * 3 + ["5", 2], 8),
+        (3, "5", 2, ["POLYGON"] * 3 + ["5", 3], None),
+        (-1, None, 2, ["POLYGON"] * 3 + [None], None),
+    ],
+)
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect_page(
+    get_conn, limit, after, count, expected_parameters, expected_after, mvt_manager
+):
+    mvt_manager._build_query = MagicMock(return_value=("query", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (8, count, b"tile")
+
+    mvt, next_after = mvt_manager.intersect_page(
+        bbox="POLYGON", limit=limit, after=after
+    )
+
+    assert (mvt, next_after) == (b"tile", expected_after)
+    cursor.execute.assert_called_once_with("query", expected_parameters)
+    mvt_manager._build_query.assert_called_once_with(
+        keyset="first" if after is None else "after", filters={}
+    )
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect_limited__falls_back_to_cheaper_options(
+    get_conn, mvt_manager
+):
+    mvt_manager._build_query = MagicMock(return_value=("SELECT tile;", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.side_effect = [(None, 101, None), (None, 40, b"simple")]
+
+    mvt = mvt_manager.intersect_limited(
+        bbox="POLYGON",
+        max_features=100,
+        max_bytes=500000,
+        fallbacks=[{"simplify": 10}, {"simplify": 100}],
+        columns=["city"],
+    )
+
+    assert mvt == b"simple"
+    assert [call[1] for call in mvt_manager._build_query.call_args_list] == [
+        {"counted": True, "filters": {}, "columns": ["city"]},
+        {"counted": True, "filters": {}, "columns": ["city"], "simplify": 10},
+        {"filters": {}, "columns": ["city"], "simplify": 100},
+    ]
+    query, parameters = cursor.execute.call_args_list[0][0]
+    assert query == (
+        "SELECT id, features, CASE WHEN features > 100 OR octet_length(tile) > 500000 "
+        "THEN NULL ELSE tile END FROM (SELECT tile) AS t(id, features, tile);"
+    )
+    assert parameters == ["POLYGON"] * 3 + [101, 0]
+    assert cursor.execute.call_count == 2
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect_limited__truncates_last_fallback(get_conn, mvt_manager):
+    mvt_manager._build_query = MagicMock(return_value=("SELECT tile;", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.side_effect = [(None, 101, None), (None, b"truncated")]
+
+    mvt = mvt_manager.intersect_limited(
+        limit=500, max_features=100, fallbacks=[{"simplify": 10}]
+    )
+
+    assert mvt == b"truncated"
+    assert cursor.execute.call_args_list[1][0] == ("SELECT tile;", [""] * 3 + [100, 0])
+
+
+@patch("rest_framework_mvt.managers.transaction")
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect_limited__falls_back_on_statement_timeout(
+    get_conn, transaction, mvt_manager
+):
+    mvt_manager.statement_timeout = 2.5
+    mvt_manager._build_query = MagicMock(return_value=("SELECT tile;", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cancelled = OperationalError("canceling statement due to statement timeout")
+    cancelled.__cause__ = Exception()
+    cancelled.__cause__.pgcode = "57014"
+    cursor.fetchone.side_effect = [cancelled, (None, b"simple")]
+
+    mvt = mvt_manager.intersect_limited(max_features=100, fallbacks=[{"simplify": 10}])
+
+    assert mvt == b"simple"
+    assert transaction.atomic.call_count == 2
+    cursor.execute.assert_any_call(
+        "SELECT set_config('statement_timeout', %s, true);", ["2500"]
+    )
+    cursor.fetchone.side_effect = OperationalError("connection lost")
+    with pytest.raises(OperationalError):
+        mvt_manager.intersect_limited(max_features=100, fallbacks=[{"simplify": 10}])
+
+
+def test_mvt_manager_build_query__grid_clusters(mvt_manager):
+    mvt_manager.cluster_aggregates = {
+        "max city": ("max", "city"),
+        "total": ("sum", "other_column"),
+    }
+    expected_query = """
+        SELECT NULL AS id, ST_AsMVT(q, 'default', 4096, 'mvt_geom')
+            FROM (SELECT COUNT(*) AS point_count, MAX(points.city) AS "max city", SUM(points.other_column) AS "total",
+                ST_AsMVTGeom(ST_Centroid(ST_Collect(points.geom)),
+                ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
+            FROM (SELECT ST_Transform(test_table.jazzy_geo, 3857) AS geom, test_table.city, test_table.other_column
+                FROM test_table
+                WHERE test_table.jazzy_geo && ST_SetSRID(ST_GeomFromText(%s), 4326) AND ST_Intersects(test_table.jazzy_geo, ST_SetSRID(ST_GeomFromText(%s), 4326))) AS points
+            GROUP BY FLOOR((ST_X(points.geom) + 20037508.342789244) / 2445.98), FLOOR((ST_Y(points.geom) + 20037508.342789244) / 2445.98)
+            LIMIT %s
+            OFFSET %s) AS q;
+    """.strip()
+
+    query, _ = mvt_manager._build_query(cluster=2445.98, simplify=10)
+
+    assert query == expected_query
+
+
+def test_mvt_manager_build_query__dbscan_clusters(mvt_manager):
+    query, _ = mvt_manager._build_query(
+        cluster=50, cluster_method="dbscan", cluster_aggregates={}
+    )
+
+    assert (
+        "ST_ClusterDBSCAN(ST_Transform(test_table.jazzy_geo, 3857), eps := 50.0, "
+        "minpoints := 1) OVER () AS cluster\n" in query
+    )
+    assert "GROUP BY points.cluster\n" in query
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"cluster": -1},
+        {"cluster": 10, "cluster_method": "kmeans"},
+        {"cluster": 10, "cluster_aggregates": {"median": ("median", "city")}},
+        {"cluster": 10, "cluster_aggregates": {"total": ("sum", "unknown")}},
+        {"cluster": 10, "keyset": "first"},
+    ],
+)
+def test_mvt_manager_build_query__invalid_clusters(options, mvt_manager):
+    with pytest.raises(ValueError):
+        mvt_manager._build_query(**options)
+
+
+def test_mvt_manager_build_query__routes_zoom_to_generalized_table(mvt_manager):
+    mvt_manager.generalizations = {0: 2000, 6: 200, 10: None}
+    mvt_manager.model._meta.pk.column = "other_column"
+    expected_query = """
+        SELECT NULL AS id, ST_AsMVT(q, 'default', 4096, 'mvt_geom')
+            FROM (SELECT other_column, city,
+                ST_AsMVTGeom(test_table_mvt_z6.geom,
+                ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857), 4096, 0, false) AS mvt_geom
+            FROM test_table JOIN test_table_mvt_z6 ON test_table_mvt_z6.other_column = test_table.other_column
+            WHERE test_table_mvt_z6.geom && ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857) AND ST_Intersects(test_table_mvt_z6.geom, ST_Transform(ST_SetSRID(ST_GeomFromText(%s), 4326), 3857)) AND (ST_Dimension(test_table_mvt_z6.geom) = 0 OR ST_Length(ST_BoundingDiagonal(test_table_mvt_z6.geom)) >= 50.0)
+            LIMIT %s
+            OFFSET %s) AS q;
+    """.strip()
+
+    with patch.object(
+        mvt_manager, "_create_select_statement", return_value="other_column, city,"
+    ):
+        query, _ = mvt_manager._build_query(min_size=50, zoom=9)
+
+    assert query == expected_query
+    assert mvt_manager.get_generalized_table(None) is None
+    assert mvt_manager.get_generalized_table(0) == "test_table_mvt_z0"
+    assert mvt_manager.get_generalized_table(12) is None
+    assert "test_table.jazzy_geo" in mvt_manager._build_query(zoom=10)[0]
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect_tiles(get_conn, mvt_manager):
+    expected_query = """
+        WITH tiles AS (
+            SELECT n, envelope, ST_Transform(envelope, 4326) AS bounds
+            FROM (SELECT n, ST_TileEnvelope(z, x, y) AS envelope
+                FROM unnest(%s::integer[], %s::integer[], %s::integer[])
+                    WITH ORDINALITY AS t(z, x, y, n)) AS t
+        )
+        SELECT tile.*
+            FROM tiles CROSS JOIN LATERAL (SELECT NULL AS id, ST_AsMVT(q, 'default', 4096, 'mvt_geom')
+            FROM (SELECT other_column, city,
+                ST_AsMVTGeom(ST_Transform(test_table.jazzy_geo, 3857),
+                tiles.envelope, 4096, 0, false) AS mvt_geom
+            FROM test_table
+            WHERE test_table.jazzy_geo && tiles.bounds AND ST_Intersects(test_table.jazzy_geo, tiles.bounds)
+            LIMIT %s
+            OFFSET %s) AS q) AS tile
+            ORDER BY tiles.n;
+    """.strip()
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [(None, b"first"), (None, b"")]
+
+    with patch.object(
+        mvt_manager, "_create_select_statement", return_value="other_column, city,"
+    ):
+        mvts = mvt_manager.intersect_tiles([(12, 1, 2), (12, 3, 4)], limit=10)
+
+    assert mvts == [b"first", b""]
+    cursor.execute.assert_called_once_with(
+        expected_query, [[12, 12], [1, 3], [2, 4], 10, 0]
+    )
+    assert mvt_manager.intersect_tiles([]) == []
+    with pytest.raises(ValueError):
+        mvt_manager.intersect_tiles([(12, 1, 2), (13, 3, 4)])
+
+
+@patch("rest_framework_mvt.generalization.transaction")
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_build_generalized_tables(get_conn, transaction, mvt_manager):
+    mvt_manager.generalizations = {0: 2000, 6: 0, 10: None}
+    mvt_manager.model._meta.pk.column = "id"
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+
+    tables = mvt_manager.build_generalized_tables()
+
+    assert tables == ["test_table_mvt_z0", "test_table_mvt_z6"]
+    statements = [call[0][0] for call in cursor.execute.call_args_list]
+    assert statements[:9] == [
+        "DROP TABLE IF EXISTS test_table_mvt_z0_new",
+        "CREATE TABLE test_table_mvt_z0_new AS SELECT test_table.id AS id, "
+        "ST_SimplifyPreserveTopology(ST_Transform(test_table.jazzy_geo, 3857), 2000.0) "
+        "AS geom FROM test_table WHERE test_table.jazzy_geo IS NOT NULL",
+        "ALTER TABLE test_table_mvt_z0_new ADD PRIMARY KEY (id)",
+        "CREATE INDEX test_table_mvt_z0_new_geom ON test_table_mvt_z0_new "
+        "USING GIST (geom)",
+        "DROP TABLE IF EXISTS test_table_mvt_z0",
+        "ALTER TABLE test_table_mvt_z0_new RENAME TO test_table_mvt_z0",
+        "ALTER INDEX test_table_mvt_z0_new_pkey RENAME TO test_table_mvt_z0_pkey",
+        "ALTER INDEX test_table_mvt_z0_new_geom RENAME TO test_table_mvt_z0_geom",
+        "ANALYZE test_table_mvt_z0",
+    ]
+    assert (
+        "SELECT test_table.id AS id, ST_Transform(test_table.jazzy_geo, 3857) AS geom"
+        in statements[10]
+    )
+    assert transaction.atomic.call_count == 2
+
+
+@patch("rest_framework_mvt.generalization.transaction")
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_update_generalized_tables(get_conn, transaction, mvt_manager):
+    mvt_manager.generalizations = {0: 2000}
+    mvt_manager.model._meta.pk.column = "id"
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+
+    mvt_manager.update_generalized_tables({7})
+
+    cursor.execute.assert_any_call(
+        "DELETE FROM test_table_mvt_z0 WHERE id = ANY(%s)", [[7]]
+    )
+    query, parameters = cursor.execute.call_args[0]
+    assert query.startswith(
+        "INSERT INTO test_table_mvt_z0 (id, geom) SELECT test_table.id, "
+        "ST_SimplifyPreserveTopology("
+    )
+    assert parameters == [[7]]
+
+
+@patch("rest_framework_mvt.management.commands.build_generalized_tables.apps")
+def test_build_generalized_tables_command(apps):
+    manager = MVTManager(generalizations={0: 2000})
+    manager.build_generalized_tables = MagicMock(return_value=["road_mvt_z0"])
+    apps.get_model.return_value = MagicMock(vector_tiles=manager)
+    stdout = io.StringIO()
+
+    call_command("build_generalized_tables", "app.Road", stdout=stdout)
+
+    apps.get_model.assert_called_once_with("app.Road")
+    assert stdout.getvalue().startswith("Built road_mvt_z0 in ")
+    manager.generalizations = None
+    with pytest.raises(CommandError):
+        call_command("build_generalized_tables", "app.Road")
+
+
+def test_mvt_manager_build_query__unknown_columns_or_method(mvt_manager):
+    with pytest.raises(ValueError):
+        mvt_manager._build_query(columns=["not_a_column"])
+    with pytest.raises(ValueError):
+        mvt_manager._build_query(simplify=1, simplify_method="not_a_method")
+
+
+@patch("rest_framework_mvt.managers.MVTManager.only")
+def test_mvt_manager_build_query__tile_format(only, mvt_manager):
+    query = MagicMock()
+    query.sql_with_params.return_value = ("SELECT other_column, city FROM table", [])
+    only.return_value = MagicMock(query=query)
+    mvt_manager.extent = 1024
+    mvt_manager.layer_name = "parcels"
+
+    query, _ = mvt_manager._build_query(buffer=64, clip=True, layer_name="it's 100%")
+
+    assert query.startswith(
+        "SELECT NULL AS id, ST_AsMVT(q, 'it''s 100%%', 1024, 'mvt_geom')"
+    )
+    assert "3857), 1024, 64, true) AS mvt_geom" in query
+    assert "'parcels'" in mvt_manager._build_query()[0]
+
+
+def test_mvt_manager_build_query__invalid_tile_format(mvt_manager):
+    with pytest.raises(ValueError):
+        mvt_manager._build_query(extent=0)
+    with pytest.raises(ValueError):
+        mvt_manager._build_query(buffer=-1)
+
+
+def test_mvt_manager_aintersect__without_pool_runs_intersect(mvt_manager):
+    mvt_manager.intersect = MagicMock(return_value=b"tile")
+
+    mvt = asyncio.run(mvt_manager.aintersect(bbox="POLYGON", limit=5, columns=["city"]))
+
+    assert mvt == b"tile"
+    mvt_manager.intersect.assert_called_once_with(
+        bbox="POLYGON", limit=5, offset=0, filters={}, columns=["city"]
+    )
+
+
+def test_mvt_manager_aintersect__queries_async_pool(mvt_manager):
+    mvt_manager._build_query = MagicMock(return_value=("query", ["where"]))
+    cursor = MagicMock(
+        execute=AsyncMock(), fetchone=AsyncMock(return_value=(None, b"tile"))
+    )
+    cursor.__aenter__ = AsyncMock(return_value=cursor)
+    cursor.__aexit__ = AsyncMock(return_value=False)
+    connection = MagicMock(cursor=MagicMock(return_value=cursor))
+    connection.__aenter__ = AsyncMock(return_value=connection)
+    connection.__aexit__ = AsyncMock(return_value=False)
+    mvt_manager.async_pool = MagicMock(connection=MagicMock(return_value=connection))
+    mvt_manager.prepared = True
+
+    mvt = asyncio.run(mvt_manager.aintersect(bbox="POLYGON", limit=10, offset=7))
+
+    assert mvt == b"tile"
+    mvt_manager._build_query.assert_called_once_with(filters={}, counted=False)
+    cursor.execute.assert_awaited_once_with(
+        "query", ["POLYGON"] * 3 + ["where", 10, 7], prepare=True
+    )
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_intersect__sends_tile_queried(get_conn, mvt_manager):
+    mvt_manager._build_query = MagicMock(return_value=("query", []))
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (None, 3, b"tile")
+    receiver = MagicMock()
+    tile_queried.connect(receiver, sender=mvt_manager.model, weak=False)
+    try:
+        mvt = mvt_manager.intersect(bbox="POLYGON")
+    finally:
+        tile_queried.disconnect(receiver, sender=mvt_manager.model)
+
+    assert mvt == b"tile"
+    assert mvt_manager._build_query.call_args[1]["counted"] is True
+    kwargs = receiver.call_args[1]
+    assert kwargs["sender"] is mvt_manager.model
+    assert kwargs["size"] == 4
+    assert kwargs["features"] == 3
+    assert set(kwargs["timings"]) == {"build", "execute", "fetch"}
+
+
+@patch("django.db.connections")
+def test_mvt_manager_intersect__routes_to_replicas(connections):
+    mvt_manager = MVTManager(geo_col="jazzy_geo", replicas=["replica_1", "replica_2"])
+    mvt_manager.model = MagicMock()
+    mvt_manager._build_query = MagicMock(return_value=("query", []))
+    connection = MagicMock()
+    connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (
+        None,
+        b"tile",
+    )
+    connections.__getitem__.return_value = connection
+
+    tiles = [mvt_manager.intersect(bbox="POLYGON") for _ in range(2)]
+
+    assert tiles == [b"tile", b"tile"]
+    assert [call.args[0] for call in connections.__getitem__.call_args_list] == [
+        "replica_1",
+        "replica_2",
+    ]
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_has_features(get_conn, mvt_manager):
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (True,)
+
+    assert mvt_manager.has_features(bbox="POLYGON")
+
+    query, parameters = cursor.execute.call_args[0]
+    assert query.startswith("SELECT EXISTS(SELECT 1 FROM test_table WHERE ")
+    assert parameters == ["POLYGON", "POLYGON"]
+
+
+@patch("rest_framework_mvt.managers.MVTManager._get_connection")
+def test_mvt_manager_get_bounds(get_conn, mvt_manager):
+    cursor = get_conn.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (-94.0, 41.0, -93.0, 42.0)
+
+    assert mvt_manager.get_bounds() == (-94.0, 41.0, -93.0, 42.0)
+    assert "ST_Extent(test_table.jazzy_geo)::geometry, 4326)" in (
+        cursor.execute.call_args[0][0]
+    )
+
+    cursor.fetchone.return_value = (None, None, None, None)
+    assert mvt_manager.get_bounds() is None
@@ -0,0 +1,100 @@
+from mock import patch, MagicMock
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_mvt.archives import create_archive
+from rest_framework_mvt.caches import LRUTileCache
+from rest_framework_mvt.metrics import Histogram, MetricsRegistry, metrics_view_factory
+from rest_framework_mvt.signals import tile_queried
+from rest_framework_mvt.views import BaseMVTView, archive_view_factory
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.connect()
+    yield registry
+    registry.disconnect()
+
+
+def test_Histogram__quantile_interpolates_within_buckets():
+    histogram = Histogram("h", "Help.", (1, 2, 4), ("layer",))
+    for value in (0.5, 1.5, 1.5, 3):
+        histogram.observe(value, layer="a")
+
+    assert histogram.quantile(0.5, layer="a") == pytest.approx(1.5)
+    assert histogram.quantile(1, layer="a") == pytest.approx(4)
+    assert histogram.quantile(0.5, layer="b") is None
+
+
+def test_Histogram__collect():
+    histogram = Histogram("h", "Help.", (1, 2), ("layer",))
+    histogram.observe(0.5, layer='a"b')
+    histogram.observe(3, layer='a"b')
+
+    assert histogram.collect() == [
+        "# HELP h Help.",
+        "# TYPE h histogram",
+        'h_bucket{layer="a\\"b",le="1.0"} 1',
+        'h_bucket{layer="a\\"b",le="2.0"} 1',
+        'h_bucket{layer="a\\"b",le="+Inf"} 2',
+        'h_sum{layer="a\\"b"} 3.5',
+        'h_count{layer="a\\"b"} 2',
+    ]
+
+
+def test_MetricsRegistry__records_served_tiles(registry):
+    view = BaseMVTView(tile_cache=LRUTileCache())
+    view.model = MagicMock()
+    view.model._meta.label_lower = "app.model"
+    view.model.vector_tiles.geo_col = "geom"
+    view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(APIRequestFactory().get("/", {"tile": "1/0/0"}))
+
+    view.get(request)
+    view.get(request)
+    view.get(Request(APIRequestFactory().get("/")))
+
+    labels = {"layer": "app.model.geom", "zoom": 1, "status": 200}
+    assert registry.tile_seconds.quantile(0.5, cache="miss", **labels) is not None
+    assert registry.tile_seconds.quantile(0.5, cache="hit", **labels) is not None
+    assert registry.tile_bytes.quantile(1, layer="app.model.geom", zoom=1) == 1024
+    assert 'status="400"' in registry.render()
+
+
+def test_MetricsRegistry__records_archived_tiles_by_file_name(registry, tmp_path):
+    path = str(tmp_path / "layer.mbtiles")
+    with create_archive(path) as writer:
+        writer.add_tile(1, 0, 0, b"mvt goes here")
+    view = archive_view_factory(path)
+
+    view(APIRequestFactory().get("/", {"tile": "1/0/0"}))
+
+    assert registry.tile_seconds.quantile(
+        0.5, layer="layer.mbtiles", zoom=1, status=200, cache=""
+    )
+
+
+def test_MetricsRegistry__records_tile_queries(registry):
+    model = MagicMock()
+    model._meta.label_lower = "app.model"
+
+    tile_queried.send(
+        sender=model,
+        timings={"build": 0.001, "execute": 0.2, "fetch": 0.003},
+        size=100,
+        features=42,
+    )
+
+    assert registry.query_seconds.quantile(1, model="app.model", phase="execute") == (
+        pytest.approx(0.25)
+    )
+    assert registry.query_features.quantile(1, model="app.model") == 100
+
+
+def test_metrics_view_factory(registry):
+    response = metrics_view_factory(registry)(None)
+
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"# TYPE mvt_tile_seconds histogram" in response.content
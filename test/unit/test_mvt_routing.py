@@ -0,0 +1,108 @@
+from django.db import OperationalError, ProgrammingError
+from mock import patch, AsyncMock, MagicMock
+import asyncio
+import pytest
+
+from rest_framework_mvt.routing import ReplicaRouter, is_unavailable
+
+
+def _error(error_class, code=None):
+    error = error_class("error")
+    if code is not None:
+        error.__cause__ = Exception()
+        error.__cause__.pgcode = code
+    return error
+
+
+def test_ReplicaRouter__round_robin():
+    router = ReplicaRouter(["replica_1", "replica_2"])
+
+    aliases = [router.execute(lambda alias: alias) for _ in range(4)]
+
+    assert aliases == ["replica_1", "replica_2", "replica_1", "replica_2"]
+
+
+def test_ReplicaRouter__least_in_flight():
+    router = ReplicaRouter(["replica_1", "replica_2"], strategy="least_in_flight")
+
+    aliases = router.execute(lambda alias: [alias, router.execute(lambda other: other)])
+
+    assert aliases == ["replica_1", "replica_2"]
+    assert {status["in_flight"] for status in router.get_status().values()} == {0}
+
+
+def test_ReplicaRouter__retries_unavailable_alias_and_ejects_it():
+    router = ReplicaRouter(["replica_1", "replica_2"], max_failures=1)
+
+    def query(alias):
+        if alias == "replica_1":
+            raise _error(OperationalError)
+        return alias
+
+    assert router.execute(query) == "replica_2"
+    assert router.get_status()["replica_1"] == {
+        "in_flight": 0,
+        "failures": 1,
+        "ejected": True,
+    }
+    assert [router.execute(query) for _ in range(2)] == ["replica_2", "replica_2"]
+
+
+@patch("rest_framework_mvt.routing.time")
+def test_ReplicaRouter__tries_ejected_alias_again(time):
+    time.monotonic.return_value = 100
+    router = ReplicaRouter(["replica_1"], max_failures=2, ejection_seconds=30)
+    query = MagicMock(side_effect=[_error(OperationalError, "08006")] * 2 + ["tile"])
+
+    for _ in range(2):
+        with pytest.raises(OperationalError):
+            router.execute(query)
+    assert router.get_status()["replica_1"]["ejected"]
+    time.monotonic.return_value = 131
+
+    assert router.execute(query) == "tile"
+    assert router.get_status()["replica_1"]["failures"] == 0
+
+
+def test_ReplicaRouter__does_not_retry_query_errors():
+    router = ReplicaRouter(["replica_1", "replica_2"])
+    query = MagicMock(side_effect=_error(OperationalError, "57014"))
+
+    with pytest.raises(OperationalError):
+        router.execute(query)
+
+    query.assert_called_once_with("replica_1")
+    assert router.get_status()["replica_1"]["failures"] == 0
+
+
+def test_ReplicaRouter__aexecute():
+    router = ReplicaRouter(["replica_1", "replica_2"])
+    query = AsyncMock(side_effect=[_error(OperationalError), "tile"])
+
+    assert asyncio.run(router.aexecute(query)) == "tile"
+    assert [call.args[0] for call in query.await_args_list] == [
+        "replica_1",
+        "replica_2",
+    ]
+
+
+@pytest.mark.parametrize(
+    "error, unavailable",
+    [
+        (_error(OperationalError), True),
+        (_error(OperationalError, "08001"), True),
+        (_error(OperationalError, "57P01"), True),
+        (_error(OperationalError, "57014"), False),
+        (_error(ProgrammingError), False),
+        (ValueError(), False),
+    ],
+)
+def test_is_unavailable(error, unavailable):
+    assert is_unavailable(error) is unavailable
+
+
+def test_ReplicaRouter__invalid_arguments():
+    with pytest.raises(ValueError):
+        ReplicaRouter([])
+    with pytest.raises(ValueError):
+        ReplicaRouter(["replica_1"], strategy="random")
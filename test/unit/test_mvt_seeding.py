@@ -0,0 +1,223 @@
+import gzip
+from io import StringIO
+
+from django.contrib.gis.geos import Polygon
+from django.core.management import CommandError, call_command
+from mock import MagicMock, patch
+import pytest
+
+from rest_framework_mvt.archives import open_archive
+from rest_framework_mvt.caches import FileSystemTileCache, LRUTileCache
+from rest_framework_mvt.seeding import TileSeeder, resolve_view
+from rest_framework_mvt.tiles import tile_bounds
+from rest_framework_mvt.views import BaseMVTView, _unpack_etag
+
+TILE_CACHE = LRUTileCache()
+
+
+class SeedView(BaseMVTView):
+    model = MagicMock()
+    tile_cache = TILE_CACHE
+
+
+class UncachedView(BaseMVTView):
+    model = MagicMock()
+
+
+def _has_features_near_des_moines(bbox):
+    return bbox.intersects(Polygon.from_bbox((-93.7, 41.5, -93.5, 41.7)))
+
+
+def test_resolve_view__view_path():
+    view = resolve_view("test.unit.test_mvt_seeding.SeedView")
+
+    assert isinstance(view, SeedView)
+    assert view.tile_cache is TILE_CACHE
+
+
+@patch("rest_framework_mvt.seeding.apps")
+def test_resolve_view__model(apps):
+    apps.get_model.return_value.__name__ = "Road"
+    tile_cache = LRUTileCache()
+
+    view = resolve_view("app.Road", tile_cache)
+
+    apps.get_model.assert_called_once_with("app.Road")
+    assert view.model is apps.get_model.return_value
+    assert view.tile_cache is tile_cache
+
+
+def test_resolve_view__invalid_targets():
+    with pytest.raises(ValueError):
+        resolve_view("test.unit.test_mvt_seeding.TILE_CACHE")
+    with pytest.raises(ValueError):
+        resolve_view("test.unit.test_mvt_seeding.Missing")
+
+
+def test_TileSeeder__iter_tiles_skips_empty_branches():
+    SeedView.model.vector_tiles.has_features.side_effect = _has_features_near_des_moines
+    seeder = TileSeeder(
+        "test.unit.test_mvt_seeding.SeedView",
+        2,
+        8,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+    )
+
+    tiles = list(seeder.iter_tiles())
+
+    assert tiles[0] == (2, 0, 1)
+    assert {z for z, _, _ in tiles} == set(range(2, 9))
+    for tile in tiles:
+        assert _has_features_near_des_moines(Polygon.from_bbox(tile_bounds(*tile)))
+    # only 1 tile at z2 and a handful at z8 out of 65536
+    assert len([tile for tile in tiles if tile[0] == 8]) <= 4
+    checked = SeedView.model.vector_tiles.has_features.call_count
+    assert checked < 4 * len(tiles) + 10
+
+
+def test_TileSeeder__seed_requires_tile_cache():
+    seeder = TileSeeder("test.unit.test_mvt_seeding.UncachedView", 0, 4)
+
+    with pytest.raises(ValueError):
+        seeder.seed()
+
+
+def test_TileSeeder__iter_tiles_without_data():
+    SeedView.model.vector_tiles.get_bounds.return_value = None
+
+    assert not list(
+        TileSeeder("test.unit.test_mvt_seeding.SeedView", 0, 4).iter_tiles()
+    )
+
+
+def test_TileSeeder__seed_resumes_from_state_file(tmp_path):
+    SeedView.model.vector_tiles.has_features.side_effect = _has_features_near_des_moines
+    SeedView.model.vector_tiles.intersect.return_value = b"tile"
+    state_file = str(tmp_path / "state")
+    seeder = TileSeeder(
+        "test.unit.test_mvt_seeding.SeedView",
+        0,
+        3,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+        tile_cache=LRUTileCache(),
+        state_file=state_file,
+    )
+    with open(state_file, "w") as state:
+        state.write("0/0/0\n1/0/0\n")
+    progress = MagicMock()
+    SeedView.model.vector_tiles.intersect.reset_mock()
+
+    assert seeder.seed(progress) == 2
+    assert progress.call_count == 2
+    assert SeedView.model.vector_tiles.intersect.call_count == 2
+    with open(state_file) as state:
+        assert state.read().split() == ["0/0/0", "1/0/0", "2/0/1", "3/1/2"]
+    assert seeder.seed() == 0
+
+
+@patch("rest_framework_mvt.management.commands.seed_mvt_tiles.TileSeeder")
+def test_seed_mvt_tiles_command(tile_seeder):
+    tile_seeder.return_value.seed.side_effect = lambda progress: progress(2, 0.5)
+    stdout = StringIO()
+
+    call_command(
+        "seed_mvt_tiles",
+        "app.Road",
+        "--min-zoom=2",
+        "--max-zoom=10",
+        "--bbox=-94,41,-93,42",
+        "--encoding=gzip",
+        "--processes=4",
+        "--report-every=1",
+        stdout=stdout,
+    )
+
+    tile_seeder.assert_called_once_with(
+        "app.Road",
+        min_zoom=2,
+        max_zoom=10,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+        polygon=None,
+        tile_cache=None,
+        encodings=["gzip"],
+        processes=4,
+        state_file=None,
+    )
+    assert "2 tiles in 0.5s (4.0 tiles/s)" in stdout.getvalue()
+
+
+def test_export_mvt_tiles_command(tmp_path):
+    SeedView.model.vector_tiles.has_features.side_effect = _has_features_near_des_moines
+    SeedView.model.vector_tiles.intersect.return_value = b"tile"
+    SeedView.model.vector_tiles.layer_name = "roads"
+    output = str(tmp_path / "roads.mbtiles")
+    stdout = StringIO()
+
+    call_command(
+        "export_mvt_tiles",
+        "test.unit.test_mvt_seeding.SeedView",
+        output,
+        "--max-zoom=3",
+        "--bbox=-94,41,-93,42",
+        stdout=stdout,
+    )
+
+    archive = open_archive(output)
+    assert gzip.decompress(archive.get_tile(3, 1, 2)) == b"tile"
+    assert archive.get_tile(3, 0, 0) is None
+    assert '"id": "roads"' in archive.get_metadata()["json"]
+    assert "Exported 4 tiles" in stdout.getvalue()
+
+
+def test_seed_mvt_tiles_command__invalid_arguments():
+    with pytest.raises(CommandError):
+        call_command("seed_mvt_tiles", "app.Road", "--min-zoom=5", "--max-zoom=4")
+    with pytest.raises(CommandError):
+        call_command("seed_mvt_tiles", "app.Road", "--bbox=1,2,3")
+
+
+def test_TileSeeder__seed_refreshes_cached_tiles():
+    SeedView.model.vector_tiles.has_features.side_effect = _has_features_near_des_moines
+    SeedView.model.vector_tiles.intersect.return_value = b"stale"
+    seeder = TileSeeder(
+        "test.unit.test_mvt_seeding.SeedView",
+        0,
+        0,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+        tile_cache=LRUTileCache(),
+    )
+    seeder.seed()
+    SeedView.model.vector_tiles.intersect.return_value = b"fresh"
+
+    assert seeder.seed() == 1
+    mvt = seeder.view._intersect((0, 0, 0), None, None, {})
+    assert bytes(_unpack_etag(mvt)[1]) == b"fresh"
+
+
+def test_TileSeeder__seed_with_processes(tmp_path):
+    SeedView.model.vector_tiles.has_features.side_effect = _has_features_near_des_moines
+    SeedView.model.vector_tiles.intersect.return_value = b"tile"
+    seeder = TileSeeder(
+        "test.unit.test_mvt_seeding.SeedView",
+        0,
+        5,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+        tile_cache=FileSystemTileCache(str(tmp_path)),
+        processes=2,
+    )
+
+    assert seeder.seed() == len(list(seeder.iter_tiles()))
+
+
+def test_TileSeeder__seed_with_processes_rejects_process_local_cache():
+    seeder = TileSeeder(
+        "test.unit.test_mvt_seeding.SeedView",
+        0,
+        5,
+        bounds=(-94.0, 41.0, -93.0, 42.0),
+        tile_cache=LRUTileCache(),
+        processes=2,
+    )
+
+    with pytest.raises(ValueError):
+        seeder.seed()
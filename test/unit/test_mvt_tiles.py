@@ -0,0 +1,49 @@
+import pytest
+from rest_framework.serializers import ValidationError
+
+from rest_framework_mvt.tiles import (
+    get_zoom_value,
+    parse_tile,
+    tile_units_to_meters,
+    tiles_for_bounds,
+)
+
+
+def test_parse_tile():
+    assert parse_tile("2/1/3") == (2, 1, 3)
+    assert parse_tile("30/0/1073741823") == (30, 0, 2**30 - 1)
+
+
+@pytest.mark.parametrize(
+    "tile", ["cat", "2/1", "2/4/1", "-1/0/0", "31/0/0", "40/1/1", None]
+)
+def test_parse_tile__raises_ValidationError(tile):
+    with pytest.raises(ValidationError):
+        parse_tile(tile)
+
+
+def test_get_zoom_value():
+    zoom_values = {0: 86400, 12: 600}
+
+    assert get_zoom_value(zoom_values, 4) == 86400
+    assert get_zoom_value(zoom_values, 12) == 600
+    assert get_zoom_value({4: 1}, 2, default=5) == 5
+    assert get_zoom_value(300, 18) == 300
+    assert get_zoom_value(None, 18, default=5) == 5
+
+
+def test_tile_units_to_meters():
+    assert tile_units_to_meters(4096, 0) == pytest.approx(40075016.69)
+    assert tile_units_to_meters(1, 10, extent=512) == pytest.approx(76.44, abs=0.01)
+
+
+def test_tiles_for_bounds__padding_is_clamped():
+    tiles = set(tiles_for_bounds(-1, -1, 1, 1, 2, padding=1))
+
+    assert tiles == {(2, x, y) for x in range(4) for y in range(4)}
+    assert set(tiles_for_bounds(-179, 84, -178, 85, 2, padding=1)) == {
+        (2, 0, 0),
+        (2, 0, 1),
+        (2, 1, 0),
+        (2, 1, 1),
+    }
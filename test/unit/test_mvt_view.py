@@ -1,11 +1,30 @@
-from mock import patch, MagicMock
+import gzip
+import hashlib
 
-from rest_framework_mvt.views import BaseMVTView
+from django.db import models
+from django.test import AsyncClient, override_settings
+from django.urls import path
+from mock import patch, AsyncMock, MagicMock
+import asyncio
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from rest_framework_mvt.caches import LRUTileCache
+from rest_framework_mvt import views
+from rest_framework_mvt.tiles import tile_units_to_meters
+from rest_framework_mvt.archives import create_archive
+from rest_framework_mvt.views import (
+    AsyncMVTView,
+    BaseMVTView,
+    archive_view_factory,
+    batch_mvt_view_factory,
+    unpack_tiles,
+)
 from rest_framework.serializers import ValidationError
 
 
-@patch("rest_framework_mvt.views.TMSTileFilter")
-def test_BaseMVTView__get(tile_filter):
+def test_BaseMVTView__get():
     base_mvt_view = BaseMVTView(geo_col="geom")
     model = MagicMock()
     vector_tiles = MagicMock()
@@ -22,8 +41,7 @@ def test_BaseMVTView__get(tile_filter):
     vector_tiles.intersect.assert_called_once()
 
 
-@patch("rest_framework_mvt.views.TMSTileFilter")
-def test_BaseMVTView__intersects_validation_error_returns_400(tile_filter):
+def test_BaseMVTView__intersects_validation_error_returns_400():
     base_mvt_view = BaseMVTView(geo_col="geom")
     model = MagicMock()
     vector_tiles = MagicMock()
@@ -39,8 +57,7 @@ def test_BaseMVTView__intersects_validation_error_returns_400(tile_filter):
     assert response.content_type == "application/vnd.mapbox-vector-tile"
 
 
-@patch("rest_framework_mvt.views.TMSTileFilter")
-def test_BaseMVTView__does_not_pass_in_pagination_as_filters(tile_filter):
+def test_BaseMVTView__does_not_pass_in_pagination_as_filters():
     base_mvt_view = BaseMVTView(geo_col="geom")
     model = MagicMock()
     vector_tiles = MagicMock()
@@ -56,25 +73,601 @@ def test_BaseMVTView__does_not_pass_in_pagination_as_filters(tile_filter):
     assert response.content_type == "application/vnd.mapbox-vector-tile"
     request.GET.dict().pop.assert_called_with("offset", None)
     vector_tiles.intersect.assert_called_with(
-        bbox=tile_filter().get_filter_bbox(),
+        tile=(2, 1, 1),
         limit=1,
         offset=1,
         filters=request.GET.dict(),
+        zoom=2,
     )
 
 
-@patch("rest_framework_mvt.views.TMSTileFilter")
-def test_BaseMVTView__validate_paginate(tile_filter):
+def test_BaseMVTView__get_cleans_filters_with_filter_schema():
+    model = MagicMock()
+    model.vector_tiles.intersect.return_value = b"mvt"
+    filter_schema = MagicMock()
+    view = type(
+        "RoadMVTView",
+        (BaseMVTView,),
+        {"model": model, "filter_schema": filter_schema},
+    ).as_view()
+
+    response = view(APIRequestFactory().get("/", {"tile": "1/0/0", "lanes": "2"}))
+
+    assert response.status_code == 200
+    filter_schema.clean.assert_called_once_with(model, {"lanes": "2"})
+    assert (
+        model.vector_tiles.intersect.call_args[1]["filters"]
+        is filter_schema.clean.return_value
+    )
+
+    filter_schema.clean.side_effect = ValidationError("Unknown filter: name")
+    response = view(APIRequestFactory().get("/", {"tile": "1/0/0", "name": "x"}))
+
+    assert response.status_code == 400
+    model.vector_tiles.intersect.assert_called_once()
+
+
+def test_BaseMVTView__validate_paginate():
     limit, offset = BaseMVTView._validate_paginate("10", "7")
 
     assert limit == 10
     assert offset == 7
 
 
-@patch("rest_framework_mvt.views.TMSTileFilter")
-def test_BaseMVTView__validate_paginate_raises_ValidationError(tile_filter):
+def test_BaseMVTView__validate_paginate_raises_ValidationError():
     try:
         limit, offset = BaseMVTView._validate_paginate("cat", "7")
         assert False
     except ValidationError:
         assert True
+
+
+def test_BaseMVTView__get_uses_tile_cache():
+    tile_cache = LRUTileCache()
+    base_mvt_view = BaseMVTView(geo_col="geom", tile_cache=tile_cache)
+    model = MagicMock(_meta=MagicMock(label_lower="my_app.parcel"))
+    model.vector_tiles.geo_col = "geom"
+    model.vector_tiles.intersect.return_value = memoryview(b"")
+    base_mvt_view.model = model
+    request = MagicMock(query_params={"tile": "2/1/1"})
+
+    first = base_mvt_view.get(request)
+    second = base_mvt_view.get(request)
+
+    assert first.status_code == second.status_code == 204
+    assert second.data == b""
+    model.vector_tiles.intersect.assert_called_once()
+    assert tile_cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_BaseMVTView__get_sets_etag_and_cache_control():
+    base_mvt_view = BaseMVTView(cache_control_max_age={0: 86400, 14: 600})
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(APIRequestFactory().get("/tiles.mvt", {"tile": "14/1/1"}))
+
+    response = base_mvt_view.get(request)
+
+    assert response.status_code == 200
+    assert response["ETag"] == '"%s"' % hashlib.md5(b"mvt goes here").hexdigest()
+    assert response["Cache-Control"] == "public, max-age=600"
+
+
+def test_BaseMVTView__get_if_none_match_returns_304():
+    base_mvt_view = BaseMVTView(cache_control_max_age=3600)
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    etag = '"%s"' % hashlib.md5(b"mvt goes here").hexdigest()
+    request = Request(
+        APIRequestFactory().get(
+            "/tiles.mvt", {"tile": "2/1/1"}, HTTP_IF_NONE_MATCH=f'"stale", {etag}'
+        )
+    )
+
+    response = base_mvt_view.get(request)
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response["ETag"] == etag
+    assert response["Cache-Control"] == "public, max-age=3600"
+
+
+def test_BaseMVTView__get_if_none_match_compares_weakly():
+    base_mvt_view = BaseMVTView()
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    etag = '"%s"' % hashlib.md5(b"mvt goes here").hexdigest()
+    request = Request(
+        APIRequestFactory().get(
+            "/tiles.mvt", {"tile": "2/1/1"}, HTTP_IF_NONE_MATCH=f"W/{etag}"
+        )
+    )
+
+    response = base_mvt_view.get(request)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+def test_BaseMVTView__get_does_not_hash_cached_tiles():
+    base_mvt_view = BaseMVTView(tile_cache=LRUTileCache())
+    base_mvt_view.model = MagicMock(_meta=MagicMock(label_lower="my_app.parcel"))
+    base_mvt_view.model.vector_tiles.geo_col = "geom"
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(APIRequestFactory().get("/tiles.mvt", {"tile": "2/1/1"}))
+    first = base_mvt_view.get(request)
+
+    with patch("hashlib.md5", wraps=hashlib.md5) as md5:
+        second = base_mvt_view.get(request)
+
+    assert all(bytes(args[0]) != b"mvt goes here" for args, _ in md5.call_args_list)
+    assert second.data == b"mvt goes here"
+    assert second["ETag"] == first["ETag"]
+
+
+def test_BaseMVTView__get_if_none_match_stale_returns_tile():
+    base_mvt_view = BaseMVTView()
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(
+        APIRequestFactory().get(
+            "/tiles.mvt", {"tile": "2/1/1"}, HTTP_IF_NONE_MATCH='"stale"'
+        )
+    )
+
+    response = base_mvt_view.get(request)
+
+    assert response.status_code == 200
+    assert response.data == b"mvt goes here"
+    assert not response.has_header("Cache-Control")
+
+
+def test_BaseMVTView__get_compresses_once_and_caches_compressed_tile():
+    tile_cache = LRUTileCache()
+    base_mvt_view = BaseMVTView(content_encodings=("gzip",), tile_cache=tile_cache)
+    base_mvt_view.model = MagicMock(_meta=MagicMock(label_lower="my_app.parcel"))
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(
+        APIRequestFactory().get(
+            "/tiles.mvt", {"tile": "2/1/1"}, HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+    )
+
+    with patch(
+        "rest_framework_mvt.views.compress", wraps=views.compress
+    ) as compress_mock:
+        first = base_mvt_view.get(request)
+        second = base_mvt_view.get(request)
+
+    compress_mock.assert_called_once()
+    assert second.status_code == 200
+    assert second["Content-Encoding"] == "gzip"
+    assert second["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(second.data) == b"mvt goes here"
+    assert first["ETag"] == second["ETag"]
+
+
+def test_BaseMVTView__get_without_accept_encoding_is_not_compressed():
+    base_mvt_view = BaseMVTView(content_encodings=("gzip",))
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    request = Request(APIRequestFactory().get("/tiles.mvt", {"tile": "2/1/1"}))
+
+    response = base_mvt_view.get(request)
+
+    assert response.data == b"mvt goes here"
+    assert not response.has_header("Content-Encoding")
+    assert response["Vary"] == "Accept-Encoding"
+
+
+def test_BaseMVTView__get_database_compression():
+    base_mvt_view = BaseMVTView(content_encodings=("gzip",), database_compression=True)
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"gzipped in postgres"
+    request = Request(
+        APIRequestFactory().get(
+            "/tiles.mvt", {"tile": "2/1/1"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+    )
+
+    response = base_mvt_view.get(request)
+
+    assert response.data == b"gzipped in postgres"
+    assert response["Content-Encoding"] == "gzip"
+    assert base_mvt_view.model.vector_tiles.intersect.call_args[1]["gzip"] is True
+
+
+def test_BaseMVTView__get_passes_zoom_options():
+    base_mvt_view = BaseMVTView(
+        simplification={0: 4, 14: None},
+        simplification_method="snap",
+        min_feature_size={0: 2},
+        tile_columns={0: ["name"], 12: None},
+    )
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.extent = 4096
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+    intersect = base_mvt_view.model.vector_tiles.intersect
+
+    base_mvt_view.get(Request(APIRequestFactory().get("/", {"tile": "10/1/1"})))
+    base_mvt_view.get(Request(APIRequestFactory().get("/", {"tile": "14/1/1"})))
+
+    low_zoom, high_zoom = [call[1] for call in intersect.call_args_list]
+    assert low_zoom["simplify"] == pytest.approx(tile_units_to_meters(4, 10))
+    assert low_zoom["simplify_method"] == "snap"
+    assert low_zoom["min_size"] == pytest.approx(tile_units_to_meters(2, 10))
+    assert low_zoom["columns"] == ["name"]
+    assert "simplify" not in high_zoom
+    assert "columns" not in high_zoom
+    assert high_zoom["min_size"] == pytest.approx(tile_units_to_meters(2, 14))
+
+
+def test_BaseMVTView__get_passes_tile_format_overrides():
+    base_mvt_view = BaseMVTView(extent=512, buffer=64, simplification=1)
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+
+    base_mvt_view.get(Request(APIRequestFactory().get("/", {"tile": "10/1/1"})))
+
+    options = base_mvt_view.model.vector_tiles.intersect.call_args[1]
+    assert options["extent"] == 512
+    assert options["buffer"] == 64
+    assert "clip" not in options
+    assert "layer_name" not in options
+    assert options["simplify"] == pytest.approx(tile_units_to_meters(1, 10, 512))
+
+
+def test_AsyncMVTView__get():
+    model = MagicMock()
+    model.vector_tiles.aintersect = AsyncMock(return_value=b"mvt goes here")
+    tile_cache = LRUTileCache()
+    view = AsyncMVTView.as_view(model=model, tile_cache=tile_cache)
+    request = APIRequestFactory().get("/", {"tile": "1/0/0", "city": "Des Moines"})
+
+    responses = [asyncio.run(view(request)) for _ in range(2)]
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[1].data == b"mvt goes here"
+    assert responses[1]["ETag"] == f'"{hashlib.md5(b"mvt goes here").hexdigest()}"'
+    model.vector_tiles.aintersect.assert_awaited_once_with(
+        tile=(1, 0, 0),
+        limit=None,
+        offset=None,
+        filters={"city": "Des Moines"},
+        zoom=1,
+    )
+
+
+@patch("rest_framework_mvt.views._STREAMING_CHUNK_SIZE", 4)
+def test_BaseMVTView__get_streams_large_tiles():
+    model = MagicMock()
+    model.vector_tiles.intersect.return_value = memoryview(b"mvt goes here")
+    view = BaseMVTView.as_view(model=model, streaming_min_bytes=8)
+
+    response = view(APIRequestFactory().get("/", {"tile": "1/0/0"}))
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Length"] == "13"
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert list(response.streaming_content) == [b"mvt ", b"goes", b" her", b"e"]
+
+
+def test_AsyncMVTView__get_streams_large_tiles():
+    model = MagicMock()
+    model.vector_tiles.aintersect = AsyncMock(return_value=memoryview(b"mvt"))
+    view = AsyncMVTView.as_view(model=model, streaming_min_bytes=2)
+
+    async def get():
+        response = await view(APIRequestFactory().get("/", {"tile": "1/0/0"}))
+        return response, [chunk async for chunk in response.streaming_content]
+
+    response, chunks = asyncio.run(get())
+
+    assert response.is_async
+    assert response["Content-Length"] == "3"
+    assert chunks == [b"mvt"]
+
+
+@patch("rest_framework_mvt.views.django.VERSION", (4, 1, 0, "final", 0))
+def test_AsyncMVTView__get_streams_synchronously_before_django_4_2():
+    model = MagicMock()
+    model.vector_tiles.aintersect = AsyncMock(return_value=memoryview(b"mvt"))
+    view = AsyncMVTView.as_view(model=model, streaming_min_bytes=2)
+
+    response = asyncio.run(view(APIRequestFactory().get("/", {"tile": "1/0/0"})))
+
+    assert not response.is_async
+    assert list(response.streaming_content) == [b"mvt"]
+
+
+def test_AsyncMVTView__get_through_django_handler():
+    model = MagicMock()
+    model.vector_tiles.aintersect = AsyncMock(return_value=b"mvt goes here")
+    view = AsyncMVTView.as_view(model=model)
+    client = AsyncClient()
+
+    urls = (path("tile/", view),)
+
+    with override_settings(ALLOWED_HOSTS=["testserver"], ROOT_URLCONF=urls):
+        response = asyncio.run(client.get("/tile/", {"tile": "1/0/0"}))
+
+    assert asyncio.iscoroutinefunction(view)
+    assert response.status_code == 200
+    assert response.content == b"mvt goes here"
+
+
+def test_AsyncMVTView__get_without_tile_returns_400():
+    view = AsyncMVTView.as_view(model=MagicMock())
+
+    response = asyncio.run(view(APIRequestFactory().get("/")))
+
+    assert response.status_code == 400
+
+
+def test_BaseMVTView__get_coalesces_identical_requests():
+    base_mvt_view = BaseMVTView(coalesce_requests=True, single_flight=MagicMock())
+    base_mvt_view.model = MagicMock()
+    base_mvt_view.model._meta.label_lower = "app.model"
+    base_mvt_view.model.vector_tiles.geo_col = "geom"
+    base_mvt_view.single_flight.do.side_effect = lambda key, render: render()
+    base_mvt_view.model.vector_tiles.intersect.return_value = b"mvt goes here"
+
+    response = base_mvt_view.get(
+        Request(APIRequestFactory().get("/", {"tile": "1/0/0"}))
+    )
+
+    assert response.data == b"mvt goes here"
+    key = base_mvt_view.single_flight.do.call_args[0][0]
+    variant = LRUTileCache.make_variant({}, None, None, {"zoom": 1})
+    assert key == ("app.model.geom", 1, 0, 0, variant)
+
+
+def test_BaseMVTView__get_keyset_pagination_sends_and_caches_next_cursor():
+    model = MagicMock()
+    model._meta.pk = models.AutoField()
+    model.vector_tiles.extent = 4096
+    model.vector_tiles.intersect_page.side_effect = [
+        (b"first page", 42),
+        (b"last page", None),
+    ]
+    view = BaseMVTView.as_view(
+        model=model, tile_cache=LRUTileCache(), keyset_pagination=True
+    )
+    factory = APIRequestFactory()
+
+    responses = [
+        view(factory.get("/", {"tile": "1/0/0", "limit": 2})) for _ in range(2)
+    ]
+    cursor = responses[0]["X-Next-Cursor"]
+    last = view(factory.get("/", {"tile": "1/0/0", "limit": 2, "cursor": cursor}))
+
+    assert [response.data for response in responses] == [b"first page"] * 2
+    assert responses[1]["X-Next-Cursor"] == cursor
+    assert last.data == b"last page"
+    assert not last.has_header("X-Next-Cursor")
+    assert model.vector_tiles.intersect_page.call_count == 2
+    assert model.vector_tiles.intersect_page.call_args[1]["after"] == 42
+    model.vector_tiles.intersect.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"cursor": "!"},
+        {"limit": "0"},
+        # valid base64 of "cat", which is not a primary key
+        {"cursor": "Y2F0"},
+    ],
+)
+def test_BaseMVTView__get_keyset_pagination_invalid_cursor_returns_400(params):
+    model = MagicMock()
+    model._meta.pk = models.AutoField()
+    view = BaseMVTView.as_view(model=model, keyset_pagination=True)
+
+    response = view(APIRequestFactory().get("/", {"tile": "1/0/0", **params}))
+
+    assert response.status_code == 400
+
+
+def test_BaseMVTView__get_limits_tiles_with_degradations():
+    model = MagicMock()
+    model.vector_tiles.extent = 4096
+    model.vector_tiles.intersect_limited.return_value = b"mvt goes here"
+    view = BaseMVTView.as_view(
+        model=model,
+        max_features=1000,
+        tile_columns=["name", "height"],
+        degradations=({"simplification": 8}, {"tile_columns": ["name"]}),
+    )
+
+    response = view(APIRequestFactory().get("/", {"tile": "4/3/5"}))
+
+    assert response.data == b"mvt goes here"
+    model.vector_tiles.intersect.assert_not_called()
+    model.vector_tiles.intersect_limited.assert_called_once_with(
+        tile=(4, 3, 5),
+        limit=None,
+        offset=None,
+        filters={},
+        columns=["name", "height"],
+        zoom=4,
+        max_features=1000,
+        max_bytes=None,
+        fallbacks=[
+            {
+                "simplify": tile_units_to_meters(8, 4, 4096),
+                "simplify_method": "simplify",
+                "columns": ["name", "height"],
+                "zoom": 4,
+            },
+            {"columns": ["name"], "zoom": 4},
+        ],
+    )
+
+
+def test_BaseMVTView__get_clusters_points_below_zoom():
+    model = MagicMock()
+    model.vector_tiles.extent = 4096
+    model.vector_tiles.intersect.return_value = b"mvt goes here"
+    view = BaseMVTView.as_view(
+        model=model,
+        cluster_size={0: 64, 12: None},
+        cluster_aggregates={"total_power": ("sum", "power")},
+    )
+
+    view(APIRequestFactory().get("/", {"tile": "4/3/5"}))
+    view(APIRequestFactory().get("/", {"tile": "12/3/5"}))
+
+    low_zoom, high_zoom = [
+        call[1] for call in model.vector_tiles.intersect.call_args_list
+    ]
+    assert low_zoom["cluster"] == tile_units_to_meters(64, 4, 4096)
+    assert low_zoom["cluster_method"] == "grid"
+    assert low_zoom["cluster_aggregates"] == {"total_power": ("sum", "power")}
+    assert "cluster" not in high_zoom
+
+
+@pytest.mark.parametrize("extension", ["mbtiles", "pmtiles"])
+def test_archive_view_factory__serves_archived_tiles(extension, tmp_path):
+    path = str(tmp_path / f"layer.{extension}")
+    with create_archive(path) as writer:
+        writer.add_tile(1, 0, 1, b"mvt goes here")
+    view = archive_view_factory(path, cache_control_max_age=60)
+    factory = APIRequestFactory()
+
+    compressed = view(factory.get("/", {"tile": "1/0/1"}, HTTP_ACCEPT_ENCODING="gzip"))
+    plain = view(factory.get("/", {"tile": "1/0/1"}))
+    missing = view(factory.get("/", {"tile": "1/1/1"}))
+    filtered = view(factory.get("/", {"tile": "1/0/1", "name": "x"}))
+
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == b"mvt goes here"
+    assert plain.data == b"mvt goes here"
+    assert not plain.has_header("Content-Encoding")
+    assert plain["Cache-Control"] == "public, max-age=60"
+    assert missing.status_code == 204
+    assert filtered.status_code == 400
+
+
+def test_archive_view_factory__serves_uncompressed_archived_tiles(tmp_path):
+    path = str(tmp_path / "layer.mbtiles")
+    with create_archive(path) as writer:
+        writer._write_tile(1, 0, 1, b"mvt goes here")
+    view = archive_view_factory(path)
+    factory = APIRequestFactory()
+
+    compressed = view(factory.get("/", {"tile": "1/0/1"}, HTTP_ACCEPT_ENCODING="gzip"))
+    plain = view(factory.get("/", {"tile": "1/0/1"}))
+
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == b"mvt goes here"
+    assert plain.data == b"mvt goes here"
+    assert not plain.has_header("Content-Encoding")
+
+
+def test_batch_mvt_view_factory__serves_tiles_in_one_response():
+    model = MagicMock(__name__="Model")
+    model._meta.label_lower = "app.model"
+    model.vector_tiles.geo_col = "geom"
+    model.vector_tiles.intersect_tiles.side_effect = lambda tiles, **kwargs: [
+        "{}/{}/{}".format(*tile).encode() for tile in tiles
+    ]
+    tile_cache = LRUTileCache()
+    tile_cache.set_tile(
+        "app.model.geom",
+        3,
+        2,
+        1,
+        views._pack_etag(b"cached"),
+        LRUTileCache.make_variant({}, None, None, {"zoom": 3}),
+    )
+    view = batch_mvt_view_factory(model, tile_cache=tile_cache, max_batch_tiles=3)
+    request = APIRequestFactory().get("/", {"tiles": "2/1/1,3/2/1,2/0/1"})
+
+    response = view(request)
+
+    assert response.status_code == 200
+    assert response.content_type == "application/vnd.mapbox-vector-tile-batch"
+    assert unpack_tiles(response.data) == [
+        (2, 1, 1, b"2/1/1"),
+        (3, 2, 1, b"cached"),
+        (2, 0, 1, b"2/0/1"),
+    ]
+    model.vector_tiles.intersect_tiles.assert_called_once_with(
+        [(2, 1, 1), (2, 0, 1)], limit=-1, offset=0, filters={}, zoom=2
+    )
+    assert tile_cache.get_tile(
+        "app.model.geom",
+        2,
+        0,
+        1,
+        LRUTileCache.make_variant({}, None, None, {"zoom": 2}),
+    ) == views._pack_etag(b"2/0/1")
+
+
+def test_batch_mvt_view_factory__serves_tiles_of_bbox():
+    model = MagicMock(__name__="Model")
+    model.vector_tiles.intersect_tiles.side_effect = lambda tiles, **kwargs: [
+        b"mvt"
+    ] * len(tiles)
+    view = batch_mvt_view_factory(model)
+
+    response = view(
+        APIRequestFactory().get("/", {"zoom": "1", "bbox": "-10,-10,10,10"})
+    )
+
+    assert [tile[:3] for tile in unpack_tiles(response.data)] == [
+        (1, 0, 0),
+        (1, 0, 1),
+        (1, 1, 0),
+        (1, 1, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"tiles": ""},
+        {"tiles": "1/0/0,1/2/0"},
+        {"tiles": "1/0/0,1/0/1,1/1/0"},
+        {"zoom": "x", "bbox": "-10,-10,10,10"},
+        {"zoom": "1", "bbox": "-10,-10"},
+        {"tiles": "31/0/0"},
+        {"zoom": "31", "bbox": "-10,-10,10,10"},
+    ],
+)
+def test_batch_mvt_view_factory__invalid_tiles_return_400(params):
+    view = batch_mvt_view_factory(MagicMock(__name__="Model"), max_batch_tiles=2)
+
+    response = view(APIRequestFactory().get("/", params))
+
+    assert response.status_code == 400
+
+
+def test_BaseMVTView__views_rendering_a_model_differently_do_not_share_tiles():
+    model = MagicMock()
+    model._meta.label_lower = "app.model"
+    model.vector_tiles.geo_col = "geom"
+    model.vector_tiles.extent = 4096
+    model.vector_tiles.intersect.side_effect = lambda **kwargs: repr(
+        sorted(kwargs.get("columns", []))
+    ).encode()
+    tile_cache = LRUTileCache()
+    views = [
+        type(
+            "RoadMVTView",
+            (BaseMVTView,),
+            {"model": model, "tile_cache": tile_cache, **attributes},
+        ).as_view()
+        for attributes in ({}, {"tile_columns": ["name"], "layer_name": "names"})
+    ]
+
+    tiles = [
+        view(APIRequestFactory().get("/", {"tile": "1/0/0"})).data
+        for view in views + views
+    ]
+
+    assert tiles == [b"[]", b"['name']", b"[]", b"['name']"]
+    assert model.vector_tiles.intersect.call_count == 2